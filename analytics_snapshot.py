@@ -0,0 +1,287 @@
+import argparse
+import datetime
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pymysql
+
+from queries import BMI_BANDS
+
+# Columns exported per table: (column, kind). "id" columns are int64 with -1
+# for NULL, "float" columns float64 with NaN, "date" datetime64[D] with NaT and
+# "category" columns int32 codes into a dictionary stored in the manifest (-1
+# for NULL). Every table is exported ordered by its first column, so lookups by
+# that key are binary searches.
+SNAPSHOT_TABLES = {
+    "USER": [
+        ("UserID", "id"),
+        ("Gender", "category"),
+        ("DateOfBirth", "date"),
+        ("Weight", "float"),
+        ("Height", "float"),
+        ("BMI", "float"),
+        ("BloodGroup", "category"),
+        ("Location", "category"),
+    ],
+    "DISEASE": [
+        ("DiseaseID", "id"),
+        ("DiseaseName", "category"),
+        ("Severity", "float"),
+        ("Communicability", "category"),
+    ],
+    "PRESCRIBED_TREATMENTS": [
+        ("TreatmentID", "id"),
+        ("DiseaseID", "id"),
+        ("TypeOfTreatment", "category"),
+        ("Expense", "float"),
+    ],
+    "UNDERGOING_TREATMENTS": [
+        ("UserID", "id"),
+        ("TreatmentID", "id"),
+        ("DiseaseID", "id"),
+        ("Status", "category"),
+        ("AssociatedHospital", "category"),
+        ("AgeAtTreatmentStart", "float"),
+    ],
+}
+
+MANIFEST = "manifest.json"
+
+
+class _ColumnWriter:
+    """Accumulates one column batch by batch and converts it to a typed array"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.chunks = []
+        self.dictionary = {}  # value -> code, for category columns
+
+    def extend(self, values):
+        if self.kind == "id":
+            chunk = np.array([-1 if value is None else value for value in values], dtype=np.int64)
+        elif self.kind == "float":
+            chunk = np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+        elif self.kind == "date":
+            chunk = np.array([np.datetime64("NaT") if value is None else np.datetime64(value, "D")
+                              for value in values], dtype="datetime64[D]")
+        else:
+            chunk = np.array([-1 if value is None else self.dictionary.setdefault(value, len(self.dictionary))
+                              for value in values], dtype=np.int32)
+        self.chunks.append(chunk)
+
+    def array(self):
+        if self.chunks:
+            return np.concatenate(self.chunks)
+        dtype = {"id": np.int64, "float": np.float64, "date": "datetime64[D]", "category": np.int32}[self.kind]
+        return np.empty(0, dtype=dtype)
+
+
+def export_snapshot(connection, directory, batch_size=10000):
+    """Write every SNAPSHOT_TABLES table to ``directory`` as one .npy file per column.
+
+    All tables are read in one consistent-snapshot transaction on unbuffered
+    cursors. The snapshot is built next to ``directory`` and swapped in at the
+    end, so readers never see a half-written one. Returns the manifest.
+    """
+    building = directory.rstrip(os.sep) + ".building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    manifest = {"created_at": datetime.datetime.now().isoformat(timespec="seconds"), "tables": {}}
+    started = time.perf_counter()
+    connection.begin()
+    try:
+        connection.query("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+        for table, columns in SNAPSHOT_TABLES.items():
+            writers = [_ColumnWriter(kind) for _, kind in columns]
+            names = ", ".join(column for column, _ in columns)
+            with connection.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(f"SELECT {names} FROM {table} ORDER BY {columns[0][0]}")
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for position, writer in enumerate(writers):
+                        writer.extend([row[position] for row in rows])
+
+            entry = {"rows": 0, "columns": {}}
+            for (column, kind), writer in zip(columns, writers):
+                array = writer.array()
+                filename = f"{table}.{column}.npy"
+                np.save(os.path.join(building, filename), array)
+                entry["rows"] = len(array)
+                entry["columns"][column] = {"kind": kind, "file": filename, "dtype": str(array.dtype)}
+                if kind == "category":
+                    entry["columns"][column]["dictionary"] = list(writer.dictionary)
+            manifest["tables"][table] = entry
+    finally:
+        connection.rollback()
+    manifest["export_seconds"] = round(time.perf_counter() - started, 3)
+
+    with open(os.path.join(building, MANIFEST), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, default=str)
+    previous = directory.rstrip(os.sep) + ".previous"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, previous)
+    os.replace(building, directory)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+class AnalyticsSnapshot:
+    """Read-only view of an exported snapshot with vectorized cohort metrics
+
+    Columns are memory-mapped on first use, so opening a snapshot is cheap and
+    the OS page cache is shared between processes reading the same files.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as handle:
+            self.manifest = json.load(handle)
+        self._arrays = {}
+
+    def column(self, table, column):
+        """The column as a (memory-mapped) NumPy array; category columns are codes"""
+        key = (table, column)
+        if key not in self._arrays:
+            info = self.manifest["tables"][table]["columns"][column]
+            self._arrays[key] = np.load(os.path.join(self.directory, info["file"]), mmap_mode="r")
+        return self._arrays[key]
+
+    def dictionary(self, table, column):
+        """Values of a category column, indexed by code"""
+        return self.manifest["tables"][table]["columns"][column]["dictionary"]
+
+    def _lookup(self, table, keys, column):
+        """Values of ``column`` for the rows of ``table`` whose first (key) column equals ``keys``.
+
+        Returns (values, found) where found masks keys missing from the table.
+        """
+        key_column = self.column(table, SNAPSHOT_TABLES[table][0][0])
+        if not len(key_column):
+            return np.zeros(len(keys)), np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(key_column, keys), len(key_column) - 1)
+        return np.asarray(self.column(table, column))[positions], key_column[positions] == keys
+
+    def bmi_distribution(self, by="BloodGroup", bands=BMI_BANDS):
+        """{cohort: {band: users}} over the USER category column ``by``, plus an "All" row.
+
+        Also reports mean and median BMI per cohort; users without a BMI are skipped.
+        """
+        bmi = np.asarray(self.column("USER", "BMI"))
+        codes = np.asarray(self.column("USER", by))
+        labels = self.dictionary("USER", by)
+        names = sorted(bands, key=lambda band: bands[band][0])
+        edges = [bands[name][0] for name in names] + [bands[names[-1]][1]]
+
+        known = ~np.isnan(bmi) & (codes >= 0)
+        bins = np.digitize(bmi[known], edges[1:-1])
+        counts = np.bincount(codes[known] * len(names) + bins,
+                             minlength=len(labels) * len(names)).reshape(len(labels), len(names))
+
+        def summary(values, band_counts):
+            return {**dict(zip(names, band_counts.tolist())), "users": int(band_counts.sum()),
+                    "mean": round(float(values.mean()), 2) if len(values) else None,
+                    "median": round(float(np.median(values)), 2) if len(values) else None}
+
+        result = {label: summary(bmi[known][codes[known] == code], counts[code])
+                  for code, label in enumerate(labels)}
+        result["All"] = summary(bmi[~np.isnan(bmi)], np.bincount(np.digitize(bmi[~np.isnan(bmi)], edges[1:-1]),
+                                                                 minlength=len(names)))
+        return result
+
+    def severity_by_cohort(self, by="BloodGroup", status="Ongoing"):
+        """{cohort: {severity: distinct users}} for treatments in ``status`` (None for all).
+
+        ``by`` is a USER category column; each user counts once per severity.
+        """
+        users = np.asarray(self.column("UNDERGOING_TREATMENTS", "UserID"))
+        diseases = np.asarray(self.column("UNDERGOING_TREATMENTS", "DiseaseID"))
+        mask = np.ones(len(users), dtype=bool)
+        if status is not None:
+            statuses = self.dictionary("UNDERGOING_TREATMENTS", "Status")
+            if status not in statuses:
+                return {}
+            mask = np.asarray(self.column("UNDERGOING_TREATMENTS", "Status")) == statuses.index(status)
+
+        severity, disease_found = self._lookup("DISEASE", diseases[mask], "Severity")
+        cohort, user_found = self._lookup("USER", users[mask], by)
+        keep = disease_found & user_found & ~np.isnan(severity) & (cohort >= 0)
+        # Rows of (user, severity, cohort), deduplicated so a user counts once per severity
+        pairs = np.unique(np.stack([users[mask][keep], severity[keep].astype(np.int64),
+                                    cohort[keep].astype(np.int64)]), axis=1)
+        labels = self.dictionary("USER", by)
+        result = {}
+        if pairs.size:
+            grouped, counts = np.unique(pairs[[2, 1]], axis=1, return_counts=True)
+            for (code, level), count in zip(grouped.T.tolist(), counts.tolist()):
+                result.setdefault(labels[code], {})[level] = count
+        return result
+
+    def expense_percentiles(self, percentiles=(50, 90, 95, 99), by="TypeOfTreatment"):
+        """{treatment type: {count, mean, p50, ...}} of PRESCRIBED_TREATMENTS.Expense, plus "All" """
+        expense = np.asarray(self.column("PRESCRIBED_TREATMENTS", "Expense"))
+        codes = np.asarray(self.column("PRESCRIBED_TREATMENTS", by))
+        known = ~np.isnan(expense)
+
+        def summary(values):
+            if not len(values):
+                return {"count": 0}
+            points = np.percentile(values, percentiles)
+            return {"count": int(len(values)), "mean": round(float(values.mean()), 2),
+                    **{f"p{percentile}": round(float(point), 2) for percentile, point in zip(percentiles, points)}}
+
+        result = {label: summary(expense[known & (codes == code)])
+                  for code, label in enumerate(self.dictionary("PRESCRIBED_TREATMENTS", by))}
+        result["All"] = summary(expense[known])
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and query the columnar analytics snapshot")
+    parser.add_argument("command", choices=("export", "report"))
+    parser.add_argument("--snapshot", default="snapshots/medifit", help="snapshot directory")
+    parser.add_argument("--cohort", default="BloodGroup", help="USER column to group cohorts by")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        try:
+            connection = pymysql.connect(host=args.host, port=args.port, user=args.user,
+                                         password=args.password, database=args.database)
+        except pymysql.Error as e:
+            print(f"Error connecting to database: {e}")
+            return
+        try:
+            manifest = export_snapshot(connection, args.snapshot)
+        except pymysql.Error as e:
+            print(f"Error exporting analytics snapshot: {e}")
+            return
+        finally:
+            connection.close()
+        print(json.dumps({table: entry["rows"] for table, entry in manifest["tables"].items()}))
+        print(f"Exported in {manifest['export_seconds']}s to {args.snapshot}")
+        return
+
+    snapshot = AnalyticsSnapshot(args.snapshot)
+    started = time.perf_counter()
+    report = {
+        "bmi_distribution": snapshot.bmi_distribution(by=args.cohort),
+        "severity_by_cohort": snapshot.severity_by_cohort(by=args.cohort),
+        "expense_percentiles": snapshot.expense_percentiles(),
+    }
+    report["seconds"] = round(time.perf_counter() - started, 4)
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
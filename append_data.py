@@ -1,16 +1,12 @@
 import mysql.connector
 
-# Database connection
-connection = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="newp",
-    database="MediFit"
-)
-cursor = connection.cursor()
-
-# Insert Data
-try:
+import queries
+import summary_stats
+from symptom_search import tokenize
+
+
+def insert_sample_data(cursor):
+    """Insert the sample rows of every table; the caller commits"""
     # Populate USER Table
     cursor.executemany("""
     INSERT INTO USER (FirstName, LastName, Gender, DateOfBirth, Weight, Height, BloodGroup, Location)
@@ -23,17 +19,23 @@ try:
         ('David', 'Brown', 'Male', '1983-04-05', 80.2, 175, 'O-', 'Phoenix')
     ])
 
-    # Populate DISEASE Table (Modified to include Symptoms as a column)
-    cursor.executemany("""
-    INSERT INTO DISEASE (DiseaseName, Severity, TriggeringEnvironment, Communicability, Symptoms)
-    VALUES (%s, %s, %s, %s, %s);
-    """, [
+    # Populate DISEASE Table (Modified to include Symptoms as a column) and
+    # index each disease's symptoms in DISEASE_SYMPTOM for symptom search
+    diseases = [
         ('Cancer', 6, 'Smoking, radiation exposure', 'Low', 'High Blood Pressure, Fatigue, Weight Loss'),
         ('Type 2 Diabetes', 7, 'Obesity, sedentary lifestyle', 'Low', 'Frequent Thirst, Increased Hunger, Fatigue'),
         ('Common Cold', 3, 'Viral transmission, cold weather', 'Medium', 'Runny Nose, Sore Throat, Cough'),
         ('Seasonal Allergies', 4, 'Pollen, dust', 'Low', 'Itchy Eyes, Sneezing, Runny Nose'),
         ('COVID-19', 8, 'Respiratory droplets', 'High', 'Fever, Cough, Shortness of Breath')
-    ])
+    ]
+    postings = []
+    for disease in diseases:
+        cursor.execute("""
+        INSERT INTO DISEASE (DiseaseName, Severity, TriggeringEnvironment, Communicability, Symptoms)
+        VALUES (%s, %s, %s, %s, %s);
+        """, disease)
+        postings.extend((term[:50], cursor.lastrowid) for term in tokenize(disease[4]))
+    cursor.executemany(queries.INSERT_DISEASE_SYMPTOM, postings)
 
     # Populate PRESCRIBED_TREATMENTS Table
     cursor.executemany("""
@@ -59,16 +61,43 @@ try:
         (5, 'Favipiravir', 'Allopathy', 'Take with food')
     ])
 
-    # Populate TEST_REPORTS Table
+    # Populate TEST_REPORTS Table; keys are registered in TEST_REPORT_KEYS first
+    # and bodies go to TEST_REPORT_BODIES, compressed
     cursor.executemany("""
-    INSERT INTO TEST_REPORTS (UserID, TreatmentID, TestType, TestReport, OrganizationLab, DoctorOnConsultation, TestDate)
+    INSERT INTO TEST_REPORT_KEYS (TestID, UserID, TreatmentID)
+    VALUES (%s, %s, %s);
+    """, [(1, 1, 1), (2, 2, 2), (3, 3, 3), (4, 4, 4), (5, 5, 5)])
+    cursor.executemany("""
+    INSERT INTO TEST_REPORTS (TestID, UserID, TreatmentID, TestType, OrganizationLab, DoctorOnConsultation, TestDate)
     VALUES (%s, %s, %s, %s, %s, %s, %s);
     """, [
-        (1, 1, 'Blood Pressure Test', 'Normal', 'LabCorp', 'Dr. Smith', '2024-01-10'),
-        (2, 2, 'HbA1c Test', 'High glucose levels', 'Quest Diagnostics', 'Dr. Johnson', '2024-02-15'),
-        (3, 3, 'Nasal Swab', 'Positive for cold virus', 'CityLab', 'Dr. Adams', '2024-03-20'),
-        (4, 4, 'Allergy Skin Test', 'Positive for pollen allergy', 'AllergyClinic', 'Dr. Patel', '2024-04-25'),
-        (5, 5, 'RT-PCR', 'Positive for COVID-19', 'PathCare', 'Dr. Taylor', '2024-05-30')
+        (1, 1, 1, 'Blood Pressure Test', 'LabCorp', 'Dr. Smith', '2024-01-10'),
+        (2, 2, 2, 'HbA1c Test', 'Quest Diagnostics', 'Dr. Johnson', '2024-02-15'),
+        (3, 3, 3, 'Nasal Swab', 'CityLab', 'Dr. Adams', '2024-03-20'),
+        (4, 4, 4, 'Allergy Skin Test', 'AllergyClinic', 'Dr. Patel', '2024-04-25'),
+        (5, 5, 5, 'RT-PCR', 'PathCare', 'Dr. Taylor', '2024-05-30')
+    ])
+    cursor.executemany("""
+    INSERT INTO TEST_REPORT_BODIES (TestID, Body)
+    VALUES (%s, COMPRESS(%s));
+    """, [
+        (1, 'Normal'),
+        (2, 'High glucose levels'),
+        (3, 'Positive for cold virus'),
+        (4, 'Positive for pollen allergy'),
+        (5, 'Positive for COVID-19')
+    ])
+
+    # Populate LOCATIONS Table, used to rank blood donors by distance
+    cursor.executemany("""
+    INSERT INTO LOCATIONS (Location, Latitude, Longitude)
+    VALUES (%s, %s, %s);
+    """, [
+        ('New York', 40.712800, -74.006000),
+        ('Los Angeles', 34.052200, -118.243700),
+        ('Chicago', 41.878100, -87.629800),
+        ('Houston', 29.760400, -95.369800),
+        ('Phoenix', 33.448400, -112.074000)
     ])
 
     # Populate MEDICAL_HISTORY Table
@@ -95,11 +124,34 @@ try:
         (5, 5, 5, 'Community Health Facility', 'Dr. Taylor', 'Ongoing', 'COVID-19 care', 40)
     ])
 
-    # Commit changes
-    connection.commit()
-    print("All data inserted successfully into all tables.")
-except mysql.connector.Error as err:
-    print(f"Error: {err}")
-finally:
-    cursor.close()
-    connection.close()
+    # The write paths keep HEALTH_STATS current; rows inserted here bypass
+    # them, so recompute it in the same transaction
+    summary_stats.rebuild(cursor)
+
+
+def main():
+    # Database connection
+    connection = mysql.connector.connect(
+        host="localhost",
+        user="root",
+        password="newp",
+        database="MediFit"
+    )
+    cursor = connection.cursor()
+
+    # Insert Data
+    try:
+        insert_sample_data(cursor)
+
+        # Commit changes
+        connection.commit()
+        print("All data inserted successfully into all tables.")
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")
+    finally:
+        cursor.close()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiomysql
+import pymysql
+
+import queries
+import report_bodies
+import summary_stats
+from metrics import HEALTH_METRICS, MetricsEngine
+from query_cache import QueryCache, cached
+from symptom_search import POSTINGS_QUERY, SymptomIndex, tokenize
+
+
+class AsyncMediFit:
+    """asyncio counterpart of MediFitCLI on an aiomysql connection pool
+
+    Exposes the same retrieval, search, analysis and modification methods as
+    coroutines, sharing SQL, pagination tokens, the metrics engine, the result
+    cache and HEALTH_STATS maintenance with the synchronous class. Create it
+    with ``await AsyncMediFit.create(...)`` and release it with ``await close()``.
+    """
+
+    def __init__(self, pool, cache_size=256):
+        self.pool = pool
+        self.cache = QueryCache(max_entries=cache_size)
+        self.metrics = MetricsEngine(HEALTH_METRICS)
+        self._symptom_index = None
+        self._symptom_index_lock = asyncio.Lock()
+
+    @classmethod
+    async def create(cls, host='localhost', user='root', password='newp', database='MediFit', port=3306,
+                     min_pool_size=1, max_pool_size=10, pool_recycle=3600, cache_size=256):
+        pool = await aiomysql.create_pool(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            db=database,
+            minsize=min_pool_size,
+            maxsize=max_pool_size,
+            pool_recycle=pool_recycle,
+            autocommit=False
+        )
+        return cls(pool, cache_size)
+
+    async def close(self):
+        self.pool.close()
+        await self.pool.wait_closed()
+
+    @asynccontextmanager
+    async def _cursor(self, cursor_class=aiomysql.DictCursor):
+        """Check out a pooled connection and yield a private cursor on it"""
+        async with self.pool.acquire() as connection:
+            try:
+                async with connection.cursor(cursor_class) as cursor:
+                    yield cursor
+            finally:
+                # End any open transaction; aiomysql would otherwise drop the connection
+                await connection.rollback()
+
+    def _invalidate(self, tables):
+        """After a committed write: drop cached aggregates over ``tables``
+
+        Writes pass the same tables as their MediFitCLI counterparts; this class
+        keeps no replica router, catalog copy or profile cache to reset besides.
+        """
+        self.cache.invalidate(*tables)
+
+    async def _fetch_page(self, list_query, params, limit=None, page_token=None):
+        """Run a listing query, returning one keyset page when limit or page_token is given"""
+        if limit is None and page_token is None:
+            async with self._cursor() as cursor:
+                await cursor.execute(list_query.sql, params)
+                return queries.Page(await cursor.fetchall())
+
+        limit = limit or queries.DEFAULT_PAGE_SIZE
+        after = queries.decode_token(list_query.name, page_token) if page_token else None
+        query, keyset_params = queries.keyset_query(list_query, after, limit + 1)
+        async with self._cursor() as cursor:
+            await cursor.execute(query, (*params, *keyset_params))
+            return queries.make_page(list_query, await cursor.fetchall(), limit)
+
+    async def _get_symptom_index(self):
+        async with self._symptom_index_lock:
+            if self._symptom_index is None:
+                async with self._cursor() as cursor:
+                    await cursor.execute(POSTINGS_QUERY)
+                    self._symptom_index = SymptomIndex.from_rows(await cursor.fetchall())
+            return self._symptom_index
+
+    def cache_stats(self):
+        """Hit/miss/eviction counters of the aggregate query cache"""
+        return self.cache.stats()
+
+    # Retrieval Methods
+    async def retrieve_users_by_blood_group(self, blood_group='O+', limit=None, page_token=None):
+        """Retrieve all users with a specific blood group (Selection Query)"""
+        try:
+            return await self._fetch_page(queries.USERS_BY_BLOOD_GROUP, (blood_group,), limit, page_token)
+        except pymysql.Error as e:
+            print(f"Error retrieving users: {e}")
+            return queries.Page()
+
+    async def retrieve_users_by_ongoing_treatments(self, limit=None, page_token=None):
+        """Retrieve all users who are currently undergoing treatment (Selection Query)"""
+        try:
+            return await self._fetch_page(queries.USERS_BY_ONGOING_TREATMENTS, (), limit, page_token)
+        except pymysql.Error as e:
+            print(f"Error retrieving ongoing treatments: {e}")
+            return queries.Page()
+
+    async def retrieve_mri_test_reports(self, years=1, limit=None, page_token=None):
+        """Retrieve details of all users who have undergone an MRI test in the last year (Selection Query)"""
+        try:
+            return await self._fetch_page(queries.MRI_TEST_REPORTS, (years,), limit, page_token)
+        except pymysql.Error as e:
+            print(f"Error retrieving MRI test reports: {e}")
+            return queries.Page()
+
+    async def retrieve_users_by_bmi_band(self, band='normal', blood_group='O+', limit=None, page_token=None):
+        """Retrieve users of a blood group whose stored BMI lies in a band (Range Query)"""
+        low, high = queries.bmi_range(band)
+        try:
+            return await self._fetch_page(queries.USERS_BY_BMI_BAND, (blood_group, low, high), limit, page_token)
+        except pymysql.Error as e:
+            print(f"Error retrieving users by BMI band: {e}")
+            return queries.Page()
+
+    # Projection Queries
+    async def retrieve_users_location_by_blood_group(self, blood_group='A-', limit=None, page_token=None):
+        """Retrieve names and geographic locations of users with specific blood group (Projection Query)"""
+        try:
+            return await self._fetch_page(queries.USERS_LOCATION_BY_BLOOD_GROUP, (blood_group,), limit, page_token)
+        except pymysql.Error as e:
+            print(f"Error retrieving user locations: {e}")
+            return queries.Page()
+
+    async def retrieve_allopathy_diseases(self, limit=None, page_token=None):
+        """Retrieve disease names for Allopathy treatments (Projection Query)"""
+        try:
+            return await self._fetch_page(queries.ALLOPATHY_DISEASES, (), limit, page_token)
+        except pymysql.Error as e:
+            print(f"Error retrieving Allopathy diseases: {e}")
+            return queries.Page()
+
+    # Aggregate Function Queries
+    @cached(ttl=30, tables=('USER', 'PRESCRIBED_TREATMENTS', 'DISEASE', 'UNDERGOING_TREATMENTS'))
+    async def calculate_comprehensive_metrics(self, parallel=False):
+        """Comprehensive aggregate metrics in one statement, or one concurrent scan per table with parallel"""
+        try:
+            if not parallel:
+                async with self._cursor() as cursor:
+                    await cursor.execute(self.metrics.build_query())
+                    row = await cursor.fetchone()
+                return {name: row[name] for name in self.metrics.metrics}
+
+            async def run(group):
+                async with self._cursor() as cursor:
+                    await cursor.execute(self.metrics.group_query(*group))
+                    return await cursor.fetchone()
+
+            results = {}
+            for row in await asyncio.gather(*(run(group) for group in self.metrics.plan())):
+                results.update(row)
+            return {name: results[name] for name in self.metrics.metrics}
+        except pymysql.Error as e:
+            print(f"Error calculating metrics: {e}")
+            return None
+
+    async def _metric(self, name):
+        async with self._cursor() as cursor:
+            await cursor.execute(self.metrics.build_query([name]))
+            return (await cursor.fetchone())[name]
+
+    @cached(ttl=60, tables=('USER',))
+    async def get_average_bmi(self):
+        try:
+            return {'AverageBMI': await self._metric('AverageBMI')}
+        except pymysql.Error as e:
+            print(f"Error calculating average BMI: {e}")
+            return None
+
+    @cached(ttl=300, tables=('PRESCRIBED_TREATMENTS', 'DISEASE'))
+    async def get_average_cancer_treatment_expense(self):
+        try:
+            return {'average': await self._metric('AverageCancerTreatmentExpense')}
+        except pymysql.Error as e:
+            print(f"Error calculating average cancer treatment expense: {e}")
+            return None
+
+    @cached(ttl=300, tables=('DISEASE',))
+    async def get_max_severity_of_diseases(self):
+        try:
+            return {'MaxSeverity': await self._metric('MaxDiseaseSeverity')}
+        except pymysql.Error as e:
+            print(f"Error finding maximum severity of diseases: {e}")
+            return None
+
+    @cached(ttl=30, tables=('UNDERGOING_TREATMENTS',))
+    async def get_total_ongoing_treatments(self):
+        try:
+            return {'TotalOngoingTreatments': await self._metric('TotalOngoingTreatments')}
+        except pymysql.Error as e:
+            print(f"Error finding total ongoing treatments: {e}")
+            return None
+
+    # Search Queries
+    async def search_users_by_name_prefix(self, prefix='Jo', limit=None, page_token=None):
+        """Search for users with first name starting with a prefix (Search Query)"""
+        try:
+            return await self._fetch_page(queries.USERS_BY_NAME_PREFIX, (f"{prefix}%",), limit, page_token)
+        except pymysql.Error as e:
+            print(f"Error searching users by name: {e}")
+            return queries.Page()
+
+    async def search_test_reports_by_type(self, test_type='CT', limit=None, page_token=None):
+        """Search for test reports related to a specific type (Search Query)"""
+        try:
+            return await self._fetch_page(queries.TEST_REPORTS_BY_TYPE, (f"%{test_type}%",), limit, page_token)
+        except pymysql.Error as e:
+            print(f"Error searching test reports: {e}")
+            return queries.Page()
+
+    async def fetch_test_report_bodies(self, test_ids, batch_size=500):
+        """Report bodies of test_ids as {TestID: text}, read batch_size at a time"""
+        test_ids = list(dict.fromkeys(test_ids))
+        bodies = {}
+        try:
+            async with self._cursor() as cursor:
+                for start in range(0, len(test_ids), batch_size):
+                    await cursor.execute(*report_bodies.bodies_query(test_ids[start:start + batch_size]))
+                    for row in await cursor.fetchall():
+                        bodies[row['TestID']] = report_bodies.decompress_body(row['Body'])
+        except pymysql.Error as e:
+            print(f"Error fetching test report bodies: {e}")
+        return bodies
+
+    async def attach_test_report_bodies(self, rows, batch_size=500):
+        """Set 'TestReport' on listed test report rows (e.g. one page) from one batched fetch"""
+        bodies = await self.fetch_test_report_bodies([row['TestID'] for row in rows], batch_size)
+        for row in rows:
+            row['TestReport'] = bodies.get(row['TestID'])
+        return rows
+
+    async def search_diseases_by_symptom(self, symptom='cough', match_all=False, limit=None, page_token=None):
+        """Search for diseases by one or more comma-separated symptoms, best matches first (Search Query)"""
+        try:
+            ranked = (await self._get_symptom_index()).search(symptom, match_all)
+            if page_token:
+                after = queries.decode_token('diseases_by_symptom', page_token)
+                ranked = [(disease_id, score) for disease_id, score in ranked if (-score, disease_id) > after]
+            next_token = None
+            if limit is not None and len(ranked) > limit:
+                ranked = ranked[:limit]
+                next_token = queries.encode_token('diseases_by_symptom', (-ranked[-1][1], ranked[-1][0]))
+            if not ranked:
+                return queries.Page()
+
+            async with self._cursor() as cursor:
+                await cursor.execute(*queries.diseases_query(disease_id for disease_id, _ in ranked))
+                diseases = {row['DiseaseID']: row for row in await cursor.fetchall()}
+
+            return queries.Page([
+                {**diseases[disease_id], 'Relevance': round(score, 4)}
+                for disease_id, score in ranked if disease_id in diseases
+            ], next_token)
+        except pymysql.Error as e:
+            print(f"Error searching diseases by symptom: {e}")
+            return queries.Page()
+
+    # Streaming Retrieval
+    async def _stream(self, list_query, params, batch_size=1000, as_tuples=False, keyset=False):
+        """Yield rows from an unbuffered server-side cursor, batch_size rows per fetch,
+        or with keyset from a series of short keyset queries batch_size rows each"""
+        if not keyset:
+            cursor_class = aiomysql.SSCursor if as_tuples else aiomysql.SSDictCursor
+            async with self._cursor(cursor_class) as cursor:
+                await cursor.execute(list_query.sql, params)
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    for row in rows:
+                        yield row
+
+        cursor_class = aiomysql.Cursor if as_tuples else aiomysql.DictCursor
+        last_key = None
+        while True:
+            query, keyset_params = queries.keyset_query(list_query, last_key, batch_size)
+            async with self._cursor(cursor_class) as cursor:
+                await cursor.execute(query, (*params, *keyset_params))
+                rows = await cursor.fetchall()
+                columns = [column[0] for column in cursor.description] if as_tuples else None
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            last_key = queries.row_key(list_query, rows[-1], columns)
+
+    def iter_users_by_blood_group(self, blood_group='O+', batch_size=1000, as_tuples=False, keyset=False):
+        return self._stream(queries.USERS_BY_BLOOD_GROUP, (blood_group,), batch_size, as_tuples, keyset)
+
+    def iter_users_by_ongoing_treatments(self, batch_size=1000, as_tuples=False, keyset=False):
+        return self._stream(queries.USERS_BY_ONGOING_TREATMENTS, (), batch_size, as_tuples, keyset)
+
+    def iter_mri_test_reports(self, years=1, batch_size=1000, as_tuples=False, keyset=False):
+        return self._stream(queries.MRI_TEST_REPORTS, (years,), batch_size, as_tuples, keyset)
+
+    def iter_users_by_bmi_band(self, band='normal', blood_group='O+', batch_size=1000, as_tuples=False, keyset=False):
+        low, high = queries.bmi_range(band)
+        return self._stream(queries.USERS_BY_BMI_BAND, (blood_group, low, high), batch_size, as_tuples, keyset)
+
+    def iter_users_location_by_blood_group(self, blood_group='A-', batch_size=1000, as_tuples=False, keyset=False):
+        return self._stream(queries.USERS_LOCATION_BY_BLOOD_GROUP, (blood_group,), batch_size, as_tuples, keyset)
+
+    def iter_users_by_name_prefix(self, prefix='Jo', batch_size=1000, as_tuples=False, keyset=False):
+        return self._stream(queries.USERS_BY_NAME_PREFIX, (f"{prefix}%",), batch_size, as_tuples, keyset)
+
+    def iter_test_reports_by_type(self, test_type='CT', batch_size=1000, as_tuples=False, keyset=False):
+        return self._stream(queries.TEST_REPORTS_BY_TYPE, (f"%{test_type}%",), batch_size, as_tuples, keyset)
+
+    # Analysis Queries
+    async def analyze_high_severity_treatments(self, severity_threshold=7):
+        """Find number of users with ongoing treatments for high-severity diseases"""
+        try:
+            async with self._cursor() as cursor:
+                await cursor.execute(queries.HIGH_SEVERITY_TREATMENTS, (severity_threshold,))
+                return await cursor.fetchone()
+        except pymysql.Error as e:
+            print(f"Error analyzing high severity treatments: {e}")
+            return None
+
+    @cached(ttl=300, tables=('PRESCRIBED_TREATMENTS',))
+    async def analyze_allopathy_treatments(self):
+        """Find number of Allopathy treatments"""
+        try:
+            return {'PatientCount': await self._metric('AllopathyTreatmentCount')}
+        except pymysql.Error as e:
+            print(f"Error analyzing Allopathy treatments: {e}")
+            return None
+
+    # Modification Methods
+    @staticmethod
+    async def _apply(cursor, statements):
+        for query, params in statements:
+            await cursor.execute(query, params)
+
+    async def insert_new_user(self, first_name, last_name, blood_group, gender=None,
+                              date_of_birth=None, weight=None, height=None, location=None):
+        """Insert a new user into the USER table"""
+        if not blood_group:
+            raise ValueError("Blood Group must be provided")
+        try:
+            async with self._cursor() as cursor:
+                await cursor.execute(queries.INSERT_USER, (
+                    first_name, last_name, blood_group, gender,
+                    date_of_birth, weight, height, location
+                ))
+                user_id = cursor.lastrowid
+                await self._apply(cursor, summary_stats.user_inserted(blood_group, weight, height))
+                await cursor.connection.commit()
+            self._invalidate(('USER',))
+            return user_id
+        except pymysql.Error as e:
+            print(f"Error inserting new user: {e}")
+            return None
+
+    async def insert_new_disease(self, disease_name, severity, communicability,
+                                 triggering_environment=None, symptoms=None):
+        """Insert a new disease into the DISEASE table and index its symptoms"""
+        if communicability is None:
+            raise ValueError("Communicability must be specified")
+        try:
+            async with self._cursor() as cursor:
+                await cursor.execute(queries.INSERT_DISEASE, (
+                    disease_name, severity, communicability,
+                    triggering_environment, symptoms
+                ))
+                disease_id = cursor.lastrowid
+                terms = tokenize(symptoms)
+                if terms:
+                    await cursor.executemany(
+                        queries.INSERT_DISEASE_SYMPTOM, [(term[:50], disease_id) for term in terms]
+                    )
+                await cursor.connection.commit()
+
+            self._invalidate(('DISEASE',))
+            if self._symptom_index is not None:
+                self._symptom_index.add(disease_id, symptoms)
+            return disease_id
+        except pymysql.Error as e:
+            print(f"Error inserting new disease: {e}")
+            return None
+
+    async def update_user_weight(self, user_id, new_weight):
+        """Update the weight of a user and return the recomputed BMI (None if the update failed)"""
+        try:
+            async with self._cursor() as cursor:
+                await cursor.execute(queries.LOCK_USER, (user_id,))
+                user = await cursor.fetchone()
+                if user is None:
+                    print(f"User {user_id} not found.")
+                    return None
+                await cursor.execute(queries.UPDATE_USER_WEIGHT, (new_weight, user_id))
+                await self._apply(cursor, summary_stats.user_weight_changed(
+                    user['BloodGroup'], user['Weight'], new_weight, user['Height']
+                ))
+                await cursor.execute(queries.USER_BMI, (user_id,))
+                bmi = (await cursor.fetchone())['BMI']
+                await cursor.connection.commit()
+            self._invalidate(('USER',))
+            return bmi
+        except pymysql.Error as e:
+            print(f"Error updating user weight: {e}")
+            return None
+
+    async def update_treatment_status(self, user_id, treatment_id, new_status='Completed'):
+        """Update the status of a treatment"""
+        try:
+            async with self._cursor() as cursor:
+                await cursor.execute(queries.LOCK_TREATMENT, (user_id, treatment_id))
+                treatment = await cursor.fetchone()
+                await cursor.execute(queries.UPDATE_TREATMENT_STATUS, (new_status, user_id, treatment_id))
+                if treatment is not None:
+                    await self._apply(cursor, summary_stats.treatment_status_changed(
+                        treatment['Status'], new_status
+                    ))
+                await cursor.connection.commit()
+            self._invalidate(('UNDERGOING_TREATMENTS',))
+        except pymysql.Error as e:
+            print(f"Error updating treatment status: {e}")
+
+    async def delete_medication(self, medication_id):
+        """Delete a medication and queue recall notifications; returns the number of users queued"""
+        try:
+            async with self._cursor() as cursor:
+                await cursor.execute(queries.LOCK_MEDICATION, (medication_id,))
+                if await cursor.fetchone() is None:
+                    print(f"Medication {medication_id} not found.")
+                    return None
+                await cursor.execute(queries.QUEUE_RECALL_NOTIFICATIONS, (medication_id,))
+                queued = cursor.rowcount
+                await cursor.execute(queries.DELETE_MEDICATION, (medication_id,))
+                await cursor.connection.commit()
+            self._invalidate(('MEDICATION',))
+            return queued
+        except pymysql.Error as e:
+            print(f"Error deleting medication: {e}")
+            return None
+
+    async def delete_medications(self, medication_ids):
+        """Delete several medications concurrently, each in its own transaction.
+
+        Returns {MedicationID: users queued for notification, or None}.
+        """
+        results = await asyncio.gather(*(self.delete_medication(medication_id)
+                                         for medication_id in medication_ids))
+        return dict(zip(medication_ids, results))
@@ -0,0 +1,4 @@
+"""Load and latency benchmarks for the MediFit query layer.
+
+Run modules from the repository root, e.g. ``python -m benchmarks.async_concurrency``.
+"""
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from async_queries import AsyncMediFit
+from main_queries import MediFitCLI
+
+from benchmarks.timing import summarize
+
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
+
+# Uncached read requests, each one short round trip: (method name, args builder)
+WORKLOAD = [
+    ("retrieve_users_by_blood_group", lambda i: (BLOOD_GROUPS[i % len(BLOOD_GROUPS)], 50)),
+    ("retrieve_users_location_by_blood_group", lambda i: (BLOOD_GROUPS[-1 - i % len(BLOOD_GROUPS)], 50)),
+    ("search_users_by_name_prefix", lambda i: ("Jo", 50)),
+    ("search_test_reports_by_type", lambda i: ("CT", 50)),
+    ("analyze_high_severity_treatments", lambda i: (5 + i % 5,)),
+]
+
+
+def _request(i):
+    name, build_args = WORKLOAD[i % len(WORKLOAD)]
+    return name, build_args(i)
+
+
+def run_sync(args):
+    """Fire args.requests calls at MediFitCLI from args.concurrency threads"""
+    cli = MediFitCLI(args.host, args.user, args.password, args.database,
+                     min_pool_size=args.pool_size, max_pool_size=args.pool_size)
+
+    def call(i):
+        name, call_args = _request(i)
+        started = time.perf_counter()
+        getattr(cli, name)(*call_args)
+        return time.perf_counter() - started
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            latencies = list(executor.map(call, range(args.requests)))
+        return summarize(latencies, time.perf_counter() - started)
+    finally:
+        cli.pool.close()
+
+
+async def run_async(args):
+    """Fire args.requests calls at AsyncMediFit with at most args.concurrency in flight"""
+    client = await AsyncMediFit.create(args.host, args.user, args.password, args.database,
+                                       min_pool_size=args.pool_size, max_pool_size=args.pool_size)
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def call(i):
+        name, call_args = _request(i)
+        async with limit:
+            started = time.perf_counter()
+            await getattr(client, name)(*call_args)
+            return time.perf_counter() - started
+
+    try:
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(call(i) for i in range(args.requests)))
+        return summarize(latencies, time.perf_counter() - started)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare MediFitCLI (threads) with AsyncMediFit (asyncio) under concurrent load")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per mode")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128],
+                        help="in-flight request levels to measure")
+    parser.add_argument("--pool-size", type=int, default=10, help="connections in each pool")
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    results = []
+    for concurrency in args.concurrency:
+        args.concurrency = concurrency
+        if args.mode in ("sync", "both"):
+            results.append({"mode": "sync", "concurrency": concurrency, **run_sync(args)})
+            print(json.dumps(results[-1]))
+        if args.mode in ("async", "both"):
+            results.append({"mode": "async", "concurrency": concurrency, **asyncio.run(run_async(args))})
+            print(json.dumps(results[-1]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
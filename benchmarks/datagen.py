@@ -0,0 +1,264 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import random
+
+import pymysql
+
+from bulk_load import BulkLoader
+
+FIRST_NAMES = ['John', 'Jane', 'Joseph', 'Joanna', 'Michael', 'Emily', 'David', 'Sarah', 'Robert',
+               'Maria', 'James', 'Linda', 'Priya', 'Arjun', 'Wei', 'Mei', 'Carlos', 'Sofia',
+               'Ahmed', 'Fatima', 'Olga', 'Ivan', 'Kenji', 'Yuki', 'Amara', 'Kwame']
+LAST_NAMES = ['Doe', 'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Patel', 'Sharma', 'Chen', 'Wang', 'Kim', 'Nguyen', 'Silva', 'Khan', 'Ivanova',
+              'Tanaka', 'Mensah', 'Okafor', 'Rossi', 'Muller', 'Dubois']
+# Location -> (latitude, longitude), loaded into LOCATIONS
+LOCATION_COORDINATES = {
+    'New York': (40.7128, -74.0060), 'Los Angeles': (34.0522, -118.2437), 'Chicago': (41.8781, -87.6298),
+    'Houston': (29.7604, -95.3698), 'Phoenix': (33.4484, -112.0740), 'Hyderabad': (17.3850, 78.4867),
+    'Mumbai': (19.0760, 72.8777), 'Delhi': (28.7041, 77.1025), 'Bangalore': (12.9716, 77.5946),
+    'London': (51.5074, -0.1278), 'Toronto': (43.6532, -79.3832), 'Sydney': (-33.8688, 151.2093),
+    'Singapore': (1.3521, 103.8198), 'Berlin': (52.5200, 13.4050), 'Nairobi': (-1.2921, 36.8219),
+}
+LOCATIONS = list(LOCATION_COORDINATES)
+# Weighted roughly like the population distribution
+BLOOD_GROUPS = [('O+', 37), ('A+', 28), ('B+', 20), ('AB+', 5), ('O-', 4), ('A-', 3), ('B-', 2), ('AB-', 1)]
+DISEASE_NAMES = ['Cancer', 'Type 2 Diabetes', 'Common Cold', 'Seasonal Allergies', 'COVID-19', 'Asthma',
+                 'Hypertension', 'Migraine', 'Arthritis', 'Bronchitis', 'Influenza', 'Tuberculosis',
+                 'Malaria', 'Dengue', 'Lung Cancer', 'Skin Cancer', 'Anemia', 'Eczema']
+SYMPTOMS = ['Fever', 'Cough', 'Fatigue', 'Headache', 'Nausea', 'Runny Nose', 'Sore Throat',
+            'Shortness of Breath', 'Weight Loss', 'Joint Pain', 'Chest Pain', 'Dizziness', 'Rash',
+            'Itchy Eyes', 'Sneezing', 'Frequent Thirst', 'Increased Hunger', 'High Blood Pressure',
+            'Muscle Ache', 'Chills', 'Vomiting', 'Blurred Vision']
+ENVIRONMENTS = ['Smoking', 'Pollution', 'Cold weather', 'Pollen, dust', 'Sedentary lifestyle',
+                'Respiratory droplets', 'Mosquito bites', 'Genetic', None]
+TREATMENT_TYPES = [('Allopathy', 60), ('Homeopathy', 10), ('Ayurveda', 15), ('Chiropractic', 5), ('TCM', 10)]
+TEST_TYPES = [('Blood Test', 30), ('MRI', 10), ('CT Scan', 10), ('X-Ray', 15), ('RT-PCR', 10),
+              ('HbA1c Test', 10), ('Allergy Skin Test', 5), ('ECG', 10)]
+LABS = ['LabCorp', 'Quest Diagnostics', 'CityLab', 'PathCare', 'AllergyClinic', 'MetroLabs']
+HOSPITALS = ['General Hospital', 'City Clinic', 'St. Mary', 'Apollo', 'Mayo Clinic', None]
+DOCTORS = [f"Dr. {name}" for name in LAST_NAMES]
+ALLERGIES = ['None', 'Peanuts', 'Penicillin', 'Dust', 'Pollen', 'Shellfish', 'Latex', None]
+GENETICS = ['None', 'Hypertension in family', 'Diabetes in family', 'Asthma in family', None]
+
+# Tables in foreign-key order
+LOAD_ORDER = ['USER', 'DISEASE', 'PRESCRIBED_TREATMENTS', 'MEDICATION',
+              'MEDICAL_HISTORY', 'UNDERGOING_TREATMENTS', 'TEST_REPORTS']
+
+
+def scale_counts(users):
+    """Row counts of the catalog tables for ``users`` users.
+
+    USER and MEDICAL_HISTORY get one row per user; each user also undergoes
+    0-2 treatments (0.8 on average) and has 0-4 test reports (2 on average).
+    """
+    diseases = min(max(users // 200, 50), 20000)
+    return {
+        'DISEASE': diseases,
+        'PRESCRIBED_TREATMENTS': diseases * 3,
+        'MEDICATION': diseases * 2,
+    }
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def _days_ago(rng, today, max_days):
+    return (today - datetime.timedelta(days=rng.randrange(max_days))).isoformat()
+
+
+class DatasetGenerator:
+    """Deterministic, referentially consistent rows for every MediFit table
+
+    Rows carry explicit primary keys (1..N), so foreign keys can be derived
+    without reading anything back from the database, and the same ``seed``
+    always yields the same dataset. Dates are relative to ``today`` so the
+    date-windowed queries keep matching rows.
+    """
+
+    def __init__(self, users, seed=42, today=None):
+        self.users = users
+        self.seed = seed
+        self.today = today or datetime.date.today()
+        self.counts = scale_counts(users)
+        # TreatmentID -> DiseaseID, so UNDERGOING_TREATMENTS rows agree with PRESCRIBED_TREATMENTS
+        treatments = self.counts['PRESCRIBED_TREATMENTS']
+        self.treatment_disease = [None] + [(treatment_id - 1) // 3 + 1 for treatment_id in range(1, treatments + 1)]
+
+    def _rng(self, table):
+        return random.Random(f"{self.seed}:{table}")
+
+    def rows(self, table):
+        """Yield the rows of ``table`` as dicts keyed by column name"""
+        return getattr(self, f"_{table.lower()}")(self._rng(table))
+
+    def _user(self, rng):
+        for user_id in range(1, self.users + 1):
+            height = rng.randint(150, 200)
+            bmi = min(max(rng.gauss(25, 4.5), 15), 45)
+            yield {
+                'UserID': user_id,
+                'FirstName': rng.choice(FIRST_NAMES),
+                'LastName': rng.choice(LAST_NAMES),
+                'Gender': rng.choice(['Male', 'Female', 'Female', 'Male', 'Other']),
+                'DateOfBirth': _days_ago(rng, self.today, 90 * 365),
+                'Weight': f"{bmi * (height / 100) ** 2:.2f}",
+                'Height': height,
+                'BloodGroup': _weighted(rng, BLOOD_GROUPS),
+                'Location': rng.choice(LOCATIONS),
+            }
+
+    def _disease(self, rng):
+        for disease_id in range(1, self.counts['DISEASE'] + 1):
+            base = DISEASE_NAMES[(disease_id - 1) % len(DISEASE_NAMES)]
+            yield {
+                'DiseaseID': disease_id,
+                'DiseaseName': base if disease_id <= len(DISEASE_NAMES) else f"{base} variant {disease_id}",
+                'Severity': rng.randint(1, 10),
+                'TriggeringEnvironment': rng.choice(ENVIRONMENTS),
+                'Communicability': rng.choice(['Low', 'Medium', 'High']),
+                'Symptoms': ", ".join(rng.sample(SYMPTOMS, rng.randint(2, 5))),
+            }
+
+    def _prescribed_treatments(self, rng):
+        for treatment_id in range(1, self.counts['PRESCRIBED_TREATMENTS'] + 1):
+            yield {
+                'TreatmentID': treatment_id,
+                'DiseaseID': self.treatment_disease[treatment_id],
+                'TypeOfTreatment': _weighted(rng, TREATMENT_TYPES),
+                'Description': rng.choice(['Medication and rest', 'Lifestyle changes', 'Herbal remedies',
+                                           'Physiotherapy', 'Surgery followed by medication']),
+                'Expense': f"{rng.uniform(20, 5000):.2f}",
+                'CureTime': rng.choice(['1 week', '2 weeks', '1 month', '6 months', 'Lifetime management']),
+                'SourceOfPrescription': rng.choice(DOCTORS),
+            }
+
+    def _medication(self, rng):
+        for medication_id in range(1, self.counts['MEDICATION'] + 1):
+            yield {
+                'MedicationID': medication_id,
+                'DiseaseID': (medication_id - 1) // 2 + 1,
+                'MedicationName': f"Medication {medication_id}",
+                'TypeOfTreatment': _weighted(rng, TREATMENT_TYPES),
+                'FoodRestrictionConditions': rng.choice(['Avoid alcohol', 'Take with food',
+                                                         'Avoid grapefruit', None]),
+            }
+
+    def _medical_history(self, rng):
+        for user_id in range(1, self.users + 1):
+            yield {
+                'UserID': user_id,
+                'Allergies': rng.choice(ALLERGIES),
+                'GeneticCharacteristics': rng.choice(GENETICS),
+            }
+
+    def _undergoing_treatments(self, rng):
+        treatments = self.counts['PRESCRIBED_TREATMENTS']
+        for user_id in range(1, self.users + 1):
+            for treatment_id in rng.sample(range(1, treatments + 1), rng.choice([0, 0, 1, 1, 2])):
+                yield {
+                    'UserID': user_id,
+                    'TreatmentID': treatment_id,
+                    'DiseaseID': self.treatment_disease[treatment_id],
+                    'AssociatedHospital': rng.choice(HOSPITALS),
+                    'DoctorUnderConsultation': rng.choice(DOCTORS),
+                    'Status': 'Ongoing' if rng.random() < 0.3 else 'Completed',
+                    'Description': None,
+                    'AgeAtTreatmentStart': rng.randint(1, 90),
+                }
+
+    def _test_reports(self, rng):
+        treatments = self.counts['PRESCRIBED_TREATMENTS']
+        test_id = 0
+        for user_id in range(1, self.users + 1):
+            for _ in range(rng.randint(0, 4)):
+                test_id += 1
+                yield {
+                    'TestID': test_id,
+                    'UserID': user_id,
+                    'TreatmentID': rng.randint(1, treatments),
+                    'TestType': _weighted(rng, TEST_TYPES),
+                    'TestReport': rng.choice(['Normal', 'Abnormal, follow-up advised',
+                                              'Positive', 'Negative', 'Borderline values']),
+                    'OrganizationLab': rng.choice(LABS),
+                    'DoctorOnConsultation': rng.choice(DOCTORS),
+                    'TestDate': _days_ago(rng, self.today, 5 * 365),
+                }
+
+    def write_csv(self, directory):
+        """Write one CSV file per table into ``directory`` and return {table: path}"""
+        os.makedirs(directory, exist_ok=True)
+        paths = {}
+        for table in LOAD_ORDER:
+            paths[table] = os.path.join(directory, f"{table}.csv")
+            with open(paths[table], "w", newline="", encoding="utf-8") as handle:
+                writer = None
+                for row in self.rows(table):
+                    if writer is None:
+                        writer = csv.DictWriter(handle, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow({key: "" if value is None else value for key, value in row.items()})
+        return paths
+
+
+def load_dataset(connection, paths, batch_size=5000, load_data=False, progress=None):
+    """Bulk load the generated CSV files in foreign-key order and store the
+    coordinates of the generated locations.
+
+    Returns {table: LoadReport.as_dict()}.
+    """
+    reports = {}
+    for table in LOAD_ORDER:
+        loader = BulkLoader(connection, table, batch_size=batch_size, progress=progress)
+        if load_data:
+            report = loader.load_data_infile(paths[table], "csv", validate=False)
+        else:
+            report = loader.load(paths[table], "csv")
+        reports[table] = report.as_dict()
+
+    with connection.cursor() as cursor:
+        cursor.executemany("INSERT IGNORE INTO LOCATIONS (Location, Latitude, Longitude) VALUES (%s, %s, %s)",
+                           [(location, *coordinates) for location, coordinates in LOCATION_COORDINATES.items()])
+    connection.commit()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic MediFit dataset and optionally load it")
+    parser.add_argument("--users", type=int, default=10000, help="number of users (10k to 10M)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="benchmark_data")
+    parser.add_argument("--load", action="store_true", help="load the files into the (empty) database")
+    parser.add_argument("--load-data", action="store_true",
+                        help="with --load, use LOAD DATA LOCAL INFILE instead of batched inserts")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    generator = DatasetGenerator(args.users, args.seed)
+    paths = generator.write_csv(args.output_dir)
+    print(f"Wrote {', '.join(paths.values())}")
+    if not args.load:
+        return
+
+    connection = pymysql.connect(host=args.host, user=args.user, password=args.password,
+                                 database=args.database, local_infile=args.load_data)
+    try:
+        reports = load_dataset(connection, paths, args.batch_size, args.load_data)
+        print(json.dumps(reports, indent=2))
+    except (pymysql.Error, ValueError) as e:
+        print(f"Error loading synthetic dataset: {e}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
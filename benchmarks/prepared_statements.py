@@ -0,0 +1,96 @@
+import argparse
+import json
+import random
+import time
+
+import pymysql
+
+from main_queries import MediFitCLI
+
+from benchmarks.timing import summarize
+
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
+
+# Short parameterized reads, where parsing is a noticeable share of the work
+WORKLOAD = [
+    ("retrieve_users_by_blood_group", lambda cli, rng: cli.retrieve_users_by_blood_group(rng.choice(BLOOD_GROUPS), 10)),
+    ("retrieve_users_location_by_blood_group",
+     lambda cli, rng: cli.retrieve_users_location_by_blood_group(rng.choice(BLOOD_GROUPS), 10)),
+    ("search_users_by_name_prefix", lambda cli, rng: cli.search_users_by_name_prefix(rng.choice(['Jo', 'Ma', 'Sa']), 10)),
+    ("retrieve_mri_test_reports", lambda cli, rng: cli.retrieve_mri_test_reports(rng.randint(1, 3), 10)),
+    ("analyze_high_severity_treatments", lambda cli, rng: cli.analyze_high_severity_treatments(rng.randint(5, 9))),
+]
+
+# Com_set_option counts the SET carrying each prepared call's parameters
+SERVER_COUNTERS = ("Com_select", "Com_set_option", "Com_prepare_sql", "Com_execute_sql", "Questions")
+
+
+def _counters(cursor):
+    cursor.execute(f"SHOW GLOBAL STATUS WHERE Variable_name IN ({', '.join(['%s'] * len(SERVER_COUNTERS))})",
+                   SERVER_COUNTERS)
+    return {name: int(value) for name, value in cursor.fetchall()}
+
+
+def run_mode(args, prepared, status_cursor):
+    """Run the workload serially with or without prepared statements"""
+    cli = MediFitCLI(args.host, args.user, args.password, args.database,
+                     min_pool_size=1, max_pool_size=1, slow_query_threshold=None,
+                     use_prepared_statements=prepared)
+    try:
+        results = {}
+        for name, call in WORKLOAD:
+            rng = random.Random(f"{args.seed}:{name}")
+            for _ in range(args.warmup):
+                call(cli, rng)
+            before = _counters(status_cursor)
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                call_started = time.perf_counter()
+                call(cli, rng)
+                latencies.append(time.perf_counter() - call_started)
+            summary = summarize(latencies, time.perf_counter() - started)
+            after = _counters(status_cursor)
+            # The status query itself adds one Questions/Com_select per read
+            summary["server"] = {name: after[name] - before[name] for name in SERVER_COUNTERS}
+            results[name] = summary
+        return results
+    finally:
+        cli.close_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the parse overhead saved by server-side prepared statements")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    status_connection = pymysql.connect(host=args.host, user=args.user, password=args.password,
+                                        database=args.database, autocommit=True)
+    try:
+        with status_connection.cursor() as status_cursor:
+            results = {
+                "text_protocol": run_mode(args, False, status_cursor),
+                "prepared": run_mode(args, True, status_cursor),
+            }
+    finally:
+        status_connection.close()
+
+    for name, _ in WORKLOAD:
+        text, prepared = results["text_protocol"][name], results["prepared"][name]
+        print(f"{name:40} p50 {text['p50_ms']:>7} -> {prepared['p50_ms']:>7} ms  "
+              f"p99 {text['p99_ms']:>7} -> {prepared['p99_ms']:>7} ms  "
+              f"{text['throughput_rps']:>8} -> {prepared['throughput_rps']:>8} req/s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
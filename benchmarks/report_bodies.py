@@ -0,0 +1,86 @@
+import argparse
+import json
+import time
+
+import pymysql
+
+import queries
+import report_bodies
+
+# The MRI listing as it was while bodies were inline in TEST_REPORTS
+WIDE_MRI_LISTING = """
+    SELECT u.*, tr.*, UNCOMPRESS(b.Body) AS TestReport
+    FROM USER u
+    JOIN TEST_REPORTS tr ON u.UserID = tr.UserID
+    LEFT JOIN TEST_REPORT_BODIES b ON b.TestID = tr.TestID
+    WHERE tr.TestType = 'MRI' AND tr.TestDate >= DATE_SUB(CURDATE(), INTERVAL %s YEAR)
+    ORDER BY tr.TestID LIMIT %s
+"""
+
+UNCOMPRESSED_BODIES = "SELECT TestID, UNCOMPRESS(Body) AS Body FROM TEST_REPORT_BODIES WHERE TestID IN ({})"
+
+
+def _bytes_sent(cursor):
+    cursor.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+    return int(cursor.fetchone()[1])
+
+
+def measure(cursor, query, params, iterations):
+    """Average bytes the server sent per run of query, and its mean latency in ms"""
+    # Bytes_sent also counts the reply to the status query itself
+    first = _bytes_sent(cursor)
+    before = _bytes_sent(cursor)
+    overhead = before - first
+    started = time.perf_counter()
+    for _ in range(iterations):
+        cursor.execute(query, params)
+        cursor.fetchall()
+    seconds = time.perf_counter() - started
+    sent = _bytes_sent(cursor) - before - overhead
+    return {"bytes": round(sent / iterations), "ms": round(seconds / iterations * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes transferred per test report listing and body fetch")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    connection = pymysql.connect(host=args.host, user=args.user, password=args.password,
+                                 database=args.database, autocommit=True)
+    try:
+        with connection.cursor() as cursor:
+            listing, params = queries.keyset_query(queries.MRI_TEST_REPORTS, None, args.page_size)
+            results = {
+                "listing_wide": measure(cursor, WIDE_MRI_LISTING, (args.years, args.page_size), args.iterations),
+                "listing_projection": measure(cursor, listing, (args.years, *params), args.iterations),
+            }
+            cursor.execute(listing, (args.years, *params))
+            test_ids = [row[3] for row in cursor.fetchall()]
+            if test_ids:
+                query, body_params = report_bodies.bodies_query(test_ids)
+                results["bodies_compressed"] = measure(cursor, query, body_params, args.iterations)
+                results["bodies_uncompressed"] = measure(
+                    cursor, UNCOMPRESSED_BODIES.format(queries.in_placeholders(test_ids)), body_params,
+                    args.iterations)
+    finally:
+        connection.close()
+
+    for name, result in results.items():
+        print(f"{name:22} {result['bytes']:>10} bytes  {result['ms']:>8} ms")
+    wide, narrow = results["listing_wide"]["bytes"], results["listing_projection"]["bytes"]
+    if wide:
+        print(f"Listing page of {args.page_size}: {100 * (wide - narrow) / wide:.1f}% fewer bytes")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
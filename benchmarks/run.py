@@ -0,0 +1,208 @@
+import argparse
+import datetime
+import json
+import random
+import subprocess
+import time
+
+import pymysql
+
+from main_queries import MediFitCLI
+
+from benchmarks.timing import summarize
+
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
+
+
+# MediFitCLI operations in menu order: (name, call(cli, rng, ids), writes)
+OPERATIONS = [
+    ("retrieve_users_by_blood_group",
+     lambda cli, rng, ids: cli.retrieve_users_by_blood_group(rng.choice(BLOOD_GROUPS), 100), False),
+    ("retrieve_users_by_ongoing_treatments",
+     lambda cli, rng, ids: cli.retrieve_users_by_ongoing_treatments(100), False),
+    ("retrieve_mri_test_reports",
+     lambda cli, rng, ids: cli.retrieve_mri_test_reports(1, 100), False),
+    ("retrieve_users_location_by_blood_group",
+     lambda cli, rng, ids: cli.retrieve_users_location_by_blood_group(rng.choice(BLOOD_GROUPS), 100), False),
+    ("retrieve_allopathy_diseases",
+     lambda cli, rng, ids: cli.retrieve_allopathy_diseases(100), False),
+    ("search_users_by_name_prefix",
+     lambda cli, rng, ids: cli.search_users_by_name_prefix(rng.choice(['Jo', 'Ma', 'A', 'Sa']), 100), False),
+    ("search_test_reports_by_type",
+     lambda cli, rng, ids: cli.search_test_reports_by_type(rng.choice(['CT', 'MRI', 'Blood']), 100), False),
+    ("search_diseases_by_symptom",
+     lambda cli, rng, ids: cli.search_diseases_by_symptom(rng.choice(['cough', 'fever, fatigue', 'rash']), False, 100), False),
+    ("calculate_comprehensive_metrics",
+     lambda cli, rng, ids: cli.calculate_comprehensive_metrics(), False),
+    ("get_average_bmi",
+     lambda cli, rng, ids: cli.get_average_bmi(), False),
+    ("get_average_cancer_treatment_expense",
+     lambda cli, rng, ids: cli.get_average_cancer_treatment_expense(), False),
+    ("analyze_high_severity_treatments",
+     lambda cli, rng, ids: cli.analyze_high_severity_treatments(rng.randint(5, 9)), False),
+    ("analyze_allopathy_treatments",
+     lambda cli, rng, ids: cli.analyze_allopathy_treatments(), False),
+    ("insert_new_user",
+     lambda cli, rng, ids: cli.insert_new_user('Bench', 'User', rng.choice(BLOOD_GROUPS), 'Other',
+                                               '1990-01-01', 70, 175, 'Benchmark'), True),
+    ("insert_new_disease",
+     lambda cli, rng, ids: cli.insert_new_disease('Benchmark Disease', rng.randint(1, 10), 'Low',
+                                                  None, 'Fever, Cough'), True),
+    ("update_user_weight",
+     lambda cli, rng, ids: cli.update_user_weight(rng.randint(*ids['user']), round(rng.uniform(50, 100), 2)), True),
+    ("update_treatment_status",
+     lambda cli, rng, ids: cli.update_treatment_status(*rng.choice(ids['treatments']),
+                                                       rng.choice(['Ongoing', 'Completed'])), True),
+    # Deletes the highest medication IDs first; only run against a throwaway dataset
+    ("delete_medication",
+     lambda cli, rng, ids: cli.delete_medication(ids['medication'].pop() if ids['medication'] else 0), True),
+    ("get_max_severity_of_diseases",
+     lambda cli, rng, ids: cli.get_max_severity_of_diseases(), False),
+    ("get_total_ongoing_treatments",
+     lambda cli, rng, ids: cli.get_total_ongoing_treatments(), False),
+]
+
+
+def _rows_read(cursor):
+    """Server-wide InnoDB rows read; run the benchmark on an otherwise idle server"""
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_rows_read'")
+    return int(cursor.fetchone()[1])
+
+
+def _rows_returned(result):
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1 if result else 0
+
+
+def _workload_ids(cursor, iterations):
+    cursor.execute("SELECT COALESCE(MIN(UserID), 1), COALESCE(MAX(UserID), 1) FROM USER")
+    user_range = tuple(cursor.fetchone())
+    cursor.execute("SELECT UserID, TreatmentID FROM UNDERGOING_TREATMENTS LIMIT %s", (iterations,))
+    treatments = [tuple(row) for row in cursor.fetchall()]
+    cursor.execute("SELECT MedicationID FROM MEDICATION ORDER BY MedicationID DESC LIMIT %s", (iterations,))
+    medications = [row[0] for row in reversed(cursor.fetchall())]
+    return {"user": user_range,
+            "treatments": treatments or [(0, 0)],
+            "medication": medications}
+
+
+def _dataset(cursor):
+    counts = {}
+    for table in ("USER", "DISEASE", "PRESCRIBED_TREATMENTS", "MEDICATION",
+                  "MEDICAL_HISTORY", "UNDERGOING_TREATMENTS", "TEST_REPORTS"):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    return counts
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_operation(cli, status_cursor, name, call, ids, iterations, warmup, seed, warm_cache):
+    """Time ``iterations`` calls of one operation and return its summary"""
+    rng = random.Random(f"{seed}:{name}")
+    for _ in range(warmup):
+        call(cli, rng, ids)
+
+    latencies = []
+    rows_returned = 0
+    rows_before = _rows_read(status_cursor)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if not warm_cache:
+            cli.cache.clear()
+        call_started = time.perf_counter()
+        result = call(cli, rng, ids)
+        latencies.append(time.perf_counter() - call_started)
+        rows_returned += _rows_returned(result)
+    elapsed = time.perf_counter() - started
+    rows_scanned = _rows_read(status_cursor) - rows_before
+
+    summary = summarize(latencies, elapsed)
+    summary["rows_returned_per_call"] = round(rows_returned / iterations, 1)
+    summary["rows_scanned_per_call"] = round(rows_scanned / iterations, 1)
+    return summary
+
+
+def compare(baseline, results, threshold=0.2):
+    """Return [(operation, metric, old, new)] where p50/p95/p99 got more than ``threshold`` slower"""
+    regressions = []
+    for name, summary in results["operations"].items():
+        old = baseline["operations"].get(name)
+        if not old:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if old[metric] and summary[metric] > old[metric] * (1 + threshold):
+                regressions.append((name, metric, old[metric], summary[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every MediFitCLI operation against the current database")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per operation")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed calls per operation")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", metavar="OPERATION", help="run only these operations")
+    parser.add_argument("--include-writes", action="store_true",
+                        help="also run the modification methods (changes the data)")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="keep the aggregate query cache between calls")
+    parser.add_argument("--label", help="name of this run, e.g. a version or branch")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag operations slower than a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="regression threshold for --compare")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    cli = MediFitCLI(args.host, args.user, args.password, args.database)
+    status_connection = pymysql.connect(host=args.host, user=args.user, password=args.password,
+                                        database=args.database, autocommit=True)
+    try:
+        with status_connection.cursor() as status_cursor:
+            ids = _workload_ids(status_cursor, args.iterations + args.warmup)
+            results = {
+                "label": args.label,
+                "commit": _git_commit(),
+                "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "config": {"iterations": args.iterations, "warmup": args.warmup, "seed": args.seed,
+                           "warm_cache": args.warm_cache, "include_writes": args.include_writes},
+                "dataset": _dataset(status_cursor),
+                "operations": {},
+            }
+            for name, call, writes in OPERATIONS:
+                if (args.only and name not in args.only) or (writes and not args.include_writes):
+                    continue
+                summary = run_operation(cli, status_cursor, name, call, ids, args.iterations,
+                                        args.warmup, args.seed, args.warm_cache)
+                results["operations"][name] = summary
+                print(f"{name:40} p50 {summary['p50_ms']:>8} ms  p95 {summary['p95_ms']:>8} ms  "
+                      f"p99 {summary['p99_ms']:>8} ms  {summary['throughput_rps']:>8} req/s  "
+                      f"{summary['rows_scanned_per_call']:>10} rows scanned")
+    finally:
+        status_connection.close()
+        cli.pool.close()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old} ms -> {new} ms")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import tempfile
+import time
+from decimal import Decimal, InvalidOperation
+
+import pymysql
+
+import queries
+import summary_stats
+from createdb import KEY_REGISTRIES, SIDE_COLUMNS, TABLE_COLUMNS
+from report_bodies import compress_body
+from symptom_search import UNINDEXED_DISEASES_QUERY, tokenize
+
+
+class RowValidationError(ValueError):
+    """Raised when an input row does not satisfy the createdb.py schema"""
+
+    def __init__(self, line_number, message):
+        super().__init__(f"line {line_number}: {message}")
+        self.line_number = line_number
+
+
+def _detect_format(path):
+    return "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+
+
+def read_rows(path, file_format=None):
+    """Stream rows from a CSV (with header) or JSONL file as dicts.
+
+    Empty CSV fields are read as NULL.
+    """
+    file_format = file_format or _detect_format(path)
+    with open(path, newline="", encoding="utf-8") as handle:
+        if file_format == "csv":
+            for row in csv.DictReader(handle):
+                yield {key: (value if value != "" else None) for key, value in row.items()}
+        elif file_format == "jsonl":
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported file format: {file_format}")
+
+
+def _convert(column, value):
+    """Convert one raw value to the Python type of its column, or raise ValueError"""
+    if value is None:
+        if column.required:
+            raise ValueError(f"{column.name} is NOT NULL")
+        return None
+
+    if column.kind == "int":
+        value = int(value)
+        if column.bounds and not column.bounds[0] <= value <= column.bounds[1]:
+            raise ValueError(f"{column.name} must be between {column.bounds[0]} and {column.bounds[1]}")
+    elif column.kind == "decimal":
+        try:
+            value = Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError(f"{column.name} is not a number: {value!r}")
+        precision, scale = column.size
+        if abs(value) >= Decimal(10) ** (precision - scale):
+            raise ValueError(f"{column.name} does not fit DECIMAL({precision},{scale})")
+    elif column.kind == "date":
+        if not isinstance(value, datetime.date):
+            value = datetime.date.fromisoformat(str(value))
+    elif column.kind == "enum":
+        if value not in column.choices:
+            raise ValueError(f"{column.name} must be one of {', '.join(column.choices)}")
+    else:
+        value = str(value)
+        if column.kind == "str" and len(value) > column.size:
+            raise ValueError(f"{column.name} is longer than {column.size} characters")
+    return value
+
+
+def validate_row(columns, row, line_number):
+    """Return the row as a tuple ordered like ``columns``, validating every value"""
+    values = []
+    for column in columns:
+        try:
+            values.append(_convert(column, row.get(column.name)))
+        except (TypeError, ValueError) as e:
+            raise RowValidationError(line_number, str(e))
+    return tuple(values)
+
+
+def _resolve_columns(table, first_row):
+    """Pick the schema columns present in the input, rejecting unknown ones"""
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"Unknown table: {table}")
+    known = {column.name for column in TABLE_COLUMNS[table]}
+    unknown = set(first_row) - known
+    if unknown:
+        raise ValueError(f"Unknown columns for {table}: {', '.join(sorted(unknown))}")
+    missing = [column.name for column in TABLE_COLUMNS[table]
+               if column.required and column.name not in first_row]
+    if missing:
+        raise ValueError(f"Missing NOT NULL columns for {table}: {', '.join(missing)}")
+    return [column for column in TABLE_COLUMNS[table] if column.name in first_row]
+
+
+def _side_positions(table, columns):
+    """(position of the side-table column, position of its key) in ``columns``, or None"""
+    if table not in SIDE_COLUMNS:
+        return None
+    column, side_table, key = SIDE_COLUMNS[table]
+    names = [column.name for column in columns]
+    if column not in names:
+        return None
+    if key not in names:
+        raise ValueError(f"{table}.{column} is stored in {side_table} by {key}; the input needs a {key} column")
+    return names.index(column), names.index(key)
+
+
+def _registry_positions(table, columns):
+    """(registry table, [(registry column, position in ``columns``)]) of a table whose keys are registered, or None"""
+    if table not in KEY_REGISTRIES:
+        return None
+    registry, key, registry_columns = KEY_REGISTRIES[table]
+    names = [column.name for column in columns]
+    if key not in names:
+        raise ValueError(f"{table}.{key} is kept unique in {registry}; the input needs a {key} column")
+    return registry, [(name, names.index(name)) for name in registry_columns if name in names]
+
+
+def _infile_field(value):
+    """Render one value for LOAD DATA: NULL as \\N and backslashes escaped"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return value.replace("\\", "\\\\")
+    return value
+
+
+class LoadReport:
+    """Counters for one bulk load"""
+
+    def __init__(self, skipped=0):
+        self.loaded = 0
+        self.rejected = 0
+        self.skipped = skipped
+        self.started = time.monotonic()
+
+    @property
+    def seconds(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.loaded / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            "loaded": self.loaded,
+            "rejected": self.rejected,
+            "skipped": self.skipped,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+class BulkLoader:
+    """Stream rows into one table with batched executemany and chunked commits
+
+    Rows are inserted ``batch_size`` at a time and committed every
+    ``commit_every`` batches. After each commit the number of input rows
+    consumed is written to ``checkpoint_path``, so a failed load can be re-run
+    and resumes right after the last committed chunk.
+
+    Loads into tables summarized in HEALTH_STATS finish by recomputing the
+    affected dimensions, unless ``refresh_stats`` is False, and DISEASE loads
+    by indexing the new diseases' symptoms in DISEASE_SYMPTOM. Columns kept in a
+    side table (createdb.SIDE_COLUMNS, e.g. TEST_REPORTS.TestReport) are
+    compressed and written there in the same transaction. Rows of a table
+    with a key registry (createdb.KEY_REGISTRIES) register their key first,
+    so a duplicate key or a missing parent row fails the batch.
+    """
+
+    def __init__(self, connection, table, batch_size=1000, commit_every=10,
+                 checkpoint_path=None, skip_invalid=False, progress=None,
+                 refresh_stats=True):
+        self.connection = connection
+        self.table = table
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.checkpoint_path = checkpoint_path
+        self.skip_invalid = skip_invalid
+        self.progress = progress
+        self.refresh_stats = refresh_stats
+
+    def _refresh_summary(self):
+        if not self.refresh_stats:
+            return
+        with self.connection.cursor() as cursor:
+            if summary_stats.rebuild(cursor, [self.table]):
+                self.connection.commit()
+
+    def _index_symptoms(self):
+        """Add DISEASE_SYMPTOM postings for loaded diseases, and any a failed load left without"""
+        if self.table != "DISEASE":
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(UNINDEXED_DISEASES_QUERY)
+            postings = [(term[:50], disease_id)
+                        for disease_id, symptoms in cursor.fetchall()
+                        for term in tokenize(symptoms)]
+            for start in range(0, len(postings), self.batch_size):
+                cursor.executemany(queries.INSERT_DISEASE_SYMPTOM, postings[start:start + self.batch_size])
+        self.connection.commit()
+
+    def _read_checkpoint(self, path):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path) as handle:
+            checkpoint = json.load(handle)
+        if checkpoint["table"] != self.table or checkpoint["source"] != os.path.abspath(path):
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to a different load")
+        return checkpoint["rows_consumed"]
+
+    def _write_checkpoint(self, path, rows_consumed):
+        if not self.checkpoint_path:
+            return
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w") as handle:
+            json.dump({"table": self.table, "source": os.path.abspath(path),
+                       "rows_consumed": rows_consumed}, handle)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _insert_query(self, columns, side=None):
+        if side is not None:
+            columns = columns[:side[0]] + columns[side[0] + 1:]
+        names = ", ".join(column.name for column in columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        return f"INSERT INTO {self.table} ({names}) VALUES ({placeholders})"
+
+    def _insert_batch(self, cursor, query, batch, side, registry=None):
+        if registry is not None:
+            registry_table, positions = registry
+            cursor.executemany(
+                f"INSERT INTO {registry_table} ({', '.join(name for name, _ in positions)}) "
+                f"VALUES ({', '.join(['%s'] * len(positions))})",
+                [tuple(row[at] for _, at in positions) for row in batch])
+        if side is None:
+            cursor.executemany(query, batch)
+            return
+        body_at, key_at = side
+        cursor.executemany(query, [row[:body_at] + row[body_at + 1:] for row in batch])
+        bodies = [(row[key_at], compress_body(row[body_at])) for row in batch if row[body_at] is not None]
+        if bodies:
+            _, side_table, key = SIDE_COLUMNS[self.table]
+            cursor.executemany(f"""
+                INSERT INTO {side_table} ({key}, Body) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE Body = VALUES(Body)
+            """, bodies)
+
+    def load(self, path, file_format=None):
+        """Load ``path`` into the table and return a LoadReport"""
+        resume_from = self._read_checkpoint(path)
+        report = LoadReport(skipped=resume_from)
+        columns = query = side = registry = None
+        batch = []
+        batches_since_commit = 0
+        consumed = 0
+
+        cursor = self.connection.cursor()
+        try:
+            for consumed, row in enumerate(read_rows(path, file_format), start=1):
+                if columns is None:
+                    columns = _resolve_columns(self.table, row)
+                    side = _side_positions(self.table, columns)
+                    registry = _registry_positions(self.table, columns)
+                    query = self._insert_query(columns, side)
+                if consumed <= resume_from:
+                    continue
+                try:
+                    batch.append(validate_row(columns, row, consumed))
+                except RowValidationError:
+                    if not self.skip_invalid:
+                        raise
+                    report.rejected += 1
+
+                if len(batch) >= self.batch_size:
+                    self._insert_batch(cursor, query, batch, side, registry)
+                    report.loaded += len(batch)
+                    batch = []
+                    batches_since_commit += 1
+                    if batches_since_commit >= self.commit_every:
+                        self.connection.commit()
+                        self._write_checkpoint(path, consumed)
+                        batches_since_commit = 0
+                        if self.progress:
+                            self.progress(report)
+
+            if batch:
+                self._insert_batch(cursor, query, batch, side, registry)
+                report.loaded += len(batch)
+            self.connection.commit()
+            self._write_checkpoint(path, consumed)
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+        self._refresh_summary()
+        self._index_symptoms()
+        return report
+
+    def load_data_infile(self, path, file_format=None, validate=True):
+        """Fast path: validate into a temporary CSV and send it with LOAD DATA LOCAL INFILE.
+
+        The connection must be opened with ``local_infile=True``. With
+        ``validate=False`` a CSV input is sent as-is and the server enforces the
+        schema on its own.
+
+        LOAD DATA LOCAL skips rows that break a unique or foreign key instead
+        of failing, so for a table with a key registry the whole load is
+        rolled back unless every input row was registered and loaded.
+        """
+        report = LoadReport()
+        if not validate and (file_format or _detect_format(path)) == "csv":
+            with open(path, newline="", encoding="utf-8") as handle:
+                reader = csv.reader(handle)
+                header = next(reader)
+                rows = sum(1 for _ in reader) if self.table in KEY_REGISTRIES else None
+            columns = _resolve_columns(self.table, dict.fromkeys(header))
+            return self._send_infile(path, columns, report, ignore_header=True, rows=rows)
+
+        columns = None
+        rows = 0
+        handle = tempfile.NamedTemporaryFile("w", suffix=".csv", newline="",
+                                             encoding="utf-8", delete=False)
+        try:
+            with handle:
+                writer = csv.writer(handle, lineterminator="\n")
+                for line_number, row in enumerate(read_rows(path, file_format), start=1):
+                    if columns is None:
+                        columns = _resolve_columns(self.table, row)
+                    try:
+                        values = validate_row(columns, row, line_number)
+                    except RowValidationError:
+                        if not self.skip_invalid:
+                            raise
+                        report.rejected += 1
+                        continue
+                    writer.writerow([_infile_field(value) for value in values])
+                    rows += 1
+            if columns is None:
+                return report
+            return self._send_infile(handle.name, columns, report, ignore_header=False, rows=rows)
+        finally:
+            os.unlink(handle.name)
+
+    def _infile_query(self, table, targets, ignore_header, replace=False, assignments=""):
+        return f"""
+        LOAD DATA LOCAL INFILE %s {"REPLACE " if replace else ""}INTO TABLE {table}
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY '\\\\'
+        LINES TERMINATED BY '\\n'
+        {"IGNORE 1 LINES" if ignore_header else ""}
+        ({", ".join(targets)})
+        {assignments}
+        """
+
+    def _send_infile(self, path, columns, report, ignore_header, rows=None):
+        side = _side_positions(self.table, columns)
+        registry = _registry_positions(self.table, columns)
+        names = [column.name for column in columns]
+        if registry is not None:
+            # A first pass registers the keys; the registry's keys reject duplicates and orphans
+            registry_table, positions = registry
+            registry_targets = ["@skip"] * len(columns)
+            for name, at in positions:
+                registry_targets[at] = name
+        if side is not None:
+            # The body column is skipped here and loaded by a second pass over
+            # the same file into the side table, compressed by the server
+            body_at, key_at = side
+            _, side_table, key = SIDE_COLUMNS[self.table]
+            names[body_at] = "@body"
+            side_targets = ["@skip"] * len(columns)
+            side_targets[key_at], side_targets[body_at] = key, "@body"
+        with self.connection.cursor() as cursor:
+            try:
+                if registry is not None:
+                    cursor.execute(self._infile_query(registry_table, registry_targets, ignore_header), (path,))
+                    registered = cursor.rowcount
+                cursor.execute(self._infile_query(self.table, names, ignore_header), (path,))
+                report.loaded = cursor.rowcount
+                if registry is not None and not registered == report.loaded == rows:
+                    raise pymysql.err.IntegrityError(
+                        f"{rows - min(registered, report.loaded)} of {rows} {self.table} rows reuse a "
+                        f"{KEY_REGISTRIES[self.table][1]} or reference a missing row; nothing was loaded")
+                if side is not None:
+                    cursor.execute(self._infile_query(side_table, side_targets, ignore_header, replace=True,
+                                                      assignments="SET Body = COMPRESS(@body)"), (path,))
+                    cursor.execute(f"DELETE FROM {side_table} WHERE Body IS NULL")
+                self.connection.commit()
+            except pymysql.Error:
+                self.connection.rollback()
+                raise
+        self._refresh_summary()
+        self._index_symptoms()
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load CSV/JSONL rows into a MediFit table")
+    parser.add_argument("table", choices=sorted(TABLE_COLUMNS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--commit-every", type=int, default=10,
+                        help="number of batches per transaction")
+    parser.add_argument("--checkpoint", help="checkpoint file used to resume a failed load")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="count and skip rows that fail validation instead of aborting")
+    parser.add_argument("--load-data", action="store_true",
+                        help="use LOAD DATA LOCAL INFILE instead of batched inserts")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="with --load-data, send a CSV file without validating it first")
+    parser.add_argument("--no-refresh-stats", action="store_true",
+                        help="skip recomputing HEALTH_STATS after the load")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    connection = pymysql.connect(host=args.host, user=args.user, password=args.password,
+                                 database=args.database, local_infile=args.load_data)
+
+    def progress(report):
+        print(f"{report.skipped + report.loaded + report.rejected} rows processed, "
+              f"{report.rows_per_second:.0f} rows/s")
+
+    loader = BulkLoader(connection, args.table, batch_size=args.batch_size,
+                        commit_every=args.commit_every, checkpoint_path=args.checkpoint,
+                        skip_invalid=args.skip_invalid, progress=progress,
+                        refresh_stats=not args.no_refresh_stats)
+    try:
+        if args.load_data:
+            report = loader.load_data_infile(args.path, args.format, validate=not args.no_validate)
+        else:
+            report = loader.load(args.path, args.format)
+        print(json.dumps({"table": args.table, **report.as_dict()}))
+    except (pymysql.Error, ValueError) as e:
+        print(f"Error loading {args.table}: {e}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pymysql
+
+
+class PoolExhaustedError(pymysql.Error):
+    """Raised when no pooled connection becomes available within the timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of pymysql connections
+
+    Keeps between ``min_size`` and ``max_size`` open connections. Every checkout
+    is health-checked (connections idle longer than ``health_check_interval``
+    seconds are pinged, reconnecting transparently if the server dropped them)
+    and every connection is handed to exactly one thread at a time.
+    """
+
+    def __init__(self, min_size=1, max_size=10, timeout=30.0,
+                 health_check_interval=30.0, **connect_kwargs):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.connect_kwargs = connect_kwargs
+
+        self._idle = []  # (connection, last_used) pairs, most recently used last
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        return pymysql.connect(**self.connect_kwargs)
+
+    def _is_healthy(self, connection, last_used):
+        """Ping connections that have been idle for a while, reconnecting if needed"""
+        if not connection.open:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            connection.ping(reconnect=True)
+            return True
+        except pymysql.Error:
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except pymysql.Error:
+            pass
+
+    def acquire(self):
+        """Check out a healthy connection, blocking up to ``timeout`` seconds"""
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise pymysql.InterfaceError("Connection pool is closed")
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+                    connection, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(
+                        f"No connection available after {self.timeout} seconds")
+                self._condition.wait(remaining)
+
+        try:
+            if connection is not None and self._is_healthy(connection, last_used):
+                return connection
+            if connection is not None:
+                self._discard(connection)
+            return self._connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection):
+        """Return a connection to the pool, rolling back any open transaction"""
+        try:
+            if connection.open:
+                connection.rollback()
+        except pymysql.Error:
+            self._discard(connection)
+
+        with self._condition:
+            if self._closed or not connection.open:
+                self._size -= 1
+                if connection.open:
+                    self._discard(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and always returns it"""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self):
+        """Close every idle connection; checked-out ones are closed on release"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            self._discard(connection)
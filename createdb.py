@@ -1,4 +1,190 @@
+import datetime
 import mysql.connector
+from collections import namedtuple
+
+import queries
+import summary_stats
+from metrics import HEALTH_METRICS, MetricsEngine
+from symptom_search import tokenize
+
+TREATMENT_TYPES = ('Homeopathy', 'Allopathy', 'Ayurveda', 'Chiropractic', 'TCM')
+
+# Column rules mirroring the CREATE TABLE statements in create_schema(), used to
+# validate rows before they are bulk loaded (NOT NULL as migrated). ``kind`` is one of int, decimal,
+# str, text, date or enum; ``size`` is the VARCHAR length or the (precision,
+# scale) of a DECIMAL; ``choices`` holds ENUM values; ``bounds`` a CHECK range.
+Column = namedtuple('Column', 'name kind required size choices bounds')
+Column.__new__.__defaults__ = (False, None, None, None)
+
+TABLE_COLUMNS = {
+    "USER": [
+        Column("UserID", "int"),
+        Column("FirstName", "str", True, 50),
+        Column("LastName", "str", True, 50),
+        Column("Gender", "enum", choices=('Male', 'Female', 'Other')),
+        Column("DateOfBirth", "date"),
+        Column("Weight", "decimal", True, (5, 2)),
+        Column("Height", "decimal", True, (5, 2)),
+        Column("BloodGroup", "str", True, 5),
+        Column("Location", "str", size=100),
+    ],
+    "DISEASE": [
+        Column("DiseaseID", "int"),
+        Column("DiseaseName", "str", True, 100),
+        Column("Severity", "int", bounds=(1, 10)),
+        Column("TriggeringEnvironment", "text"),
+        Column("Communicability", "enum", True, choices=('Low', 'Medium', 'High')),
+        Column("Symptoms", "text"),
+    ],
+    "PRESCRIBED_TREATMENTS": [
+        Column("TreatmentID", "int"),
+        Column("DiseaseID", "int"),
+        Column("TypeOfTreatment", "enum", choices=TREATMENT_TYPES),
+        Column("Description", "text"),
+        Column("Expense", "decimal", size=(10, 2)),
+        Column("CureTime", "str", size=50),
+        Column("SourceOfPrescription", "str", True, 100),
+    ],
+    "MEDICATION": [
+        Column("MedicationID", "int"),
+        Column("DiseaseID", "int"),
+        Column("MedicationName", "str", True, 100),
+        Column("TypeOfTreatment", "enum", choices=TREATMENT_TYPES),
+        Column("FoodRestrictionConditions", "text"),
+    ],
+    "TEST_REPORTS": [
+        Column("TestID", "int"),
+        Column("UserID", "int"),
+        Column("TreatmentID", "int"),
+        Column("TestType", "str", True, 50),
+        Column("TestReport", "text"),
+        Column("OrganizationLab", "str", size=100),
+        Column("DoctorOnConsultation", "str", True, 100),
+        Column("TestDate", "date", True),
+    ],
+    "MEDICAL_HISTORY": [
+        Column("UserID", "int", True),
+        Column("Allergies", "text"),
+        Column("GeneticCharacteristics", "text"),
+    ],
+    "UNDERGOING_TREATMENTS": [
+        Column("UserID", "int", True),
+        Column("TreatmentID", "int", True),
+        Column("DiseaseID", "int"),
+        Column("AssociatedHospital", "str", size=100),
+        Column("DoctorUnderConsultation", "str", size=100),
+        Column("Status", "enum", True, choices=('Ongoing', 'Completed')),
+        Column("Description", "text"),
+        Column("AgeAtTreatmentStart", "int"),
+    ],
+}
+
+# Input columns stored outside their table: table -> (column, side table, key
+# column). TEST_REPORTS.TestReport lives COMPRESS()ed in TEST_REPORT_BODIES
+# (migration 10); the bulk loader writes it there, which needs the key in the input.
+SIDE_COLUMNS = {
+    "TEST_REPORTS": ("TestReport", "TEST_REPORT_BODIES", "TestID"),
+}
+
+# Keys of partitioned tables enforced through a registry table: table ->
+# (registry table, key column, columns copied to it). TEST_REPORTS has neither
+# a unique TestID nor foreign keys (migration 7), so every writer first inserts
+# the report's row into TEST_REPORT_KEYS (migration 13), in the same
+# transaction; its primary and foreign keys reject a reused TestID and a
+# missing user or treatment.
+KEY_REGISTRIES = {
+    "TEST_REPORTS": ("TEST_REPORT_KEYS", "TestID", ("TestID", "UserID", "TreatmentID")),
+}
+
+# Base schema; migrations below are applied on top of it
+SCHEMA_COMMANDS = [
+    "CREATE DATABASE IF NOT EXISTS MediFit;",
+    "USE MediFit;",
+    """
+    CREATE TABLE USER (
+        UserID INT PRIMARY KEY AUTO_INCREMENT,
+        FirstName VARCHAR(50) NOT NULL,
+        LastName VARCHAR(50) NOT NULL,
+        Gender ENUM('Male', 'Female', 'Other'),
+        DateOfBirth DATE,
+        Weight DECIMAL(5,2) NOT NULL,
+        Height DECIMAL(5,2) NOT NULL,
+        BloodGroup VARCHAR(5) NOT NULL,
+        Location VARCHAR(100)
+    );
+    """,
+    """
+    CREATE TABLE DISEASE (
+        DiseaseID INT PRIMARY KEY AUTO_INCREMENT,
+        DiseaseName VARCHAR(100) NOT NULL,
+        Severity INT CHECK (Severity BETWEEN 1 AND 10),
+        TriggeringEnvironment TEXT,
+        Communicability ENUM('Low', 'Medium', 'High') NOT NULL,
+        Symptoms TEXT  -- Added Symptoms column directly to the DISEASE table
+    );
+    """,
+    """
+    CREATE TABLE PRESCRIBED_TREATMENTS (
+        TreatmentID INT PRIMARY KEY AUTO_INCREMENT,
+        DiseaseID INT,
+        TypeOfTreatment ENUM('Homeopathy', 'Allopathy', 'Ayurveda', 'Chiropractic', 'TCM'),
+        Description TEXT,
+        Expense DECIMAL(10,2),
+        CureTime VARCHAR(50),
+        SourceOfPrescription VARCHAR(100) NOT NULL,
+        FOREIGN KEY (DiseaseID) REFERENCES DISEASE(DiseaseID)
+    );
+    """,
+    """
+    CREATE TABLE MEDICATION (
+        MedicationID INT PRIMARY KEY AUTO_INCREMENT,
+        DiseaseID INT,
+        MedicationName VARCHAR(100) NOT NULL,
+        TypeOfTreatment ENUM('Homeopathy', 'Allopathy', 'Ayurveda', 'Chiropractic', 'TCM'),
+        FoodRestrictionConditions TEXT,
+        FOREIGN KEY (DiseaseID) REFERENCES DISEASE(DiseaseID)
+    );
+    """,
+    """
+    CREATE TABLE TEST_REPORTS (
+        TestID INT PRIMARY KEY AUTO_INCREMENT,
+        UserID INT,
+        TreatmentID INT,
+        TestType VARCHAR(50) NOT NULL,
+        TestReport TEXT,
+        OrganizationLab VARCHAR(100),
+        DoctorOnConsultation VARCHAR(100) NOT NULL,
+        TestDate DATE,
+        FOREIGN KEY (UserID) REFERENCES USER(UserID),
+        FOREIGN KEY (TreatmentID) REFERENCES PRESCRIBED_TREATMENTS(TreatmentID)
+    );
+    """,
+    """
+    CREATE TABLE MEDICAL_HISTORY (
+        UserID INT,
+        Allergies TEXT,
+        GeneticCharacteristics TEXT,
+        PRIMARY KEY (UserID),
+        FOREIGN KEY (UserID) REFERENCES USER(UserID)
+    );
+    """,
+    """
+    CREATE TABLE UNDERGOING_TREATMENTS (
+        UserID INT,
+        TreatmentID INT,
+        DiseaseID INT,
+        AssociatedHospital VARCHAR(100),
+        DoctorUnderConsultation VARCHAR(100),
+        Status ENUM('Ongoing', 'Completed'),
+        Description TEXT,
+        AgeAtTreatmentStart INT,
+        PRIMARY KEY (UserID, TreatmentID),
+        FOREIGN KEY (UserID) REFERENCES USER(UserID),
+        FOREIGN KEY (TreatmentID) REFERENCES PRESCRIBED_TREATMENTS(TreatmentID),
+        FOREIGN KEY (DiseaseID) REFERENCES DISEASE(DiseaseID)
+    );
+    """
+]
 
 def create_schema():
     try:
@@ -10,98 +196,8 @@ def create_schema():
         )
         cursor = connection.cursor()
 
-        # List of schema creation commands
-        schema_commands = [
-            "CREATE DATABASE IF NOT EXISTS MediFit;",
-            "USE MediFit;",
-            """
-            CREATE TABLE USER (
-                UserID INT PRIMARY KEY AUTO_INCREMENT,
-                FirstName VARCHAR(50) NOT NULL,
-                LastName VARCHAR(50) NOT NULL,
-                Gender ENUM('Male', 'Female', 'Other'),
-                DateOfBirth DATE,
-                Weight DECIMAL(5,2) NOT NULL,
-                Height DECIMAL(5,2) NOT NULL,
-                BloodGroup VARCHAR(5) NOT NULL,
-                Location VARCHAR(100)
-            );
-            """,
-            """
-            CREATE TABLE DISEASE (
-                DiseaseID INT PRIMARY KEY AUTO_INCREMENT,
-                DiseaseName VARCHAR(100) NOT NULL,
-                Severity INT CHECK (Severity BETWEEN 1 AND 10),
-                TriggeringEnvironment TEXT,
-                Communicability ENUM('Low', 'Medium', 'High') NOT NULL,
-                Symptoms TEXT  -- Added Symptoms column directly to the DISEASE table
-            );
-            """,
-            """
-            CREATE TABLE PRESCRIBED_TREATMENTS (
-                TreatmentID INT PRIMARY KEY AUTO_INCREMENT,
-                DiseaseID INT,
-                TypeOfTreatment ENUM('Homeopathy', 'Allopathy', 'Ayurveda', 'Chiropractic', 'TCM'),
-                Description TEXT,
-                Expense DECIMAL(10,2),
-                CureTime VARCHAR(50),
-                SourceOfPrescription VARCHAR(100) NOT NULL,
-                FOREIGN KEY (DiseaseID) REFERENCES DISEASE(DiseaseID)
-            );
-            """,
-            """
-            CREATE TABLE MEDICATION (
-                MedicationID INT PRIMARY KEY AUTO_INCREMENT,
-                DiseaseID INT,
-                MedicationName VARCHAR(100) NOT NULL,
-                TypeOfTreatment ENUM('Homeopathy', 'Allopathy', 'Ayurveda', 'Chiropractic', 'TCM'),
-                FoodRestrictionConditions TEXT,
-                FOREIGN KEY (DiseaseID) REFERENCES DISEASE(DiseaseID)
-            );
-            """,
-            """
-            CREATE TABLE TEST_REPORTS (
-                TestID INT PRIMARY KEY AUTO_INCREMENT,
-                UserID INT,
-                TreatmentID INT,
-                TestType VARCHAR(50) NOT NULL,
-                TestReport TEXT,
-                OrganizationLab VARCHAR(100),
-                DoctorOnConsultation VARCHAR(100) NOT NULL,
-                TestDate DATE,
-                FOREIGN KEY (UserID) REFERENCES USER(UserID),
-                FOREIGN KEY (TreatmentID) REFERENCES PRESCRIBED_TREATMENTS(TreatmentID)
-            );
-            """,
-            """
-            CREATE TABLE MEDICAL_HISTORY (
-                UserID INT,
-                Allergies TEXT,
-                GeneticCharacteristics TEXT,
-                PRIMARY KEY (UserID),
-                FOREIGN KEY (UserID) REFERENCES USER(UserID)
-            );
-            """,
-            """
-            CREATE TABLE UNDERGOING_TREATMENTS (
-                UserID INT,
-                TreatmentID INT,
-                DiseaseID INT,
-                AssociatedHospital VARCHAR(100),
-                DoctorUnderConsultation VARCHAR(100),
-                Status ENUM('Ongoing', 'Completed'),
-                Description TEXT,
-                AgeAtTreatmentStart INT,
-                PRIMARY KEY (UserID, TreatmentID),
-                FOREIGN KEY (UserID) REFERENCES USER(UserID),
-                FOREIGN KEY (TreatmentID) REFERENCES PRESCRIBED_TREATMENTS(TreatmentID),
-                FOREIGN KEY (DiseaseID) REFERENCES DISEASE(DiseaseID)
-            );
-            """
-        ]
-
         # Execute each command separately
-        for command in schema_commands:
+        for command in SCHEMA_COMMANDS:
             cursor.execute(command)
         
         print("Schema created successfully.")
@@ -114,5 +210,587 @@ def create_schema():
             cursor.close()
             connection.close()
 
+# Versioned schema migrations applied on top of create_schema(). Each entry is
+# (version, description, step) where step(cursor) must be idempotent, so a
+# migration interrupted half-way can simply be re-run.
+def _index_exists(cursor, table, index_name):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+    """, (table, index_name))
+    return cursor.fetchone() is not None
+
+def _column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        LIMIT 1
+    """, (table, column))
+    return cursor.fetchone() is not None
+
+def _create_index(cursor, table, index_name, columns):
+    if not _index_exists(cursor, table, index_name):
+        cursor.execute(f"CREATE INDEX {index_name} ON {table} ({columns})")
+
+# (table, index name, columns) for every filter/join used by MediFitCLI
+QUERY_INDEXES = [
+    # BloodGroup lookups; covers the name/location projection by blood group
+    ("USER", "idx_user_blood_group", "BloodGroup, Location, FirstName, LastName"),
+    # FirstName LIKE 'prefix%'
+    ("USER", "idx_user_first_name", "FirstName, LastName"),
+    # Status = 'Ongoing' counts and joins, plus the high-severity DiseaseID join
+    ("UNDERGOING_TREATMENTS", "idx_ut_status_disease_user", "Status, DiseaseID, UserID"),
+    # TestType = 'MRI' AND TestDate >= ...
+    ("TEST_REPORTS", "idx_tr_type_date", "TestType, TestDate, UserID"),
+    # TypeOfTreatment = 'Allopathy' counts and DISEASE joins
+    ("PRESCRIBED_TREATMENTS", "idx_pt_type_disease", "TypeOfTreatment, DiseaseID"),
+    # MAX(Severity) and Severity > threshold
+    ("DISEASE", "idx_disease_severity", "Severity"),
+]
+
+def _add_query_indexes(cursor):
+    for table, index_name, columns in QUERY_INDEXES:
+        _create_index(cursor, table, index_name, columns)
+
+# Equality filter followed by the primary key, so keyset pages
+# (WHERE filter AND key > last ORDER BY key LIMIT n) are plain range scans
+KEYSET_INDEXES = [
+    ("USER", "idx_user_blood_group_id", "BloodGroup, UserID"),
+    ("UNDERGOING_TREATMENTS", "idx_ut_status_user_treatment", "Status, UserID, TreatmentID"),
+    ("TEST_REPORTS", "idx_tr_type_id", "TestType, TestID"),
+]
+
+def _add_keyset_indexes(cursor):
+    for table, index_name, columns in KEYSET_INDEXES:
+        _create_index(cursor, table, index_name, columns)
+
+def _add_disease_symptom_index(cursor):
+    """Inverted index of normalized symptom terms, backfilled from DISEASE.Symptoms"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS DISEASE_SYMPTOM (
+            Term VARCHAR(50) NOT NULL,
+            DiseaseID INT NOT NULL,
+            PRIMARY KEY (Term, DiseaseID),
+            KEY idx_disease_symptom_disease (DiseaseID),
+            FOREIGN KEY (DiseaseID) REFERENCES DISEASE(DiseaseID) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("SELECT DiseaseID, Symptoms FROM DISEASE WHERE Symptoms IS NOT NULL")
+    postings = [(term[:50], disease_id)
+                for disease_id, symptoms in cursor.fetchall()
+                for term in tokenize(symptoms)]
+    if postings:
+        cursor.executemany(
+            "INSERT IGNORE INTO DISEASE_SYMPTOM (Term, DiseaseID) VALUES (%s, %s)", postings
+        )
+
+def _add_health_stats(cursor):
+    """Summary table of running counts/BMI sums, populated from the base tables"""
+    cursor.execute(summary_stats.CREATE_HEALTH_STATS)
+    # Blood-group BMI sums read USER.BMI, which migration 5 adds and then rebuilds
+    summary_stats.rebuild(cursor, ["UNDERGOING_TREATMENTS", "PRESCRIBED_TREATMENTS"])
+
+# USER.BMI in kg/m^2 (Height is in cm). NULL below summary_stats.MIN_BMI_HEIGHT_CM,
+# which also keeps the largest value (999.99 kg at 30 cm) within DECIMAL(9,2)
+USER_BMI_EXPRESSION = (f"CASE WHEN Height >= {summary_stats.MIN_BMI_HEIGHT_CM} "
+                       "THEN ROUND(Weight * 10000 / (Height * Height), 2) END")
+
+def _add_user_bmi(cursor):
+    """Stored BMI (kg/m^2, Height is in cm) with a blood group + BMI range index"""
+    if not _column_exists(cursor, "USER", "BMI"):
+        cursor.execute(f"ALTER TABLE USER ADD COLUMN BMI DECIMAL(9,2) AS ({USER_BMI_EXPRESSION}) STORED")
+    _create_index(cursor, "USER", "idx_user_blood_group_bmi", "BloodGroup, BMI")
+    # Earlier BMI sums divided by Height in cm squared
+    summary_stats.rebuild(cursor, ["USER"])
+
+def _add_recall_notifications(cursor):
+    """Outbox of users to notify about recalled (deleted) medications"""
+    # No foreign key to MEDICATION: the row outlives the deleted medication
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS MEDICATION_RECALL_NOTIFICATIONS (
+            NotificationID BIGINT PRIMARY KEY AUTO_INCREMENT,
+            MedicationID INT NOT NULL,
+            MedicationName VARCHAR(100) NOT NULL,
+            UserID INT NOT NULL,
+            CreatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            ProcessedAt TIMESTAMP NULL,
+            UNIQUE KEY uq_recall_medication_user (MedicationID, UserID),
+            KEY idx_recall_pending (ProcessedAt, NotificationID),
+            FOREIGN KEY (UserID) REFERENCES USER(UserID)
+        )
+    """)
+
+def _drop_foreign_keys(cursor, table):
+    cursor.execute("""
+        SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_TYPE = 'FOREIGN KEY'
+    """, (table,))
+    for (constraint,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {table} DROP FOREIGN KEY {constraint}")
+
+def _primary_key(cursor, table):
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = 'PRIMARY'
+        ORDER BY SEQ_IN_INDEX
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+def _partitions(cursor, table):
+    """[(partition name, VALUES LESS THAN / IN description)] in order; empty if not partitioned"""
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return cursor.fetchall()
+
+def _constraint_exists(cursor, table, constraint):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.TABLE_CONSTRAINTS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = %s
+        LIMIT 1
+    """, (table, constraint))
+    return cursor.fetchone() is not None
+
+def _require_no_nulls(cursor, table, column):
+    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} IS NULL")
+    count = cursor.fetchone()[0]
+    if count:
+        raise mysql.connector.Error(
+            msg=f"{count} {table} rows have no {column}; set it before making {column} NOT NULL")
+
+def _require_unique(cursor, table, columns):
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM (SELECT 1 FROM {table} GROUP BY {columns} HAVING COUNT(*) > 1) AS duplicates
+    """)
+    count = cursor.fetchone()[0]
+    if count:
+        raise mysql.connector.Error(
+            msg=f"{count} ({columns}) values occur more than once in {table}; merge those rows first")
+
+def _require_references(cursor, table, column, parent, parent_column):
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM {table} c
+        WHERE c.{column} IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM {parent} p WHERE p.{parent_column} = c.{column})
+    """)
+    count = cursor.fetchone()[0]
+    if count:
+        raise mysql.connector.Error(
+            msg=f"{count} {table} rows reference a missing {parent}.{parent_column}; fix their {column} first")
+
+def _add_foreign_key(cursor, table, column, parent, parent_column):
+    """Add a foreign key on table.column unless it has one, refusing while rows dangle"""
+    cursor.execute("""
+        SELECT 1 FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+          AND REFERENCED_TABLE_NAME = %s
+        LIMIT 1
+    """, (table, column, parent))
+    if cursor.fetchone() is None:
+        _require_references(cursor, table, column, parent, parent_column)
+        cursor.execute(f"ALTER TABLE {table} ADD FOREIGN KEY ({column}) REFERENCES {parent}({parent_column})")
+
+# TEST_REPORTS holds one partition per month of TestDate. maintain_test_report_partitions
+# keeps PARTITION_MONTHS_AHEAD empty months ready and moves months older than
+# the retention to TEST_REPORTS_ARCHIVE.
+PARTITION_MONTHS_AHEAD = 3
+TEST_REPORT_RETENTION_MONTHS = 60
+
+def _month_start(day):
+    return datetime.date(day.year, day.month, 1)
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+def _month_partition(month):
+    """Partition definition holding TestDates of the month starting at ``month``"""
+    return f"PARTITION p_{month:%Y%m} VALUES LESS THAN ('{_add_months(month, 1).isoformat()}')"
+
+def _partition_test_reports(cursor):
+    """Range-partition TEST_REPORTS by TestDate month, with TEST_REPORTS_ARCHIVE for old months.
+
+    MySQL partitioned tables cannot take part in foreign keys and every unique
+    key must contain the partitioning column, so the foreign keys are dropped
+    (their indexes stay) and the primary key becomes (TestID, TestDate). On its
+    own the table then accepts a reused TestID or a report of a missing user;
+    migration 13 enforces both again through TEST_REPORT_KEYS.
+    """
+    _drop_foreign_keys(cursor, "TEST_REPORTS")
+    if _primary_key(cursor, "TEST_REPORTS") != ["TestID", "TestDate"]:
+        _require_no_nulls(cursor, "TEST_REPORTS", "TestDate")
+        cursor.execute("""
+            ALTER TABLE TEST_REPORTS
+                MODIFY TestDate DATE NOT NULL,
+                DROP PRIMARY KEY,
+                ADD PRIMARY KEY (TestID, TestDate)
+        """)
+    cursor.execute("CREATE TABLE IF NOT EXISTS TEST_REPORTS_ARCHIVE LIKE TEST_REPORTS")
+    if _partitions(cursor, "TEST_REPORTS_ARCHIVE"):
+        cursor.execute("ALTER TABLE TEST_REPORTS_ARCHIVE REMOVE PARTITIONING")
+    if _partitions(cursor, "TEST_REPORTS"):
+        return
+
+    this_month = _month_start(datetime.date.today())
+    cursor.execute("SELECT MIN(TestDate) FROM TEST_REPORTS")
+    oldest = cursor.fetchone()[0]
+    month = min(_month_start(oldest), this_month) if oldest else this_month
+    definitions = []
+    while month <= _add_months(this_month, PARTITION_MONTHS_AHEAD):
+        definitions.append(_month_partition(month))
+        month = _add_months(month, 1)
+    definitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    cursor.execute(f"ALTER TABLE TEST_REPORTS PARTITION BY RANGE COLUMNS (TestDate) ({', '.join(definitions)})")
+
+def _withdrawn(cursor):
+    """Step of a withdrawn migration: nothing to do, a later migration undoes it where it ran"""
+
+def maintain_test_report_partitions(cursor, today=None, months_ahead=PARTITION_MONTHS_AHEAD,
+                                    retention_months=TEST_REPORT_RETENTION_MONTHS):
+    """Add partitions up to ``months_ahead`` months out and archive months past the retention.
+
+    New months are split off the empty p_future partition, which is a
+    metadata-only change. Archived months are copied to TEST_REPORTS_ARCHIVE
+    and their partition is dropped; a run interrupted in between is finished
+    by the next one. Returns (created, archived) partition names.
+    """
+    this_month = _month_start(today or datetime.date.today())
+    partitions = [name for name, _ in _partitions(cursor, "TEST_REPORTS")]
+    if not partitions:
+        raise mysql.connector.Error(msg="TEST_REPORTS is not partitioned; run the migrations first")
+
+    created = []
+    newest = max(partition for partition in partitions if partition != "p_future")
+    month = this_month
+    while month <= _add_months(this_month, months_ahead):
+        # Ranges must keep increasing, so only months after the newest one are split off p_future
+        if f"p_{month:%Y%m}" > newest:
+            cursor.execute(f"""
+                ALTER TABLE TEST_REPORTS REORGANIZE PARTITION p_future INTO (
+                    {_month_partition(month)},
+                    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+                )
+            """)
+            created.append(f"p_{month:%Y%m}")
+        month = _add_months(month, 1)
+
+    archived = []
+    cutoff = f"p_{_add_months(this_month, -retention_months):%Y%m}"
+    # Always keep one month partition so older late-arriving reports have a home
+    for name in sorted(partition for partition in partitions if partition != "p_future")[:-1]:
+        if name >= cutoff:
+            break
+        cursor.execute(f"INSERT IGNORE INTO TEST_REPORTS_ARCHIVE SELECT * FROM TEST_REPORTS PARTITION ({name})")
+        cursor.execute(f"ALTER TABLE TEST_REPORTS DROP PARTITION {name}")
+        archived.append(name)
+    return created, archived
+
+REFERENCE_TABLES = (
+    ("DISEASE", "idx_disease_updated_at"),
+    ("MEDICATION", "idx_medication_updated_at"),
+    ("PRESCRIBED_TREATMENTS", "idx_pt_updated_at"),
+)
+
+def _add_reference_updated_at(cursor):
+    """UpdatedAt on the catalog tables, so the in-process reference cache refreshes incrementally"""
+    for table, index_name in REFERENCE_TABLES:
+        if not _column_exists(cursor, table, "UpdatedAt"):
+            cursor.execute(f"""
+                ALTER TABLE {table} ADD COLUMN UpdatedAt TIMESTAMP(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+            """)
+        _create_index(cursor, table, index_name, "UpdatedAt")
+
+def _move_test_report_bodies(cursor):
+    """Move TestReport bodies out of TEST_REPORTS (and its archive) into compressed TEST_REPORT_BODIES"""
+    # Body may be NULL only transiently, while a LOAD DATA of bodies is cleaned up
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS TEST_REPORT_BODIES (
+            TestID INT PRIMARY KEY,
+            Body MEDIUMBLOB
+        )
+    """)
+    for table in ("TEST_REPORTS", "TEST_REPORTS_ARCHIVE"):
+        if _column_exists(cursor, table, "TestReport"):
+            cursor.execute(f"""
+                INSERT IGNORE INTO TEST_REPORT_BODIES (TestID, Body)
+                SELECT TestID, COMPRESS(TestReport) FROM {table} WHERE TestReport IS NOT NULL
+            """)
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN TestReport")
+
+def _add_locations(cursor):
+    """Coordinates of USER.Location values, for nearest-first donor matching"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS LOCATIONS (
+            Location VARCHAR(100) PRIMARY KEY,
+            Latitude DECIMAL(9,6) NOT NULL,
+            Longitude DECIMAL(9,6) NOT NULL
+        )
+    """)
+
+def _unpartition_undergoing_treatments(cursor):
+    """Undo the withdrawn Status partitioning of UNDERGOING_TREATMENTS (migration 8).
+
+    Partitioning put the mutable Status into the primary key, so a treatment
+    could hold an 'Ongoing' and a 'Completed' row at once, and dropped the
+    foreign keys. The key is (UserID, TreatmentID) again, Status an ENUM and
+    the foreign keys are back; ongoing lookups use idx_ut_status_* instead of
+    pruning. The migration stops while duplicate or dangling rows remain.
+    """
+    if _partitions(cursor, "UNDERGOING_TREATMENTS"):
+        cursor.execute("ALTER TABLE UNDERGOING_TREATMENTS REMOVE PARTITIONING")
+    if _constraint_exists(cursor, "UNDERGOING_TREATMENTS", "chk_ut_status"):
+        cursor.execute("ALTER TABLE UNDERGOING_TREATMENTS DROP CHECK chk_ut_status")
+    if _primary_key(cursor, "UNDERGOING_TREATMENTS") != ["UserID", "TreatmentID"]:
+        _require_unique(cursor, "UNDERGOING_TREATMENTS", "UserID, TreatmentID")
+        cursor.execute("""
+            ALTER TABLE UNDERGOING_TREATMENTS
+                DROP PRIMARY KEY,
+                ADD PRIMARY KEY (UserID, TreatmentID)
+        """)
+    _require_no_nulls(cursor, "UNDERGOING_TREATMENTS", "Status")
+    cursor.execute("ALTER TABLE UNDERGOING_TREATMENTS MODIFY Status ENUM('Ongoing', 'Completed') NOT NULL")
+    _add_foreign_key(cursor, "UNDERGOING_TREATMENTS", "UserID", "USER", "UserID")
+    _add_foreign_key(cursor, "UNDERGOING_TREATMENTS", "TreatmentID", "PRESCRIBED_TREATMENTS", "TreatmentID")
+    _add_foreign_key(cursor, "UNDERGOING_TREATMENTS", "DiseaseID", "DISEASE", "DiseaseID")
+
+def _add_test_report_keys(cursor):
+    """TEST_REPORT_KEYS registry of every live and archived report, backfilled (see KEY_REGISTRIES).
+
+    It is not partitioned, so it carries the unique TestID and the foreign
+    keys TEST_REPORTS gave up for its month partitions, at the cost of one
+    more indexed insert per report. The backfill stops while existing reports
+    share a TestID or reference a missing user or treatment.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS TEST_REPORT_KEYS (
+            TestID INT PRIMARY KEY AUTO_INCREMENT,
+            UserID INT,
+            TreatmentID INT,
+            FOREIGN KEY (UserID) REFERENCES USER(UserID),
+            FOREIGN KEY (TreatmentID) REFERENCES PRESCRIBED_TREATMENTS(TreatmentID)
+        )
+    """)
+    # UNION, not UNION ALL: an interrupted archive run leaves a report in both tables
+    reports = """
+        SELECT TestID, UserID, TreatmentID FROM TEST_REPORTS
+        UNION
+        SELECT TestID, UserID, TreatmentID FROM TEST_REPORTS_ARCHIVE
+    """
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM ({reports}) AS reports GROUP BY TestID HAVING COUNT(*) > 1
+        ) AS duplicates
+    """)
+    count = cursor.fetchone()[0]
+    if count:
+        raise mysql.connector.Error(msg=f"{count} TestIDs are shared by different test reports; renumber them first")
+    for table in ("TEST_REPORTS", "TEST_REPORTS_ARCHIVE"):
+        _require_references(cursor, table, "UserID", "USER", "UserID")
+        _require_references(cursor, table, "TreatmentID", "PRESCRIBED_TREATMENTS", "TreatmentID")
+    cursor.execute(f"INSERT IGNORE INTO TEST_REPORT_KEYS (TestID, UserID, TreatmentID) {reports}")
+
+def _guard_user_bmi(cursor):
+    """Make USER.BMI NULL for implausibly small heights instead of overflowing DECIMAL(9,2).
+
+    Before, a height of a few cm made the BMI out of range, so the insert or
+    weight update failed under strict mode, and heights typed in metres got
+    five-digit BMIs. Blood-group BMI sums are rebuilt to match.
+    """
+    cursor.execute("""
+        SELECT GENERATION_EXPRESSION FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'USER' AND COLUMN_NAME = 'BMI'
+    """)
+    if "case" not in cursor.fetchone()[0].lower():
+        cursor.execute(f"ALTER TABLE USER MODIFY COLUMN BMI DECIMAL(9,2) AS ({USER_BMI_EXPRESSION}) STORED")
+    summary_stats.rebuild(cursor, ["USER"])
+
+MIGRATIONS = [
+    (1, "Secondary indexes for the MediFitCLI query workload", _add_query_indexes),
+    (2, "DISEASE_SYMPTOM inverted index for symptom search", _add_disease_symptom_index),
+    (3, "HEALTH_STATS summary table for treatment and BMI statistics", _add_health_stats),
+    (4, "Primary-key ordered indexes for keyset pagination", _add_keyset_indexes),
+    (5, "Stored USER.BMI column with blood group + BMI index", _add_user_bmi),
+    (6, "MEDICATION_RECALL_NOTIFICATIONS outbox for medication recalls", _add_recall_notifications),
+    (7, "Monthly TestDate partitions for TEST_REPORTS with TEST_REPORTS_ARCHIVE", _partition_test_reports),
+    (8, "Ongoing/Completed status partitions for UNDERGOING_TREATMENTS (withdrawn, see 12)", _withdrawn),
+    (9, "UpdatedAt columns on DISEASE, MEDICATION and PRESCRIBED_TREATMENTS", _add_reference_updated_at),
+    (10, "Compressed TEST_REPORT_BODIES side table for TestReport", _move_test_report_bodies),
+    (11, "LOCATIONS coordinates", _add_locations),
+    (12, "Unpartitioned UNDERGOING_TREATMENTS with its primary and foreign keys", _unpartition_undergoing_treatments),
+    (13, "TEST_REPORT_KEYS registry of unique, referenced TestIDs", _add_test_report_keys),
+    (14, "USER.BMI is NULL for heights below the plausible minimum", _guard_user_bmi),
+]
+
+def apply_migrations(connection):
+    """Apply every pending migration in version order and return the versions applied"""
+    cursor = connection.cursor(buffered=True)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS SCHEMA_MIGRATIONS (
+            Version INT PRIMARY KEY,
+            Description VARCHAR(200) NOT NULL,
+            AppliedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT Version FROM SCHEMA_MIGRATIONS")
+    applied_versions = {row[0] for row in cursor.fetchall()}
+
+    applied = []
+    for version, description, step in sorted(MIGRATIONS, key=lambda migration: migration[0]):
+        if version in applied_versions:
+            continue
+        step(cursor)
+        cursor.execute(
+            "INSERT INTO SCHEMA_MIGRATIONS (Version, Description) VALUES (%s, %s)",
+            (version, description)
+        )
+        connection.commit()
+        applied.append(version)
+    cursor.close()
+    return applied
+
+# Queries that must be answered through an index: (name, query, params, tables
+# allowed to be scanned). EXPLAIN only reflects real plans on representative
+# data volumes - on a handful of rows the optimizer may prefer a scan anyway.
+# The statements are the ones MediFitCLI runs, taken from queries.py and the
+# metrics planner, under the names they are instrumented with.
+def _listing_checks(list_query, params, after, allowed_scans=()):
+    """Checks for a listing's first page and for its keyset continuation after ``after``"""
+    checks = []
+    for suffix, page_after in (("", None), (" (next page)", after)):
+        query, keyset_params = queries.keyset_query(list_query, page_after, queries.DEFAULT_PAGE_SIZE + 1)
+        checks.append((list_query.name + suffix, query, (*params, *keyset_params), allowed_scans))
+    return checks
+
+def _metric_checks(allowed_scans):
+    """Checks for every scan MetricsEngine plans for HEALTH_METRICS"""
+    return [(MetricsEngine.query_name([metric.name for metric in metrics]),
+             MetricsEngine.group_query(source, where, metrics), (), allowed_scans)
+            for source, where, metrics in MetricsEngine(HEALTH_METRICS).plan()]
+
+# TEST_REPORTS_BY_TYPE is left out: TestType LIKE '%type%' cannot use an index.
+QUERY_PLAN_CHECKS = [
+    *_listing_checks(queries.USERS_BY_BLOOD_GROUP, ('O+',), (100,)),
+    *_listing_checks(queries.USERS_BY_ONGOING_TREATMENTS, (), (100, 1)),
+    *_listing_checks(queries.MRI_TEST_REPORTS, (1,), (100,)),
+    *_listing_checks(queries.USERS_BY_BMI_BAND, ('O+', 18.5, 25), (22.5, 100)),
+    *_listing_checks(queries.USERS_LOCATION_BY_BLOOD_GROUP, ('A-',), (100,)),
+    *_listing_checks(queries.USERS_BY_NAME_PREFIX, ('Jo%',), (100,)),
+    ("high_severity_treatments", queries.HIGH_SEVERITY_TREATMENTS, (7,), ()),
+    # HEALTH_STATS is a few summary rows. DiseaseName LIKE '%Cancer%' cannot use
+    # an index, so the small DISEASE catalog (d) may be scanned too; treatments
+    # must still be reached through DiseaseID
+    *_metric_checks(("HEALTH_STATS", "d")),
+]
+
+def check_query_plans(cursor):
+    """EXPLAIN every registered query and return (query name, table) pairs that use a full table scan"""
+    full_scans = []
+    for name, query, params, allowed_scans in QUERY_PLAN_CHECKS:
+        cursor.execute("EXPLAIN " + query, params or None)
+        columns = [description[0] for description in cursor.description]
+        for row in cursor.fetchall():
+            plan = dict(zip(columns, row))
+            if plan.get("type") == "ALL" and plan.get("table") not in allowed_scans:
+                full_scans.append((name, plan.get("table")))
+    return full_scans
+
+# Queries that must only read some partitions of a table: (name, query, params,
+# table, alias, partitions the plan may read or None for "not all of them")
+PARTITION_PRUNING_CHECKS = [
+    (name, query, params, "TEST_REPORTS", "tr", None)
+    for name, query, params, _ in _listing_checks(queries.MRI_TEST_REPORTS, (1,), (100,))
+]
+
+def check_partition_pruning(cursor):
+    """EXPLAIN every pruning check and return (query name, partitions read) for those that do not prune"""
+    unpruned = []
+    for name, query, params, table, alias, allowed in PARTITION_PRUNING_CHECKS:
+        if allowed is None:
+            allowed_count = len(_partitions(cursor, table)) - 1
+        cursor.execute("EXPLAIN " + query, params or None)
+        columns = [description[0] for description in cursor.description]
+        for row in cursor.fetchall():
+            plan = dict(zip(columns, row))
+            if plan.get("table") != alias:
+                continue
+            read = set((plan.get("partitions") or "").split(","))
+            if (not read <= allowed) if allowed is not None else len(read) > allowed_count:
+                unpruned.append((name, plan.get("partitions")))
+    return unpruned
+
+def run_migrations(check_plans=False, maintain_partitions=False,
+                   months_ahead=PARTITION_MONTHS_AHEAD, retention_months=TEST_REPORT_RETENTION_MONTHS):
+    """Connect to MediFit, apply pending migrations and optionally verify query plans
+    or roll the TEST_REPORTS partitions forward.
+
+    Returns False if the plan check found a full table scan or an unpruned query.
+    """
+    connection = None
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="newp",  # Replace with your MySQL root password
+            database="MediFit"
+        )
+        cursor = connection.cursor(buffered=True)
+
+        applied = apply_migrations(connection)
+        if applied:
+            print(f"Applied migrations: {', '.join(map(str, applied))}")
+        else:
+            print("Schema is up to date.")
+
+        if maintain_partitions:
+            created, archived = maintain_test_report_partitions(
+                cursor, months_ahead=months_ahead, retention_months=retention_months)
+            print(f"Created partitions: {', '.join(created) or 'none'}")
+            print(f"Archived partitions: {', '.join(archived) or 'none'}")
+
+        if check_plans:
+            full_scans = check_query_plans(cursor)
+            for name, table in full_scans:
+                print(f"Full table scan on {table} in {name}")
+            unpruned = check_partition_pruning(cursor)
+            for name, partitions in unpruned:
+                print(f"No partition pruning in {name}: reads {partitions}")
+            if full_scans or unpruned:
+                return False
+            print("All registered queries use indexes and prune partitions.")
+        return True
+
+    except mysql.connector.Error as error:
+        print(f"Error: {error}")
+        return False
+
+    finally:
+        if connection is not None and connection.is_connected():
+            cursor.close()
+            connection.close()
+
 if __name__ == "__main__":
-    create_schema()
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Create and migrate the MediFit schema")
+    parser.add_argument("command", nargs="?", default="create",
+                        choices=("create", "migrate", "check-plans", "partitions"),
+                        help="create: schema + migrations (default), migrate: pending "
+                             "migrations only, check-plans: migrations + EXPLAIN check, "
+                             "partitions: migrations + TEST_REPORTS partition rollover")
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD,
+                        help="empty TEST_REPORTS month partitions to keep ready")
+    parser.add_argument("--retention-months", type=int, default=TEST_REPORT_RETENTION_MONTHS,
+                        help="months of TEST_REPORTS to keep before archiving")
+    args = parser.parse_args()
+
+    if args.command == "create":
+        create_schema()
+    if not run_migrations(check_plans=args.command == "check-plans",
+                          maintain_partitions=args.command == "partitions",
+                          months_ahead=args.months_ahead, retention_months=args.retention_months):
+        sys.exit(1)
@@ -0,0 +1,158 @@
+import bisect
+import math
+import threading
+
+BLOOD_GROUPS = ('O-', 'O+', 'A-', 'A+', 'B-', 'B+', 'AB-', 'AB+')
+
+# Answered from idx_user_blood_group (BloodGroup, Location, ...), which covers it
+DONORS_QUERY = "SELECT UserID, BloodGroup, Location FROM USER"
+LOCATIONS_QUERY = "SELECT Location, Latitude, Longitude FROM LOCATIONS"
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def _antigens(blood_group):
+    """ABO antigens of a group ('AB+' -> {'A', 'B'}, 'O-' -> set())"""
+    return set(blood_group[:-1]) - {'O'}
+
+
+def _can_donate(donor, recipient):
+    """Red cell compatibility: the donor carries no ABO or RhD antigen the recipient lacks"""
+    return _antigens(donor) <= _antigens(recipient) and (donor[-1] == '-' or recipient[-1] == '+')
+
+
+def _preference(donor, recipient):
+    # Identical groups first; O- last, so universal donors are kept for those who need them
+    return (donor != recipient, donor == 'O-', BLOOD_GROUPS.index(donor))
+
+
+# Recipient group -> compatible donor groups, most preferred first
+COMPATIBLE_DONORS = {
+    recipient: tuple(sorted((donor for donor in BLOOD_GROUPS if _can_donate(donor, recipient)),
+                            key=lambda donor: _preference(donor, recipient)))
+    for recipient in BLOOD_GROUPS
+}
+
+
+def normalize_group(blood_group):
+    """Canonical blood group ('ab+' -> 'AB+'), or ValueError for anything else"""
+    group = (blood_group or '').strip().upper()
+    if group not in COMPATIBLE_DONORS:
+        raise ValueError(f"Unknown blood group: {blood_group!r} (expected one of {', '.join(BLOOD_GROUPS)})")
+    return group
+
+
+def _location_key(location):
+    return location.strip().casefold() if location else None
+
+
+def distance_km(a, b):
+    """Great-circle distance between two (latitude, longitude) points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class DonorIndex:
+    """In-process donor lookup by location and blood group
+
+    Users are kept as sorted UserID lists per (location, blood group), so a
+    search walks locations nearest first and, within each, the compatible
+    groups in order of preference, stopping once it has ``limit`` donors.
+    Locations are compared case-insensitively. Distances come from the
+    LOCATIONS coordinates; locations without coordinates follow the
+    located ones by name, and users without a location come last.
+    """
+
+    def __init__(self, coordinates=None):
+        self._coordinates = dict(coordinates or {})  # location key -> (latitude, longitude)
+        self._users = {}  # UserID -> (blood group, location key)
+        self._by_location = {}  # location key -> {blood group: sorted UserIDs}
+        self._names = {}  # location key -> Location as first seen
+        self._order = {}  # origin location key -> [(location key, km or None)]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, users, locations=()):
+        """Build an index from DONORS_QUERY and LOCATIONS_QUERY rows fetched as dicts"""
+        index = cls({_location_key(row['Location']): (float(row['Latitude']), float(row['Longitude']))
+                     for row in locations if row['Latitude'] is not None and row['Longitude'] is not None})
+        for row in users:
+            index._add(row['UserID'], row['BloodGroup'], row['Location'], keep_sorted=False)
+        # UserIDs were appended in scan order; one sort per bucket instead of an insort each
+        for by_group in index._by_location.values():
+            for users_in_group in by_group.values():
+                users_in_group.sort()
+        return index
+
+    def add(self, user_id, blood_group, location):
+        """Index a new user, or move an existing one after its group or location changed"""
+        with self._lock:
+            self._add(user_id, blood_group, location)
+
+    def remove(self, user_id):
+        with self._lock:
+            self._remove(user_id)
+
+    def _add(self, user_id, blood_group, location, keep_sorted=True):
+        self._remove(user_id)
+        try:
+            group = normalize_group(blood_group)
+        except ValueError:
+            return  # not a donor we can match
+        key = _location_key(location)
+        if key not in self._by_location:
+            self._by_location[key] = {}
+            self._names[key] = location.strip() if location else None
+            self._order.clear()
+        users = self._by_location[key].setdefault(group, [])
+        if keep_sorted:
+            bisect.insort(users, user_id)
+        else:
+            users.append(user_id)
+        self._users[user_id] = (group, key)
+
+    def _remove(self, user_id):
+        entry = self._users.pop(user_id, None)
+        if entry is None:
+            return
+        group, key = entry
+        users = self._by_location[key][group]
+        del users[bisect.bisect_left(users, user_id)]
+
+    def __len__(self):
+        return len(self._users)
+
+    def _locations_by_distance(self, origin):
+        """[(location key, km or None)] of every indexed location, nearest to origin first"""
+        order = self._order.get(origin)
+        if order is None:
+            here = self._coordinates.get(origin)
+            located, unlocated = [], []
+            for key in self._by_location:
+                if key == origin:
+                    continue
+                if key is not None and here is not None and key in self._coordinates:
+                    located.append((distance_km(here, self._coordinates[key]), key))
+                elif key is not None:
+                    unlocated.append(key)
+            order = ([(origin, 0.0)] if origin is not None and origin in self._by_location else []) + \
+                    [(key, km) for km, key in sorted(located)] + [(key, None) for key in sorted(unlocated)]
+            if None in self._by_location:
+                order.append((None, None))
+            self._order[origin] = order
+        return order
+
+    def search(self, recipient_group, location, limit=20):
+        """[(UserID, BloodGroup, Location, km or None)] of up to limit compatible donors, nearest first"""
+        groups = COMPATIBLE_DONORS[normalize_group(recipient_group)]
+        matches = []
+        with self._lock:
+            for key, km in self._locations_by_distance(_location_key(location)):
+                by_group = self._by_location[key]
+                for group in groups:
+                    for user_id in by_group.get(group, ()):
+                        matches.append((user_id, group, self._names[key], None if km is None else round(km, 1)))
+                        if len(matches) >= limit:
+                            return matches
+        return matches
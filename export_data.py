@@ -0,0 +1,284 @@
+import argparse
+import base64
+import csv
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
+import pymysql
+
+# Tables exported: table -> (integer column the table is split into ranges on,
+# or None to export it as one shard; ORDER BY within a shard, the primary key).
+# Split columns lead the primary key or an index, so each range is an index
+# range scan.
+EXPORT_TABLES = {
+    "USER": ("UserID", "UserID"),
+    "DISEASE": ("DiseaseID", "DiseaseID"),
+    "PRESCRIBED_TREATMENTS": ("TreatmentID", "TreatmentID"),
+    "MEDICATION": ("MedicationID", "MedicationID"),
+    "TEST_REPORTS": ("TestID", "TestID, TestDate"),
+    "TEST_REPORTS_ARCHIVE": ("TestID", "TestID, TestDate"),
+    "TEST_REPORT_KEYS": ("TestID", "TestID"),
+    "TEST_REPORT_BODIES": ("TestID", "TestID"),
+    "MEDICAL_HISTORY": ("UserID", "UserID"),
+    "UNDERGOING_TREATMENTS": ("UserID", "UserID, TreatmentID"),
+    "DISEASE_SYMPTOM": ("DiseaseID", "DiseaseID, Term"),
+    "MEDICATION_RECALL_NOTIFICATIONS": ("NotificationID", "NotificationID"),
+    "HEALTH_STATS": (None, "Dimension, DimValue"),
+    "LOCATIONS": (None, "Location"),
+    "SCHEMA_MIGRATIONS": (None, "Version"),
+}
+
+FORMATS = ("csv", "jsonl")
+MANIFEST = "manifest.json"
+
+# Connection of this worker process, opened once by _init_worker
+_connection = None
+
+
+def _init_worker(connect_kwargs):
+    global _connection
+    _connection = pymysql.connect(**connect_kwargs)
+
+
+def _value(value):
+    """A JSON/CSV-safe rendering: binary as base64, dates as ISO 8601, decimals exact"""
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, datetime.timedelta)):
+        return str(value)
+    return value
+
+
+class _HashingWriter:
+    """Write-only file wrapper that hashes and counts the bytes passing through"""
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return self.handle.write(data)
+
+    def flush(self):
+        self.handle.flush()
+
+
+def plan_shards(cursor, tables=None, rows_per_shard=100000):
+    """Split every table into [low, high) ranges of its split column.
+
+    Ranges are equal-width over MIN..MAX, sized from the optimizer's row
+    estimate so each holds about rows_per_shard rows; gaps in the keys make
+    some shards smaller. Tables missing from the schema are skipped.
+    Returns [{table, shard, low, high}] with low/high None for unsplit tables.
+    """
+    cursor.execute("SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()")
+    estimates = {name.upper(): rows or 0 for name, rows in cursor.fetchall()}
+    shards = []
+    for table in tables or EXPORT_TABLES:
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        if table not in estimates:
+            continue
+        column = EXPORT_TABLES[table][0]
+        bounds = None
+        if column is not None:
+            cursor.execute(f"SELECT MIN({column}), MAX({column}) FROM {table}")
+            bounds = cursor.fetchone()
+        if bounds is None or bounds[0] is None:
+            shards.append({"table": table, "shard": 0, "low": None, "high": None})
+            continue
+        low, high = bounds[0], bounds[1] + 1
+        # Without statistics yet, assume the keys are dense
+        estimate = estimates[table] or high - low
+        count = max(1, min(math.ceil(estimate / rows_per_shard), high - low))
+        width = math.ceil((high - low) / count)
+        for shard, start in enumerate(range(low, high, width)):
+            shards.append({"table": table, "shard": shard, "low": start, "high": min(start + width, high)})
+    return shards
+
+
+def export_shard(task, directory, file_format="csv", compresslevel=6, batch_size=10000):
+    """Stream one shard to a gzip file in directory on this worker's connection; returns its manifest entry"""
+    table = task["table"]
+    column, order_by = EXPORT_TABLES[table]
+    query, params = f"SELECT * FROM {table}", None
+    if task["low"] is not None:
+        query += f" WHERE {column} >= %s AND {column} < %s"
+        params = (task["low"], task["high"])
+    query += f" ORDER BY {order_by}"
+
+    filename = f"{table}/{table}-{task['shard']:05d}.{file_format}.gz"
+    path = os.path.join(directory, filename)
+    started = time.perf_counter()
+    rows = 0
+    with open(path, "wb") as raw:
+        hashing = _HashingWriter(raw)
+        # mtime=0 keeps the bytes, and so the checksum, identical across runs
+        with gzip.GzipFile(fileobj=hashing, mode="wb", compresslevel=compresslevel, mtime=0) as compressed, \
+                io.TextIOWrapper(compressed, encoding="utf-8", newline="") as text:
+            with _connection.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(query, params)
+                columns = [description[0] for description in cursor.description]
+                if file_format == "csv":
+                    writer = csv.writer(text, lineterminator="\n")
+                    writer.writerow(columns)
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        values = [_value(value) for value in row]
+                        if file_format == "csv":
+                            # NULL as an empty field, as bulk_load.read_rows reads it back
+                            writer.writerow(["" if value is None else value for value in values])
+                        else:
+                            text.write(json.dumps(dict(zip(columns, values))) + "\n")
+                    rows += len(batch)
+    return {**task, "file": filename, "rows": rows, "bytes": hashing.bytes,
+            "sha256": hashing.sha256.hexdigest(), "seconds": round(time.perf_counter() - started, 3)}
+
+
+def export_database(connect_kwargs, directory, tables=None, file_format="csv", workers=None,
+                    rows_per_shard=100000, compresslevel=6, progress=None):
+    """Export tables to ``directory`` as gzip-compressed CSV or JSONL shards plus a manifest.
+
+    Every table is split into primary-key ranges (plan_shards) and the ranges
+    are streamed in parallel by a pool of ``workers`` processes (one per CPU
+    by default), each on its own connection. Each shard is one statement and
+    so a consistent read of its range; shards of a busy database may see
+    different moments, so export from a replica or a quiet primary when
+    cross-table consistency matters. The export is built next to
+    ``directory`` and swapped in once every shard succeeded. Returns the
+    manifest.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported file format: {file_format}")
+    workers = workers or os.cpu_count() or 1
+    connection = pymysql.connect(**connect_kwargs)
+    try:
+        with connection.cursor() as cursor:
+            tasks = plan_shards(cursor, tables, rows_per_shard)
+    finally:
+        connection.close()
+
+    building = directory.rstrip(os.sep) + ".building"
+    shutil.rmtree(building, ignore_errors=True)
+    for table in dict.fromkeys(task["table"] for task in tasks):
+        os.makedirs(os.path.join(building, table))
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(connect_kwargs,)) as pool:
+        futures = [pool.submit(export_shard, task, building, file_format, compresslevel) for task in tasks]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress:
+                progress(len(results), len(tasks), results[-1])
+    seconds = time.perf_counter() - started
+
+    manifest = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "database": connect_kwargs.get("database"),
+        "format": file_format,
+        "compression": "gzip",
+        "encoding": "utf-8; binary columns base64; CSV NULL as empty field",
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "tables": {},
+    }
+    for result in sorted(results, key=lambda result: (list(EXPORT_TABLES).index(result["table"]), result["shard"])):
+        entry = manifest["tables"].setdefault(result["table"], {
+            "split_column": EXPORT_TABLES[result["table"]][0], "rows": 0, "bytes": 0, "shards": []})
+        entry["rows"] += result["rows"]
+        entry["bytes"] += result["bytes"]
+        entry["shards"].append({key: result[key] for key in
+                                ("shard", "low", "high", "file", "rows", "bytes", "sha256", "seconds")})
+    manifest["rows"] = sum(entry["rows"] for entry in manifest["tables"].values())
+
+    with open(os.path.join(building, MANIFEST), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    previous = directory.rstrip(os.sep) + ".previous"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, previous)
+    os.replace(building, directory)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+def verify_export(directory):
+    """Recompute every shard's size and SHA-256; returns [(file, problem)] for the ones that differ"""
+    with open(os.path.join(directory, MANIFEST), encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    problems = []
+    for entry in manifest["tables"].values():
+        for shard in entry["shards"]:
+            path = os.path.join(directory, shard["file"])
+            if not os.path.exists(path):
+                problems.append((shard["file"], "missing"))
+                continue
+            digest = hashlib.sha256()
+            with open(path, "rb") as handle:
+                for chunk in iter(lambda: handle.read(1 << 20), b""):
+                    digest.update(chunk)
+            if os.path.getsize(path) != shard["bytes"] or digest.hexdigest() != shard["sha256"]:
+                problems.append((shard["file"], "checksum mismatch"))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export MediFit tables as compressed CSV/JSONL shards in parallel")
+    parser.add_argument("command", choices=("export", "verify"))
+    parser.add_argument("--output", default="exports/medifit", help="export directory")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--tables", nargs="+", choices=sorted(EXPORT_TABLES), help="tables to export (default all)")
+    parser.add_argument("--workers", type=int, help="worker processes and connections (default one per CPU)")
+    parser.add_argument("--rows-per-shard", type=int, default=100000)
+    parser.add_argument("--compresslevel", type=int, default=6, choices=range(1, 10), metavar="1-9")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        problems = verify_export(args.output)
+        for filename, problem in problems:
+            print(f"{filename}: {problem}")
+        print("Export is intact." if not problems else f"{len(problems)} shard(s) failed verification.")
+        raise SystemExit(1 if problems else 0)
+
+    def progress(done, total, result):
+        print(f"[{done}/{total}] {result['file']}: {result['rows']} rows in {result['seconds']}s")
+
+    connect_kwargs = dict(host=args.host, port=args.port, user=args.user,
+                          password=args.password, database=args.database)
+    try:
+        manifest = export_database(connect_kwargs, args.output, args.tables, args.format, args.workers,
+                                   args.rows_per_shard, args.compresslevel, progress)
+    except (pymysql.Error, ValueError, OSError) as e:
+        print(f"Error exporting database: {e}")
+        raise SystemExit(1)
+    print(json.dumps({table: entry["rows"] for table, entry in manifest["tables"].items()}))
+    rate = manifest["rows"] / manifest["seconds"] if manifest["seconds"] else 0
+    print(f"Exported {manifest['rows']} rows in {manifest['seconds']}s ({rate:.0f} rows/s) "
+          f"with {manifest['workers']} workers to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
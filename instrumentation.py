@@ -0,0 +1,218 @@
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+
+import pymysql
+
+logger = logging.getLogger("medifit.slow_queries")
+
+# Latency histogram bucket upper bounds in seconds (Prometheus defaults)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class QueryStats:
+    """Counters and a latency histogram for one named query"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds, rows=0, error=False):
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.calls += 1
+        self.errors += error
+        self.rows += rows
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls (max latency for +Inf)"""
+        if not self.calls:
+            return None
+        rank = fraction * self.calls
+        seen = 0
+        for bound, count in zip(self.buckets, self.bucket_counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+    def as_dict(self):
+        def ms(seconds):
+            return round(seconds * 1000, 3) if seconds is not None else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": ms(self.total_seconds),
+            "avg_ms": ms(self.total_seconds / self.calls) if self.calls else None,
+            "p50_ms": ms(self.percentile(0.50)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "p99_ms": ms(self.percentile(0.99)),
+            "max_ms": ms(self.max_seconds),
+        }
+
+
+def _row_count(cursor):
+    # Unbuffered cursors do not know their row count until the result is read
+    if isinstance(cursor, pymysql.cursors.SSCursor) or cursor.rowcount is None or cursor.rowcount < 0:
+        return 0
+    return cursor.rowcount
+
+
+class QueryInstrumentation:
+    """Execution layer recording latency, rows and errors per named query
+
+    Every statement goes through ``execute``/``executemany`` under a stable
+    name. Statements slower than ``slow_query_threshold`` seconds are logged
+    to the ``medifit.slow_queries`` logger with their EXPLAIN plan and kept in
+    a bounded in-memory slow-query log.
+
+    Parameters are patient data (names, weights, medical IDs), so the log
+    records only how many there were unless ``log_query_params`` is set.
+    """
+
+    def __init__(self, slow_query_threshold=1.0, explain_slow_queries=True,
+                 slow_log_size=100, buckets=DEFAULT_BUCKETS, log_query_params=False):
+        self.slow_query_threshold = slow_query_threshold
+        self.explain_slow_queries = explain_slow_queries
+        self.log_query_params = log_query_params
+        self.buckets = tuple(buckets)
+        self._stats = {}
+        self._slow_log = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, rows=0, error=False):
+        """Add one execution of query ``name``"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = QueryStats(self.buckets)
+            stats.observe(seconds, rows, error)
+
+    def add_rows(self, name, rows):
+        """Count rows read after the fact, e.g. from an unbuffered cursor"""
+        with self._lock:
+            if name in self._stats:
+                self._stats[name].rows += rows
+
+    def execute(self, cursor, name, query, params=None, run=None):
+        """Run ``query`` on ``cursor`` and record it as ``name``; errors are re-raised.
+
+        ``run(cursor, name, query, params)`` replaces the plain
+        ``cursor.execute``, e.g. to execute a prepared statement instead.
+        """
+        started = time.perf_counter()
+        try:
+            if run is None:
+                cursor.execute(query, params)
+            else:
+                run(cursor, name, query, params)
+        except pymysql.Error:
+            self.record(name, time.perf_counter() - started, error=True)
+            raise
+        seconds = time.perf_counter() - started
+        self.record(name, seconds, _row_count(cursor))
+        if self.slow_query_threshold is not None and seconds >= self.slow_query_threshold:
+            self._log_slow_query(cursor, name, query, params, seconds)
+        return cursor
+
+    def executemany(self, cursor, name, query, seq_of_params):
+        started = time.perf_counter()
+        try:
+            cursor.executemany(query, seq_of_params)
+        except pymysql.Error:
+            self.record(name, time.perf_counter() - started, error=True)
+            raise
+        seconds = time.perf_counter() - started
+        self.record(name, seconds, _row_count(cursor))
+        if self.slow_query_threshold is not None and seconds >= self.slow_query_threshold:
+            self._log_slow_query(cursor, name, query, None, seconds)
+        return cursor
+
+    def _explain(self, cursor, query, params):
+        """EXPLAIN rows for a statement, on a separate cursor of the same connection"""
+        # An unbuffered result still streaming would block any other statement
+        if not self.explain_slow_queries or isinstance(cursor, pymysql.cursors.SSCursor):
+            return None
+        try:
+            with cursor.connection.cursor(pymysql.cursors.DictCursor) as explain_cursor:
+                explain_cursor.execute("EXPLAIN " + query, params)
+                return explain_cursor.fetchall()
+        except pymysql.Error as e:
+            # Server messages may quote a parameter value
+            return [{"error": str(e) if self.log_query_params else f"error {e.args[0] if e.args else ''}"}]
+
+    def _log_slow_query(self, cursor, name, query, params, seconds):
+        entry = {
+            "name": name,
+            "seconds": round(seconds, 6),
+            "query": " ".join(query.split()),
+            "param_count": len(params) if params is not None else 0,
+            "params": repr(params) if params is not None and self.log_query_params else None,
+            "plan": self._explain(cursor, query, params),
+            "at": time.time(),
+        }
+        with self._lock:
+            self._slow_log.append(entry)
+        if self.log_query_params:
+            logger.warning("Slow query %s took %.3fs: %s params=%s plan=%s",
+                           name, seconds, entry["query"], entry["params"], entry["plan"])
+        else:
+            logger.warning("Slow query %s took %.3fs: %s (%d params) plan=%s",
+                           name, seconds, entry["query"], entry["param_count"], entry["plan"])
+
+    def stats(self):
+        """{query name: calls, errors, rows and latency summary in milliseconds}"""
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self._stats.items())}
+
+    def slow_queries(self):
+        """Most recent slow-query log entries, oldest first"""
+        with self._lock:
+            return list(self._slow_log)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow_log.clear()
+
+    def prometheus(self, prefix="medifit"):
+        """Render the counters in the Prometheus text exposition format"""
+        with self._lock:
+            stats = sorted(self._stats.items())
+            lines = [
+                f"# HELP {prefix}_query_duration_seconds Query execution time.",
+                f"# TYPE {prefix}_query_duration_seconds histogram",
+            ]
+            for name, query_stats in stats:
+                label = _label(name)
+                cumulative = 0
+                for bound, count in zip(query_stats.buckets, query_stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_query_duration_seconds_bucket{{query="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_query_duration_seconds_bucket{{query="{label}",le="+Inf"}} {query_stats.calls}')
+                lines.append(f'{prefix}_query_duration_seconds_sum{{query="{label}"}} {query_stats.total_seconds:.6f}')
+                lines.append(f'{prefix}_query_duration_seconds_count{{query="{label}"}} {query_stats.calls}')
+            for metric, attribute, help_text in (("query_rows_total", "rows", "Rows returned or affected."),
+                                                 ("query_errors_total", "errors", "Failed executions.")):
+                lines.append(f"# HELP {prefix}_{metric} {help_text}")
+                lines.append(f"# TYPE {prefix}_{metric} counter")
+                for name, query_stats in stats:
+                    lines.append(f'{prefix}_{metric}{{query="{_label(name)}"}} {getattr(query_stats, attribute)}')
+            lines.append(f"# HELP {prefix}_slow_queries_logged Entries currently in the slow-query log.")
+            lines.append(f"# TYPE {prefix}_slow_queries_logged gauge")
+            lines.append(f"{prefix}_slow_queries_logged {len(self._slow_log)}")
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
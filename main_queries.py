@@ -1,226 +1,613 @@
+import copy
+import functools
+import os
 import pymysql
 import datetime
+from decimal import Decimal, InvalidOperation
+import threading
+from contextlib import contextmanager
+
+from connection_pool import ConnectionPool
+from replica_router import ReplicaRouter, parse_endpoint
+from instrumentation import QueryInstrumentation
+import prepared_statements
+from metrics import HEALTH_METRICS, MetricsEngine
+from donor_matching import DONORS_QUERY, LOCATIONS_QUERY, DonorIndex
+from name_search import NAMES_QUERY, NameIndex
+import patient_profiles
+import queries
+import report_bodies
+from query_cache import QueryCache, cached
+from reference_data import CATALOGS, ReferenceData
+import summary_stats
+from symptom_search import POSTINGS_QUERY, SymptomIndex, tokenize
+
+TREATMENT_STATUSES = ('Ongoing', 'Completed')
 
 class MediFitCLI:
-   def __init__(self):
-      try:
-         self.connection = pymysql.connect(
-            host='localhost',
-            user='root',
-            password='newp',
-            database='MediFit'
+   def __init__(self, host='localhost', user='root', password='newp', database='MediFit', port=3306,
+                replicas=(), read_your_writes_window=5.0, min_pool_size=1, max_pool_size=10, pool_timeout=30.0,
+                health_check_interval=30.0, cache_size=256,
+                slow_query_threshold=1.0, explain_slow_queries=True, log_query_params=False,
+                use_prepared_statements=False, profile_cache_size=1024, profile_ttl=300,
+                reference_refresh_interval=30.0):
+      connect_kwargs = dict(
+         host=host,
+         port=port,
+         user=user,
+         password=password,
+         database=database
+      )
+
+      def make_pool(min_size=min_pool_size, **endpoint):
+         return ConnectionPool(
+            min_size=min_size,
+            max_size=max_pool_size,
+            timeout=pool_timeout,
+            health_check_interval=health_check_interval,
+            **{**connect_kwargs, **endpoint}
          )
-         self.cursor = self.connection.cursor(pymysql.cursors.DictCursor)
+
+      try:
+         self.pool = make_pool()
       except pymysql.Error as e:
          print(f"Error connecting to database: {e}")
          exit(1)
 
+      # Replicas share the primary's credentials unless an endpoint dict overrides them.
+      # Their pools connect on first use, so one that is down at startup is still
+      # registered: the router skips it while it fails and retries it later.
+      replica_pools = []
+      for endpoint in replicas:
+         endpoint = parse_endpoint(endpoint)
+         name = f"{endpoint.get('host', host)}:{endpoint.get('port', port)}"
+         replica_pools.append((name, make_pool(min_size=0, **endpoint)))
+      self.router = ReplicaRouter(self.pool, replica_pools, read_your_writes_window)
+
+      # The caches are shared by every session, but read-your-writes is per session
+      self.cache = QueryCache(max_entries=cache_size, admit=self._may_cache)
+      self.profile_cache = QueryCache(max_entries=profile_cache_size, admit=self._may_cache)
+      self.profile_ttl = profile_ttl
+      self.metrics = MetricsEngine(HEALTH_METRICS)
+      self.instrumentation = QueryInstrumentation(
+         slow_query_threshold=slow_query_threshold,
+         explain_slow_queries=explain_slow_queries,
+         log_query_params=log_query_params
+      )
+      self.statements = prepared_statements.StatementRegistry() if use_prepared_statements else None
+      self._symptom_index = None
+      self._symptom_index_lock = threading.Lock()
+      self._name_index = None
+      self._name_index_lock = threading.Lock()
+      self._donor_index = None
+      self._donor_index_lock = threading.Lock()
+      self.reference = ReferenceData(refresh_interval=reference_refresh_interval)
+      self._reference_lock = threading.Lock()
+
    def close_connection(self):
-      self.connection.close()
+      self.router.close()
+
+   def session(self, key):
+      """Context manager scoping read-your-writes to key (e.g. a user or request id).
+
+      Outside any session the whole client is one session: after any write,
+      every read stays on the primary for read_your_writes_window seconds.
+      """
+      return self.router.session(key)
+
+   def routing_stats(self):
+      """Writes, primary/sticky/replica read counts and replicas currently down"""
+      return self.router.stats()
+
+   @contextmanager
+   def _cursor(self, cursor_class=pymysql.cursors.DictCursor, read_only=False, session=None):
+      """Check out a pooled connection and yield a private cursor (DictCursor by default) on it.
+
+      Read-only work goes to a replica when one is configured and the session
+      has not written recently; everything else runs on the primary.
+      Uncommitted work is rolled back when the connection goes back to the pool,
+      so write methods only need to commit on success.
+      """
+      with self.router.connection(read_only, session) as connection:
+         cursor = connection.cursor(cursor_class)
+         try:
+            yield cursor
+         finally:
+            cursor.close()
+
+   def _execute(self, cursor, name, query, params=None):
+      """Run one statement through the instrumentation layer under a stable query name.
+
+      With use_prepared_statements, the fixed-shape statements named in
+      prepared_statements.PREPARED_QUERIES execute as server-side prepared
+      statements from the registry. Everything else, and every statement
+      without the option, is sent with PyMySQL's parameterized text protocol.
+      Connections are never opened with CLIENT.MULTI_STATEMENTS, so one
+      statement runs per round trip.
+      """
+      run = None
+      if self.statements is not None and name in prepared_statements.PREPARED_QUERIES:
+         run = self.statements.execute
+      return self.instrumentation.execute(cursor, name, query, params, run)
+
+   def _apply(self, cursor, name, statements):
+      for query, params in statements:
+         self._execute(cursor, name, query, params)
+
+   def _invalidate(self, tables, user_ids=()):
+      """After a committed write: pin the session to the primary and drop cached
+      aggregates over ``tables`` and cached profiles touching them or ``user_ids``"""
+      self.router.record_write()
+      if any(table in CATALOGS for table in tables):
+         self.reference.mark_stale()
+      self.cache.invalidate(*tables)
+      self.profile_cache.invalidate(*tables, *(f"user:{user_id}" for user_id in user_ids))
+
+   def _may_cache(self):
+      """Whether a result just read may be cached for every session: not while it may
+      come from a replica that has yet to apply another session's recent write"""
+      return not self.router.may_read_stale()
+
+   def _get_symptom_index(self):
+      """Load the in-process symptom postings from DISEASE_SYMPTOM on first use"""
+      with self._symptom_index_lock:
+         if self._symptom_index is None:
+            with self._cursor(read_only=True) as cursor:
+               self._execute(cursor, 'symptom_postings', POSTINGS_QUERY)
+               self._symptom_index = SymptomIndex.from_rows(cursor.fetchall())
+         return self._symptom_index
+
+   def _get_reference_data(self):
+      """The in-process catalog cache, refreshed incrementally when refresh_interval has
+      passed or this client wrote to a catalog"""
+      with self._reference_lock:
+         if self.reference.is_stale():
+            with self._cursor(read_only=True) as cursor:
+               self.reference.refresh(cursor, self._execute)
+         return self.reference
+
+   def reference_data_stats(self):
+      """Cached catalog row counts and refresh counters"""
+      return self.reference.stats()
+
+   def cache_stats(self):
+      """Hit/miss/eviction counters of the aggregate query cache"""
+      return self.cache.stats()
+
+   def stats(self):
+      """Per-query calls, errors, rows and latency percentiles"""
+      return self.instrumentation.stats()
+
+   def slow_queries(self):
+      """Recent statements over slow_query_threshold, with their EXPLAIN plans"""
+      return self.instrumentation.slow_queries()
+
+   def prometheus_metrics(self):
+      """Query statistics in the Prometheus text exposition format"""
+      return self.instrumentation.prometheus()
+
+   def reload_symptom_index(self):
+      """Drop the cached symptom postings so the next search reloads them"""
+      with self._symptom_index_lock:
+         self._symptom_index = None
+
+   def _get_name_index(self):
+      """Load the in-process patient name index from USER on first use"""
+      with self._name_index_lock:
+         if self._name_index is None:
+            with self._cursor(pymysql.cursors.SSDictCursor, read_only=True) as cursor:
+               self._execute(cursor, 'patient_names', NAMES_QUERY)
+               self._name_index = NameIndex.from_rows(cursor)
+         return self._name_index
+
+   def reload_name_index(self):
+      """Drop the patient name index (e.g. after users were added by another process)"""
+      with self._name_index_lock:
+         self._name_index = None
+
+   def _get_donor_index(self):
+      """Load the in-process donor index from USER and LOCATIONS on first use"""
+      with self._donor_index_lock:
+         if self._donor_index is None:
+            with self._cursor(read_only=True) as cursor:
+               self._execute(cursor, 'donor_locations', LOCATIONS_QUERY)
+               locations = cursor.fetchall()
+            with self._cursor(pymysql.cursors.SSDictCursor, read_only=True) as cursor:
+               self._execute(cursor, 'donors', DONORS_QUERY)
+               self._donor_index = DonorIndex.from_rows(cursor, locations)
+         return self._donor_index
+
+   def reload_donor_index(self):
+      """Drop the donor index (e.g. after users or LOCATIONS were changed by another process)"""
+      with self._donor_index_lock:
+         self._donor_index = None
+
+   def _fetch_page(self, list_query, params, limit=None, page_token=None):
+      """Run a listing query, returning one keyset page when limit or page_token is given.
+
+      The page holds at most limit rows (DEFAULT_PAGE_SIZE if only a token is
+      passed) and its next_token continues right after the last row.
+      """
+      if limit is None and page_token is None:
+         with self._cursor(read_only=True) as cursor:
+            self._execute(cursor, list_query.name, list_query.sql, params)
+            return queries.Page(cursor.fetchall())
+
+      limit = limit or queries.DEFAULT_PAGE_SIZE
+      after = queries.decode_token(list_query.name, page_token) if page_token else None
+      # One extra row tells whether another page exists
+      query, keyset_params = queries.keyset_query(list_query, after, limit + 1)
+      with self._cursor(read_only=True) as cursor:
+         self._execute(cursor, list_query.name, query, (*params, *keyset_params))
+         return queries.make_page(list_query, cursor.fetchall(), limit)
 
    # Retrieval Methods
-   def retrieve_users_by_blood_group(self, blood_group='O+'):
+   def retrieve_users_by_blood_group(self, blood_group='O+', limit=None, page_token=None):
       """Retrieve all users with a specific blood group (Selection Query)"""
       try:
-         query = "SELECT * FROM USER WHERE BloodGroup = %s"
-         self.cursor.execute(query, (blood_group,))
-         return self.cursor.fetchall()
+         return self._fetch_page(queries.USERS_BY_BLOOD_GROUP, (blood_group,), limit, page_token)
       except pymysql.Error as e:
          print(f"Error retrieving users: {e}")
-         return []
+         return queries.Page()
 
-   def retrieve_users_by_ongoing_treatments(self):
+   def retrieve_users_by_ongoing_treatments(self, limit=None, page_token=None):
       """Retrieve all users who are currently undergoing treatment (Selection Query)"""
       try:
-         query = """
-         SELECT u.* 
-         FROM USER u
-         JOIN UNDERGOING_TREATMENTS ut ON u.UserID = ut.UserID
-         WHERE ut.Status = 'Ongoing'
-         """
-         self.cursor.execute(query)
-         return self.cursor.fetchall()
+         return self._fetch_page(queries.USERS_BY_ONGOING_TREATMENTS, (), limit, page_token)
       except pymysql.Error as e:
          print(f"Error retrieving ongoing treatments: {e}")
-         return []
+         return queries.Page()
 
-   def retrieve_mri_test_reports(self, years=1):
+   def retrieve_mri_test_reports(self, years=1, limit=None, page_token=None):
       """Retrieve details of all users who have undergone an MRI test in the last year (Selection Query)"""
       try:
-         query = """
-         SELECT u.*, tr.*
-         FROM USER u
-         JOIN TEST_REPORTS tr ON u.UserID = tr.UserID
-         WHERE tr.TestType = 'MRI' AND tr.TestDate >= DATE_SUB(CURDATE(), INTERVAL %s YEAR)
-         """
-         self.cursor.execute(query, (years,))
-         return self.cursor.fetchall()
+         return self._fetch_page(queries.MRI_TEST_REPORTS, (years,), limit, page_token)
       except pymysql.Error as e:
          print(f"Error retrieving MRI test reports: {e}")
-         return []
+         return queries.Page()
+
+   def retrieve_users_by_bmi_band(self, band='normal', blood_group='O+', limit=None, page_token=None):
+      """Retrieve users of a blood group whose stored BMI lies in a band (Range Query)
+
+      band is a name from queries.BMI_BANDS ('underweight', 'normal',
+      'overweight', 'obese') or a (low, high) pair; low is included, high is not.
+      Rows come ordered by BMI.
+      """
+      low, high = queries.bmi_range(band)
+      try:
+         return self._fetch_page(queries.USERS_BY_BMI_BAND, (blood_group, low, high), limit, page_token)
+      except pymysql.Error as e:
+         print(f"Error retrieving users by BMI band: {e}")
+         return queries.Page()
 
    # Projection Queries
-   def retrieve_users_location_by_blood_group(self, blood_group='A-'):
+   def retrieve_users_location_by_blood_group(self, blood_group='A-', limit=None, page_token=None):
       """Retrieve names and geographic locations of users with specific blood group (Projection Query)"""
       try:
-         query = "SELECT FirstName, LastName, Location FROM USER WHERE BloodGroup = %s"
-         self.cursor.execute(query, (blood_group,))
-         return self.cursor.fetchall()
+         return self._fetch_page(queries.USERS_LOCATION_BY_BLOOD_GROUP, (blood_group,), limit, page_token)
       except pymysql.Error as e:
          print(f"Error retrieving user locations: {e}")
-         return []
+         return queries.Page()
 
-   def retrieve_allopathy_diseases(self):
-      """Retrieve disease names for Allopathy treatments (Projection Query)"""
+   def retrieve_allopathy_diseases(self, limit=None, page_token=None):
+      """Retrieve disease names for Allopathy treatments (Projection Query), from the catalog cache"""
       try:
-         query = """
-         SELECT DISTINCT d.DiseaseName
-         FROM DISEASE d
-         JOIN PRESCRIBED_TREATMENTS pt ON d.DiseaseID = pt.DiseaseID
-         WHERE pt.TypeOfTreatment = 'Allopathy'
-         """
-         self.cursor.execute(query)
-         return self.cursor.fetchall()
+         rows = self._get_reference_data().diseases_with_treatment_type('Allopathy')
+         return queries.page_rows(queries.ALLOPATHY_DISEASES, rows, limit, page_token)
       except pymysql.Error as e:
          print(f"Error retrieving Allopathy diseases: {e}")
-         return []
+         return queries.Page()
 
    # Aggregate Function Queries
-   def calculate_comprehensive_metrics(self):
-      """Comprehensive aggregate metrics (Aggregate Function Queries)"""
+   @cached(ttl=30, tables=('USER', 'PRESCRIBED_TREATMENTS', 'DISEASE', 'UNDERGOING_TREATMENTS'))
+   def calculate_comprehensive_metrics(self, parallel=False):
+      """Comprehensive aggregate metrics (Aggregate Function Queries)
+
+      All metrics are planned into one statement (a single round trip); with
+      parallel the per-table scans instead run concurrently on pooled connections.
+      """
       try:
-         # Average expense of cancer treatments
-         cancer_expense_query = """
-         SELECT AVG(pt.Expense) as AverageCancerTreatmentExpense
-         FROM PRESCRIBED_TREATMENTS pt
-         JOIN DISEASE d ON pt.DiseaseID = d.DiseaseID
-         WHERE d.DiseaseName LIKE '%Cancer%'
-         """
-         self.cursor.execute(cancer_expense_query)
-         cancer_expense = self.cursor.fetchone()
-
-         # Maximum severity of diseases
-         max_severity_query = "SELECT MAX(Severity) as MaxDiseaseSeverity FROM DISEASE"
-         self.cursor.execute(max_severity_query)
-         max_severity = self.cursor.fetchone()
-
-         # Total ongoing treatments
-         ongoing_treatments_query = """
-         SELECT COUNT(*) as TotalOngoingTreatments
-         FROM UNDERGOING_TREATMENTS
-         WHERE Status = 'Ongoing'
-         """
-         self.cursor.execute(ongoing_treatments_query)
-         ongoing_treatments = self.cursor.fetchone()
-
-         return {
-               **cancer_expense,
-               **max_severity,
-               **ongoing_treatments
-         }
+         if parallel:
+            # Worker threads do not inherit the session context, so pass it along
+            cursor_factory = functools.partial(self._cursor, read_only=True,
+                                               session=self.router.current_session())
+            return self.metrics.compute_parallel(cursor_factory, execute=self._execute)
+         with self._cursor(read_only=True) as cursor:
+            return self.metrics.compute(cursor, execute=self._execute)
       except pymysql.Error as e:
          print(f"Error calculating metrics: {e}")
          return None
 
+   def _metric(self, name):
+      with self._cursor(read_only=True) as cursor:
+         return self.metrics.compute(cursor, [name], execute=self._execute)[name]
+
+   @cached(ttl=60, tables=('USER',))
    def get_average_bmi(self):
-    try:
-        query = """
-        SELECT AVG(Weight / (Height * Height)) as AverageBMI
-        FROM USER
-        WHERE Height IS NOT NULL AND Weight IS NOT NULL
-        """
-        self.cursor.execute(query)
-        return self.cursor.fetchone()
-    except pymysql.Error as e:
-        print(f"Error calculating average BMI: {e}")
-        return None
+      try:
+         return {'AverageBMI': self._metric('AverageBMI')}
+      except pymysql.Error as e:
+         print(f"Error calculating average BMI: {e}")
+         return None
 
 
+   @cached(ttl=300, tables=('PRESCRIBED_TREATMENTS', 'DISEASE'))
    def get_average_cancer_treatment_expense(self):
       try:
-         query = """
-         SELECT AVG(pt.Expense) as average 
-         FROM PRESCRIBED_TREATMENTS pt
-         JOIN DISEASE d ON pt.DiseaseID = d.DiseaseID
-         WHERE d.DiseaseName LIKE '%Cancer%'
-         """
-         self.cursor.execute(query)
-         return self.cursor.fetchone()
+         return {'average': self._metric('AverageCancerTreatmentExpense')}
       except pymysql.Error as e:
          print(f"Error calculating average cancer treatment expense: {e}")
          return None
 
    def get_max_severity_of_diseases(self):
       try:
-         query = "SELECT MAX(Severity) as MaxSeverity FROM DISEASE"
-         self.cursor.execute(query)
-         return self.cursor.fetchone()
+         return {'MaxSeverity': self._get_reference_data().max_severity()}
       except pymysql.Error as e:
          print(f"Error finding maximum severity of diseases: {e}")
          return None
 
+   @cached(ttl=30, tables=('UNDERGOING_TREATMENTS',))
    def get_total_ongoing_treatments(self):
       try:
-         query = """
-         SELECT COUNT(*) as TotalOngoingTreatments
-         FROM UNDERGOING_TREATMENTS
-         WHERE Status = 'Ongoing'
-         """
-         self.cursor.execute(query)
-         return self.cursor.fetchone()
+         return {'TotalOngoingTreatments': self._metric('TotalOngoingTreatments')}
       except pymysql.Error as e:
          print(f"Error finding total ongoing treatments: {e}")
          return None
 
 
+   # Patient Profiles
+   def get_patient_profile(self, user_id, fields=None):
+      """Full nested profile of one patient, or None if the user does not exist"""
+      return self.get_patient_profiles([user_id], fields).get(user_id)
+
+   def get_patient_profiles(self, user_ids, fields=None, batch_size=500):
+      """Nested profiles of several patients as {UserID: profile}; unknown users are left out
+
+      fields selects the optional sections (patient_profiles.SECTIONS:
+      'medical_history', 'treatments', 'test_reports', 'medications'; all by
+      default). Uncached users are loaded batch_size at a time with one
+      IN query per table (at most six per batch), never one query per user.
+      Profiles are cached per user and dropped by writes to that user.
+      """
+      sections = patient_profiles.resolve_sections(fields)
+      profiles = {}
+      missing = []
+      for user_id in dict.fromkeys(user_ids):
+         found, profile = self.profile_cache.get(patient_profiles.cache_key(user_id, sections))
+         if found:
+            profiles[user_id] = copy.deepcopy(profile)
+         else:
+            missing.append(user_id)
+
+      try:
+         for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            generations = {user_id: self.profile_cache.generation(patient_profiles.cache_tags(user_id))
+                           for user_id in batch}
+            for user_id, profile in self._load_profiles(batch, sections).items():
+               self.profile_cache.set(patient_profiles.cache_key(user_id, sections), profile, self.profile_ttl,
+                                      patient_profiles.cache_tags(user_id), generations.get(user_id))
+               profiles[user_id] = copy.deepcopy(profile)
+      except pymysql.Error as e:
+         print(f"Error loading patient profiles: {e}")
+      return profiles
+
+   def _load_profiles(self, user_ids, sections):
+      """One consistent read of every selected section for user_ids"""
+      rows = {}
+      with self._cursor(read_only=True) as cursor:
+         for section, query, params in patient_profiles.user_queries(user_ids, sections):
+            self._execute(cursor, f'profile_{section}', query, params)
+            rows[section] = cursor.fetchall()
+         if not rows['user']:
+            return {}
+
+         treatment_ids = patient_profiles.treatment_ids(rows)
+         if treatment_ids:
+            self._execute(cursor, 'profile_prescriptions', *patient_profiles.prescriptions_query(treatment_ids))
+            rows['prescriptions'] = cursor.fetchall()
+         test_ids = patient_profiles.test_ids(rows)
+         if test_ids:
+            self._execute(cursor, 'profile_test_report_bodies', *report_bodies.bodies_query(test_ids))
+            rows['test_report_bodies'] = cursor.fetchall()
+         disease_ids = patient_profiles.disease_ids(rows)
+         if 'medications' in sections and disease_ids:
+            self._execute(cursor, 'profile_medications', *patient_profiles.medications_query(disease_ids))
+            rows['medications'] = cursor.fetchall()
+      return patient_profiles.assemble(rows, sections)
+
    # Search Queries
-   def search_users_by_name_prefix(self, prefix='Jo'):
+   def find_compatible_donors(self, recipient_group, location=None, limit=20):
+      """Donors whose blood a recipient of recipient_group can receive, nearest first (Search Query)
+
+      Compatible groups come from the ABO/RhD matrix in
+      donor_matching.COMPATIBLE_DONORS. Donors are ranked by distance from
+      location (great-circle, from LOCATIONS), then identical group first and
+      O- last, then UserID. Matching runs on the in-process donor index; only
+      the PATIENT_LOOKUP_COLUMNS of the at most limit donors are read from the
+      database. Each row carries 'DistanceKm' (None when either location has
+      no coordinates). Raises ValueError for an unknown blood group.
+      """
+      try:
+         matches = self._get_donor_index().search(recipient_group, location, limit)
+         if not matches:
+            return []
+         query = (f"SELECT {queries.PATIENT_LOOKUP_COLUMNS} FROM USER "
+                  f"WHERE UserID IN ({queries.in_placeholders(matches)})")
+         with self._cursor(read_only=True) as cursor:
+            self._execute(cursor, 'compatible_donors', query, [user_id for user_id, *_ in matches])
+            users = {row['UserID']: row for row in cursor.fetchall()}
+         return [{**users[user_id], 'DistanceKm': km} for user_id, _, _, km in matches if user_id in users]
+      except pymysql.Error as e:
+         print(f"Error finding compatible donors: {e}")
+         return []
+
+   def search_users_by_name_prefix(self, prefix='Jo', limit=None, page_token=None):
       """Search for users with first name starting with a prefix (Search Query)"""
       try:
-         query = "SELECT * FROM USER WHERE FirstName LIKE %s"
-         self.cursor.execute(query, (f"{prefix}%",))
-         return self.cursor.fetchall()
+         return self._fetch_page(queries.USERS_BY_NAME_PREFIX, (f"{prefix}%",), limit, page_token)
       except pymysql.Error as e:
          print(f"Error searching users by name: {e}")
+         return queries.Page()
+
+   def search_patients_by_name(self, name, limit=20):
+      """Ranked, typo-tolerant patient lookup on first and last names (Search Query)
+
+      Every word of name must match a different first/last name word of the
+      patient: exactly, as a prefix ('jo smi') or within one or two typos
+      ('jhon smtih'). Matching runs on the in-process name index; only the
+      PATIENT_LOOKUP_COLUMNS of the at most limit matches are read from the
+      database. Each row carries its match 'Score', best first.
+      """
+      try:
+         ranked = self._get_name_index().search(name, limit)
+         if not ranked:
+            return []
+         query = (f"SELECT {queries.PATIENT_LOOKUP_COLUMNS} FROM USER "
+                  f"WHERE UserID IN ({queries.in_placeholders(ranked)})")
+         with self._cursor(read_only=True) as cursor:
+            self._execute(cursor, 'patients_by_name', query, [user_id for user_id, _ in ranked])
+            users = {row['UserID']: row for row in cursor.fetchall()}
+         return [{**users[user_id], 'Score': round(score, 4)} for user_id, score in ranked if user_id in users]
+      except pymysql.Error as e:
+         print(f"Error searching patients by name: {e}")
          return []
 
-   def search_test_reports_by_type(self, test_type='CT'):
+   def search_test_reports_by_type(self, test_type='CT', limit=None, page_token=None):
       """Search for test reports related to a specific type (Search Query)"""
       try:
-         query = """
-         SELECT tr.*
-         FROM TEST_REPORTS tr
-         WHERE tr.TestType LIKE %s
-         """
-         self.cursor.execute(query, (f"%{test_type}%",))
-         return self.cursor.fetchall()
+         return self._fetch_page(queries.TEST_REPORTS_BY_TYPE, (f"%{test_type}%",), limit, page_token)
       except pymysql.Error as e:
          print(f"Error searching test reports: {e}")
-         return []
+         return queries.Page()
+
+   def fetch_test_report_bodies(self, test_ids, batch_size=500):
+      """Report bodies of test_ids as {TestID: text}, read batch_size at a time
+
+      Listings return test report metadata only; call this for the reports
+      actually opened. Bodies travel COMPRESS()ed and are decompressed here,
+      so the wire carries the compressed size. Reports without a body are
+      left out.
+      """
+      test_ids = list(dict.fromkeys(test_ids))
+      bodies = {}
+      try:
+         with self._cursor(read_only=True) as cursor:
+            for start in range(0, len(test_ids), batch_size):
+               batch = test_ids[start:start + batch_size]
+               self._execute(cursor, 'test_report_bodies', *report_bodies.bodies_query(batch))
+               for row in cursor.fetchall():
+                  bodies[row['TestID']] = report_bodies.decompress_body(row['Body'])
+      except pymysql.Error as e:
+         print(f"Error fetching test report bodies: {e}")
+      return bodies
+
+   def attach_test_report_bodies(self, rows, batch_size=500):
+      """Set 'TestReport' on listed test report rows (e.g. one page) from one batched fetch"""
+      bodies = self.fetch_test_report_bodies([row['TestID'] for row in rows], batch_size)
+      for row in rows:
+         row['TestReport'] = bodies.get(row['TestID'])
+      return rows
 
-   def search_diseases_by_symptom(self, symptom='cough'):
-      """Search for diseases whose symptoms contain a specific word (Search Query)"""
+   def search_diseases_by_symptom(self, symptom='cough', match_all=False, limit=None, page_token=None):
+      """Search for diseases by one or more comma-separated symptoms, best matches first (Search Query)
+
+      Symptoms are matched on normalized terms ('coughing' finds 'Cough'). With
+      match_all a disease must have every symptom, otherwise any of them.
+      Pages continue after the (relevance, DiseaseID) of the previous page.
+      """
       try:
-         query = "SELECT * FROM DISEASE WHERE Symptoms LIKE %s"
-         self.cursor.execute(query, (f"%{symptom}%",))
-         return self.cursor.fetchall()
+         ranked = self._get_symptom_index().search(symptom, match_all)
+         if page_token:
+            after = queries.decode_token('diseases_by_symptom', page_token)
+            ranked = [(disease_id, score) for disease_id, score in ranked if (-score, disease_id) > after]
+         next_token = None
+         if limit is not None and len(ranked) > limit:
+            ranked = ranked[:limit]
+            next_token = queries.encode_token('diseases_by_symptom', (-ranked[-1][1], ranked[-1][0]))
+         if not ranked:
+            return queries.Page()
+
+         diseases = self._get_reference_data().diseases(disease_id for disease_id, _ in ranked)
+
+         return queries.Page([
+            {**diseases[disease_id], 'Relevance': round(score, 4)}
+            for disease_id, score in ranked if disease_id in diseases
+         ], next_token)
       except pymysql.Error as e:
          print(f"Error searching diseases by symptom: {e}")
-         return []
+         return queries.Page()
+
+   # Streaming Retrieval
+   def _stream(self, list_query, params, batch_size=1000, as_tuples=False, keyset=False):
+      """Yield rows of a listing query without materializing the whole result.
+
+      By default one query runs on an unbuffered server-side cursor (SSDictCursor,
+      or SSCursor for plain tuples) and rows are fetched batch_size at a time.
+      With keyset the result is read as a series of short queries
+      (WHERE key > last ORDER BY key LIMIT batch_size), so no connection or
+      server-side result is held open between batches.
+      """
+      if not keyset:
+         cursor_class = pymysql.cursors.SSCursor if as_tuples else pymysql.cursors.SSDictCursor
+         with self._cursor(cursor_class, read_only=True) as cursor:
+            self._execute(cursor, list_query.name, list_query.sql, params)
+            while True:
+               rows = cursor.fetchmany(batch_size)
+               if not rows:
+                  return
+               self.instrumentation.add_rows(list_query.name, len(rows))
+               yield from rows
+
+      cursor_class = pymysql.cursors.Cursor if as_tuples else pymysql.cursors.DictCursor
+      last_key = None
+      while True:
+         query, keyset_params = queries.keyset_query(list_query, last_key, batch_size)
+         with self._cursor(cursor_class, read_only=True) as cursor:
+            self._execute(cursor, list_query.name, query, (*params, *keyset_params))
+            rows = cursor.fetchall()
+            columns = [column[0] for column in cursor.description] if as_tuples else None
+         yield from rows
+         if len(rows) < batch_size:
+            return
+         last_key = queries.row_key(list_query, rows[-1], columns)
+
+   def iter_users_by_blood_group(self, blood_group='O+', batch_size=1000, as_tuples=False, keyset=False):
+      """Stream users with a specific blood group"""
+      return self._stream(queries.USERS_BY_BLOOD_GROUP, (blood_group,), batch_size, as_tuples, keyset)
+
+   def iter_users_by_ongoing_treatments(self, batch_size=1000, as_tuples=False, keyset=False):
+      """Stream users with ongoing treatments, one row per ongoing treatment"""
+      return self._stream(queries.USERS_BY_ONGOING_TREATMENTS, (), batch_size, as_tuples, keyset)
+
+   def iter_mri_test_reports(self, years=1, batch_size=1000, as_tuples=False, keyset=False):
+      """Stream MRI test reports of the last 'years' years with their users"""
+      return self._stream(queries.MRI_TEST_REPORTS, (years,), batch_size, as_tuples, keyset)
+
+   def iter_users_by_bmi_band(self, band='normal', blood_group='O+', batch_size=1000, as_tuples=False, keyset=False):
+      """Stream users of a blood group whose BMI lies in a band"""
+      low, high = queries.bmi_range(band)
+      return self._stream(queries.USERS_BY_BMI_BAND, (blood_group, low, high), batch_size, as_tuples, keyset)
+
+   def iter_users_location_by_blood_group(self, blood_group='A-', batch_size=1000, as_tuples=False, keyset=False):
+      """Stream names and locations of users with a specific blood group"""
+      return self._stream(queries.USERS_LOCATION_BY_BLOOD_GROUP, (blood_group,), batch_size, as_tuples, keyset)
+
+   def iter_users_by_name_prefix(self, prefix='Jo', batch_size=1000, as_tuples=False, keyset=False):
+      """Stream users whose first name starts with a prefix"""
+      return self._stream(queries.USERS_BY_NAME_PREFIX, (f"{prefix}%",), batch_size, as_tuples, keyset)
+
+   def iter_test_reports_by_type(self, test_type='CT', batch_size=1000, as_tuples=False, keyset=False):
+      """Stream test reports whose type contains test_type"""
+      return self._stream(queries.TEST_REPORTS_BY_TYPE, (f"%{test_type}%",), batch_size, as_tuples, keyset)
 
    # Analysis Queries
    def analyze_high_severity_treatments(self, severity_threshold=7):
       """Find number of users with ongoing treatments for high-severity diseases"""
       try:
-         query = """
-         SELECT COUNT(DISTINCT u.UserID) as UserCount
-         FROM USER u
-         JOIN UNDERGOING_TREATMENTS ut ON u.UserID = ut.UserID
-         JOIN DISEASE d ON ut.DiseaseID = d.DiseaseID
-         WHERE ut.Status = 'Ongoing' AND d.Severity > %s
-         """
-         self.cursor.execute(query, (severity_threshold,))
-         return self.cursor.fetchone()
+         with self._cursor(read_only=True) as cursor:
+            self._execute(cursor, 'high_severity_treatments', queries.HIGH_SEVERITY_TREATMENTS, (severity_threshold,))
+            return cursor.fetchone()
       except pymysql.Error as e:
          print(f"Error analyzing high severity treatments: {e}")
          return None
@@ -228,12 +615,7 @@ class MediFitCLI:
    def analyze_allopathy_treatments(self):
       """Find number of patients undergoing Allopathy treatments in the last 'years' year"""
       try:
-         query = """
-         SELECT COUNT(*) AS PatientCount
-            FROM PRESCRIBED_TREATMENTS
-            WHERE TypeOfTreatment = 'Allopathy'"""
-         self.cursor.execute(query)
-         return self.cursor.fetchone()
+         return {'PatientCount': self._get_reference_data().treatment_count('Allopathy')}
       except pymysql.Error as e:
          print(f"Error analyzing Allopathy treatments: {e}")
          return None
@@ -247,108 +629,292 @@ class MediFitCLI:
          if not blood_group:
                raise ValueError("Blood Group must be provided")
 
-         query = """
-         INSERT INTO USER 
-         (FirstName, LastName, BloodGroup, Gender, DateOfBirth, Weight, Height, Location) 
-         VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-         """
-         self.cursor.execute(query, (
-               first_name, last_name, blood_group, gender, 
-               date_of_birth, weight, height, location
-         ))
-         self.connection.commit()
-         return self.cursor.lastrowid
+         with self._cursor() as cursor:
+            self._execute(cursor, 'insert_user', queries.INSERT_USER, (
+                  first_name, last_name, blood_group, gender, 
+                  date_of_birth, weight, height, location
+            ))
+            user_id = cursor.lastrowid
+            self._apply(cursor, 'health_stats', summary_stats.user_inserted(blood_group, weight, height))
+            cursor.connection.commit()
+         self._invalidate(('USER',))
+         if self._name_index is not None:
+            self._name_index.add(user_id, first_name, last_name)
+         if self._donor_index is not None:
+            self._donor_index.add(user_id, blood_group, location)
+         return user_id
       except pymysql.Error as e:
          print(f"Error inserting new user: {e}")
-         self.connection.rollback()
          return None
 
    def insert_new_disease(self, disease_name, severity, communicability, 
-                       triggering_environment=None):
-    """Insert a new disease into the DISEASE table"""
-    try:
-        # Validate communicability (required constraint)
-        if communicability is None:
+                       triggering_environment=None, symptoms=None):
+      """Insert a new disease into the DISEASE table and index its symptoms"""
+      try:
+         # Validate communicability (required constraint)
+         if communicability is None:
             raise ValueError("Communicability must be specified")
 
-        query = """
-        INSERT INTO DISEASE 
-        (DiseaseName, Severity, Communicability, TriggeringEnvironment) 
-        VALUES (%s, %s, %s, %s)
-        """
-        self.cursor.execute(query, (
-            disease_name, severity, communicability, 
-            triggering_environment
-        ))
-        disease_id = self.cursor.lastrowid
-        self.connection.commit()
-        return disease_id
-    except pymysql.Error as e:
-        print(f"Error inserting new disease: {e}")
-        self.connection.rollback()
-        return None
+         with self._cursor() as cursor:
+            self._execute(cursor, 'insert_disease', queries.INSERT_DISEASE, (
+               disease_name, severity, communicability, 
+               triggering_environment, symptoms
+            ))
+            disease_id = cursor.lastrowid
+
+            terms = tokenize(symptoms)
+            if terms:
+               self.instrumentation.executemany(
+                  cursor, 'insert_disease_symptoms', queries.INSERT_DISEASE_SYMPTOM,
+                  [(term[:50], disease_id) for term in terms]
+               )
+            cursor.connection.commit()
+
+         self._invalidate(('DISEASE',))
+         if self._symptom_index is not None:
+            self._symptom_index.add(disease_id, symptoms)
+         return disease_id
+      except pymysql.Error as e:
+         print(f"Error inserting new disease: {e}")
+         return None
 
    def update_user_weight(self, user_id, new_weight):
-      """Update the weight of a user"""
+      """Update the weight of a user and return the recomputed BMI (None if the update failed)"""
       try:
-         # Update weight
-         update_query = """
-         UPDATE USER 
-         SET Weight = %s 
-         WHERE UserID = %s
-         """
-         self.cursor.execute(update_query, (new_weight, user_id))
-         self.connection.commit()
-         return True
+         with self._cursor() as cursor:
+            self._execute(cursor, 'lock_user', queries.LOCK_USER, (user_id,))
+            user = cursor.fetchone()
+            if user is None:
+               print(f"User {user_id} not found.")
+               return None
+
+            # Update weight
+            self._execute(cursor, 'update_user_weight', queries.UPDATE_USER_WEIGHT, (new_weight, user_id))
+            self._apply(cursor, 'health_stats', summary_stats.user_weight_changed(
+               user['BloodGroup'], user['Weight'], new_weight, user['Height']
+            ))
+            self._execute(cursor, 'user_bmi', queries.USER_BMI, (user_id,))
+            bmi = cursor.fetchone()['BMI']
+            cursor.connection.commit()
+         self._invalidate(('USER',), (user_id,))
+         return bmi
       except pymysql.Error as e:
          print(f"Error updating user weight: {e}")
-         self.connection.rollback()
-         return False
+         return None
 
    def update_treatment_status(self, user_id, treatment_id, new_status='Completed'):
       """Update the status of a treatment"""
       try:
-         query = """
-         UPDATE UNDERGOING_TREATMENTS 
-         SET Status = %s 
-         WHERE UserID = %s AND TreatmentID = %s
-         """
-         self.cursor.execute(query, (new_status, user_id, treatment_id))
-         self.connection.commit()
+         with self._cursor() as cursor:
+            self._execute(cursor, 'lock_treatment', queries.LOCK_TREATMENT, (user_id, treatment_id))
+            treatment = cursor.fetchone()
+            self._execute(cursor, 'update_treatment_status', queries.UPDATE_TREATMENT_STATUS,
+                          (new_status, user_id, treatment_id))
+            if treatment is not None:
+               self._apply(cursor, 'health_stats', summary_stats.treatment_status_changed(
+                  treatment['Status'], new_status
+               ))
+            cursor.connection.commit()
+         self._invalidate(('UNDERGOING_TREATMENTS',), (user_id,))
       except pymysql.Error as e:
          print(f"Error updating treatment status: {e}")
-         self.connection.rollback()
+
+   # Batched Modification Methods
+   def update_treatment_statuses(self, changes, chunk_size=500):
+      """Update many treatment statuses in one transaction, chunk_size rows per statement
+
+      changes is an iterable of (user_id, treatment_id, status). Returns one
+      dict per change, in input order, whose Outcome is 'updated',
+      'unchanged', 'not_found', 'invalid' (bad ids or unknown status) or
+      'superseded' (a later change to the same treatment wins). Nothing is
+      written on a database error, and None is returned.
+      """
+      changes = list(changes)
+      outcomes = [None] * len(changes)
+      latest = {}
+      for position, (user_id, treatment_id, status) in enumerate(changes):
+         try:
+            key = (int(user_id), int(treatment_id))
+         except (TypeError, ValueError):
+            key = None
+         if key is None or status not in TREATMENT_STATUSES:
+            outcomes[position] = 'invalid'
+            continue
+         if key in latest:
+            outcomes[latest[key]] = 'superseded'
+         latest[key] = position
+
+      # Rows are locked in key order so concurrent batches cannot deadlock
+      keys = sorted(latest)
+      try:
+         with self._cursor() as cursor:
+            transitions = []
+            for start in range(0, len(keys), chunk_size):
+               chunk = keys[start:start + chunk_size]
+               self._execute(cursor, 'lock_treatments', queries.lock_treatments(len(chunk)),
+                             [value for key in chunk for value in key])
+               current = {(row['UserID'], row['TreatmentID']): row['Status'] for row in cursor.fetchall()}
+
+               updates = []
+               for key in chunk:
+                  position = latest[key]
+                  new_status = changes[position][2]
+                  if key not in current:
+                     outcomes[position] = 'not_found'
+                  elif current[key] == new_status:
+                     outcomes[position] = 'unchanged'
+                  else:
+                     outcomes[position] = 'updated'
+                     updates.extend((*key, new_status))
+                     transitions.append((current[key], new_status))
+               if updates:
+                  self._execute(cursor, 'update_treatment_statuses',
+                                queries.update_treatment_statuses(len(updates) // 3), updates)
+
+            self._apply(cursor, 'health_stats', summary_stats.treatment_statuses_changed(transitions))
+            cursor.connection.commit()
+         if transitions:
+            self._invalidate(('UNDERGOING_TREATMENTS',),
+                             {key[0] for key, position in latest.items() if outcomes[position] == 'updated'})
+      except pymysql.Error as e:
+         print(f"Error updating treatment statuses: {e}")
+         return None
+
+      return [
+         {'UserID': user_id, 'TreatmentID': treatment_id, 'Status': status, 'Outcome': outcome}
+         for (user_id, treatment_id, status), outcome in zip(changes, outcomes)
+      ]
+
+   def update_user_weights(self, changes, chunk_size=500):
+      """Update many user weights in one transaction, chunk_size rows per statement
+
+      changes is an iterable of (user_id, new_weight). Returns one dict per
+      change, in input order, whose Outcome is 'updated', 'unchanged',
+      'not_found', 'invalid' (bad id, or a weight outside DECIMAL(5,2)) or
+      'superseded'. Nothing is written on a database error, and None is
+      returned.
+      """
+      changes = list(changes)
+      outcomes = [None] * len(changes)
+      latest = {}
+      weights = {}
+      for position, (user_id, new_weight) in enumerate(changes):
+         try:
+            user_id = int(user_id)
+            weight = Decimal(str(new_weight)).quantize(Decimal('0.01'))
+         except (TypeError, ValueError, InvalidOperation):
+            weight = None
+         if weight is None or not weight.is_finite() or not 0 < weight < 1000:
+            outcomes[position] = 'invalid'
+            continue
+         if user_id in latest:
+            outcomes[latest[user_id]] = 'superseded'
+         latest[user_id] = position
+         weights[user_id] = weight
+
+      user_ids = sorted(latest)
+      try:
+         with self._cursor() as cursor:
+            updated = False
+            for start in range(0, len(user_ids), chunk_size):
+               chunk = user_ids[start:start + chunk_size]
+               self._execute(cursor, 'lock_users', queries.lock_users(len(chunk)), chunk)
+               current = {row['UserID']: row['Weight'] for row in cursor.fetchall()}
+
+               changed = []
+               for user_id in chunk:
+                  if user_id not in current:
+                     outcomes[latest[user_id]] = 'not_found'
+                  elif current[user_id] == weights[user_id]:
+                     outcomes[latest[user_id]] = 'unchanged'
+                  else:
+                     outcomes[latest[user_id]] = 'updated'
+                     changed.append(user_id)
+               if not changed:
+                  continue
+
+               # Swap the users' BMI contributions around the update so HEALTH_STATS stays exact
+               self._apply(cursor, 'health_stats', summary_stats.users_bmi_removed(changed))
+               self._execute(cursor, 'update_user_weights', queries.update_user_weights(len(changed)),
+                             [value for user_id in changed for value in (user_id, weights[user_id])])
+               self._apply(cursor, 'health_stats', summary_stats.users_bmi_added(changed))
+               updated = True
+            cursor.connection.commit()
+         if updated:
+            self._invalidate(('USER',),
+                             [user_id for user_id, position in latest.items() if outcomes[position] == 'updated'])
+      except pymysql.Error as e:
+         print(f"Error updating user weights: {e}")
+         return None
+
+      return [
+         {'UserID': user_id, 'Weight': new_weight, 'Outcome': outcome}
+         for (user_id, new_weight), outcome in zip(changes, outcomes)
+      ]
 
    def delete_medication(self, medication_id):
-      """Delete a discontinued/banned medication and inform affected users"""
+      """Delete a discontinued/banned medication and queue recall notifications for affected users
+
+      In one short transaction the affected users are copied server-side into
+      the MEDICATION_RECALL_NOTIFICATIONS outbox and the medication is deleted;
+      recall_worker.py delivers the notifications later. Returns the number of
+      users queued, or None if the medication does not exist or the delete failed.
+      """
       try:
-         # Find affected users
-         user_query = """
-         SELECT DISTINCT u.UserID, u.FirstName, u.LastName
-         FROM USER u
-         JOIN UNDERGOING_TREATMENTS ut ON u.UserID = ut.UserID
-         JOIN PRESCRIBED_TREATMENTS pt ON ut.TreatmentID = pt.TreatmentID
-         JOIN MEDICATION m ON pt.DiseaseID = m.DiseaseID
-         WHERE m.MedicationID = %s
-         """
-         self.cursor.execute(user_query, (medication_id,))
-         affected_users = self.cursor.fetchall()
-
-         # Delete medication
-         delete_query = "DELETE FROM MEDICATION WHERE MedicationID = %s"
-         self.cursor.execute(delete_query, (medication_id,))
-         
-         self.connection.commit()
-         
-         # Return list of affected users for potential notification
-         return affected_users
+         with self._cursor() as cursor:
+            self._execute(cursor, 'lock_medication', queries.LOCK_MEDICATION, (medication_id,))
+            if cursor.fetchone() is None:
+               print(f"Medication {medication_id} not found.")
+               return None
+
+            self._execute(cursor, 'queue_recall_notifications', queries.QUEUE_RECALL_NOTIFICATIONS,
+                          (medication_id,))
+            queued = cursor.rowcount
+            self._execute(cursor, 'delete_medication', queries.DELETE_MEDICATION, (medication_id,))
+            cursor.connection.commit()
+         self._invalidate(('MEDICATION',))
+         return queued
       except pymysql.Error as e:
          print(f"Error deleting medication: {e}")
-         self.connection.rollback()
-         return []
+         return None
+
+CLI_PAGE_SIZE = 20
+
+def paged(fetch_page):
+   """Yield rows of a paginated method page by page, asking before fetching the next page"""
+   page_token = None
+   while True:
+      page = fetch_page(page_token)
+      yield from page
+      page_token = page.next_token
+      if not page_token:
+         return
+      if input("-- More results: press Enter to continue, q to stop -- ").strip().lower() == 'q':
+         return
+
+def settings_from_env(environ=os.environ):
+   """MediFitCLI keyword arguments from MEDIFIT_* environment variables.
+
+   MEDIFIT_HOST, MEDIFIT_PORT, MEDIFIT_USER, MEDIFIT_PASSWORD and
+   MEDIFIT_DATABASE configure the primary; MEDIFIT_REPLICAS is a comma
+   separated list of host[:port] replicas and MEDIFIT_READ_YOUR_WRITES_WINDOW
+   the seconds reads stay on the primary after a write.
+   """
+   settings = {}
+   for name in ('host', 'user', 'password', 'database'):
+      if f'MEDIFIT_{name.upper()}' in environ:
+         settings[name] = environ[f'MEDIFIT_{name.upper()}']
+   if 'MEDIFIT_PORT' in environ:
+      settings['port'] = int(environ['MEDIFIT_PORT'])
+   if environ.get('MEDIFIT_REPLICAS'):
+      settings['replicas'] = [endpoint.strip() for endpoint in environ['MEDIFIT_REPLICAS'].split(',')
+                              if endpoint.strip()]
+   if 'MEDIFIT_READ_YOUR_WRITES_WINDOW' in environ:
+      settings['read_your_writes_window'] = float(environ['MEDIFIT_READ_YOUR_WRITES_WINDOW'])
+   return settings
 
 def main():
-   cli = MediFitCLI()
+   cli = MediFitCLI(**settings_from_env())
 
    while True:
         print("\n--- MediFit Healthcare Management System ---")
@@ -373,6 +939,10 @@ def main():
         print("18. Delete Medication")
         print("19. Calculate Maximum Severity of Diseases")
         print("20. Total Ongoing Treatments")
+        print("21. Show Query Statistics")
+        print("22. Retrieve Users by BMI Band")
+        print("23. Find Patients by Name")
+        print("24. Find Compatible Blood Donors")
         print("0. Exit")
 
         try:
@@ -380,57 +950,58 @@ def main():
 
             if choice == 1:
                 blood_group = input("Enter Blood Group (default O+): ") or 'O+'
-                results = cli.retrieve_users_by_blood_group(blood_group)
+                results = paged(lambda token: cli.retrieve_users_by_blood_group(blood_group, CLI_PAGE_SIZE, token))
                 print(f"\nUsers with {blood_group} Blood Group:")
                 for user in results:
                     print(f"Name: {user['FirstName']} {user['LastName']}, Location: {user.get('Location', 'N/A')}")
 
             elif choice == 2:
-                results = cli.retrieve_users_by_ongoing_treatments()
+                results = paged(lambda token: cli.retrieve_users_by_ongoing_treatments(CLI_PAGE_SIZE, token))
                 print("\nUsers with Ongoing Treatments:")
                 for user in results:
                     print(f"Name: {user['FirstName']} {user['LastName']}, UserID: {user['UserID']}")
 
             elif choice == 3:
                 years = input("Enter years for MRI reports (default 1): ") or 1
-                results = cli.retrieve_mri_test_reports(int(years))
+                results = paged(lambda token: cli.retrieve_mri_test_reports(int(years), CLI_PAGE_SIZE, token))
                 print(f"\nMRI Test Reports in the last {years} year(s):")
                 for report in results:
-                    print(f"Name: {report['FirstName']} {report['LastName']}, Test Time: {report['TimeOfTest']}")
+                    print(f"Name: {report['FirstName']} {report['LastName']}, Test Time: {report['TestDate']}")
 
             elif choice == 4:
                 blood_group = input("Enter Blood Group (default A-): ") or 'A-'
-                results = cli.retrieve_users_location_by_blood_group(blood_group)
+                results = paged(lambda token: cli.retrieve_users_location_by_blood_group(blood_group, CLI_PAGE_SIZE, token))
                 print(f"\nUsers with {blood_group} Blood Group Locations:")
                 for user in results:
                     print(f"Name: {user['FirstName']} {user['LastName']}, Location: {user['Location']}")
 
             elif choice == 5:
-                results = cli.retrieve_allopathy_diseases()
+                results = paged(lambda token: cli.retrieve_allopathy_diseases(CLI_PAGE_SIZE, token))
                 print("\nAllopathy Diseases:")
                 for disease in results:
                     print(f"{disease['DiseaseName']}")
 
             elif choice == 6:
                 prefix = input("Enter name prefix (default 'Jo'): ") or 'Jo'
-                results = cli.search_users_by_name_prefix(prefix)
+                results = paged(lambda token: cli.search_users_by_name_prefix(prefix, CLI_PAGE_SIZE, token))
                 print(f"\nUsers with Name Prefix '{prefix}':")
                 for user in results:
                     print(f"Name: {user['FirstName']} {user['LastName']}")
 
             elif choice == 7:
                 test_type = input("Enter test type (default 'CT'): ") or 'CT'
-                results = cli.search_test_reports_by_type(test_type)
+                results = paged(lambda token: cli.search_test_reports_by_type(test_type, CLI_PAGE_SIZE, token))
                 print(f"\nTest Reports of Type '{test_type}':")
                 for report in results:
                     print(f"Test ID: {report['TestID']}, Type: {report['TestType']}")
 
             elif choice == 8:
-                symptom = input("Enter symptom to search (default 'cough'): ") or 'cough'
-                results = cli.search_diseases_by_symptom(symptom)
+                symptom = input("Enter symptoms to search, comma separated (default 'cough'): ") or 'cough'
+                match_all = (input("Require all symptoms? (y/N): ") or 'n').lower().startswith('y')
+                results = paged(lambda token: cli.search_diseases_by_symptom(symptom, match_all, CLI_PAGE_SIZE, token))
                 print(f"\nDiseases with '{symptom}' Symptom:")
                 for disease in results:
-                    print(f"Disease: {disease['DiseaseName']}, Severity: {disease['Severity']}")
+                    print(f"Disease: {disease['DiseaseName']}, Severity: {disease['Severity']}, Relevance: {disease['Relevance']}")
 
             elif choice == 9:
                 metrics = cli.calculate_comprehensive_metrics()
@@ -481,9 +1052,10 @@ def main():
                severity = int(input("Enter Severity (1-10): "))
                communicability = input("Enter Communicability (Low/Medium/High): ")
                triggering_env = input("Enter Triggering Environment (optional): ") or None
+               symptoms = input("Enter Symptoms, comma separated (optional): ") or None
 
                disease_id = cli.insert_new_disease(
-                  disease_name, severity, communicability, triggering_env
+                  disease_name, severity, communicability, triggering_env, symptoms
                )
                if disease_id:
                   print(f"New disease added with DiseaseID: {disease_id}")
@@ -506,13 +1078,11 @@ def main():
 
             elif choice == 18:
                medication_id = int(input("Enter Medication ID: "))
-               affected_users = cli.delete_medication(medication_id)
-               if affected_users:
-                  print("Affected Users:")
-                  for user in affected_users:
-                        print(f"Name: {user['FirstName']} {user['LastName']}")
+               queued = cli.delete_medication(medication_id)
+               if queued is not None:
+                  print(f"Medication deleted. Recall notifications queued for {queued} affected user(s).")
                else:
-                  print("No users were affected or an error occurred.")
+                  print("Medication was not deleted.")
 
             elif choice == 19:
                max_severity = cli.get_max_severity_of_diseases()
@@ -528,6 +1098,44 @@ def main():
                else:
                   print("Error retrieving ongoing treatments.")
 
+            elif choice == 21:
+               print(f"\n{'Query':40} {'Calls':>7} {'Errors':>7} {'Rows':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+               for name, stats in cli.stats().items():
+                  print(f"{name:40} {stats['calls']:>7} {stats['errors']:>7} {stats['rows']:>9} "
+                        f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+               for entry in cli.slow_queries():
+                  print(f"Slow: {entry['name']} took {entry['seconds']}s")
+               print(f"Routing: {cli.routing_stats()}")
+
+            elif choice == 22:
+               band = input("Enter BMI band (underweight/normal/overweight/obese, default normal): ") or 'normal'
+               blood_group = input("Enter Blood Group (default O+): ") or 'O+'
+               results = paged(lambda token: cli.retrieve_users_by_bmi_band(band, blood_group, CLI_PAGE_SIZE, token))
+               print(f"\n{band.capitalize()} BMI users with {blood_group} Blood Group:")
+               for user in results:
+                  print(f"Name: {user['FirstName']} {user['LastName']}, BMI: {user['BMI']}")
+
+            elif choice == 23:
+               name = input("Enter patient name (partial or misspelled is fine): ")
+               print(f"\nPatients matching '{name}':")
+               for user in cli.search_patients_by_name(name):
+                  print(f"UserID: {user['UserID']}, Name: {user['FirstName']} {user['LastName']}, "
+                        f"Date of Birth: {user['DateOfBirth']}, Location: {user['Location']}")
+
+            elif choice == 24:
+               recipient_group = input("Enter recipient Blood Group (default O+): ") or 'O+'
+               location = input("Enter hospital location (e.g. 'Chicago'): ") or None
+               try:
+                  donors = cli.find_compatible_donors(recipient_group, location)
+               except ValueError as e:
+                  print(e)
+                  continue
+               print(f"\nDonors for a {recipient_group} recipient near {location or 'any location'}:")
+               for donor in donors:
+                  distance = f"{donor['DistanceKm']} km" if donor['DistanceKm'] is not None else "unknown distance"
+                  print(f"UserID: {donor['UserID']}, Name: {donor['FirstName']} {donor['LastName']}, "
+                        f"Blood Group: {donor['BloodGroup']}, Location: {donor['Location']} ({distance})")
+
             elif choice == 0:
                   print("Exiting...")
                   cli.close_connection()
@@ -0,0 +1,102 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# One aggregate metric: ``expression`` is evaluated over ``source`` (a FROM
+# clause) filtered by ``where``. Metrics sharing the same source and filter are
+# computed by the same scan.
+Metric = namedtuple('Metric', 'name source expression where')
+Metric.__new__.__defaults__ = (None,)
+
+def _stat(column, dimension, value=None):
+    """Sum of one HEALTH_STATS column over a dimension (optionally one value of it)"""
+    condition = f"Dimension = '{dimension}'"
+    if value is not None:
+        condition += f" AND DimValue = '{value}'"
+    return f"SUM(CASE WHEN {condition} THEN {column} END)"
+
+# BMI and the treatment counts read the small, incrementally maintained
+# HEALTH_STATS table (see summary_stats.py) instead of scanning base tables
+HEALTH_METRICS = [
+    Metric("AverageBMI", "HEALTH_STATS",
+           f"{_stat('BmiSum', 'blood_group')} / NULLIF({_stat('BmiCount', 'blood_group')}, 0)"),
+    Metric("AverageCancerTreatmentExpense",
+           "PRESCRIBED_TREATMENTS pt JOIN DISEASE d ON pt.DiseaseID = d.DiseaseID",
+           "AVG(pt.Expense)", "d.DiseaseName LIKE '%Cancer%'"),
+    Metric("MaxDiseaseSeverity", "DISEASE", "MAX(Severity)"),
+    Metric("TotalOngoingTreatments", "HEALTH_STATS",
+           f"CAST(COALESCE({_stat('RowCount', 'treatment_status', 'Ongoing')}, 0) AS SIGNED)"),
+    Metric("AllopathyTreatmentCount", "HEALTH_STATS",
+           f"CAST(COALESCE({_stat('RowCount', 'treatment_type', 'Allopathy')}, 0) AS SIGNED)"),
+]
+
+
+def _execute(cursor, name, query):
+    cursor.execute(query)
+
+
+class MetricsEngine:
+    """Plans declared metrics into as few scans and round trips as possible
+
+    Metrics over the same source and filter become one multi-aggregate SELECT.
+    ``compute`` cross-joins those single-row SELECTs into one statement (one
+    round trip); ``compute_parallel`` runs each of them on its own connection
+    at the same time. Both accept an ``execute(cursor, name, query)`` hook so
+    the caller can route the statements through its own execution layer.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = {metric.name: metric for metric in metrics}
+
+    def plan(self, names=None):
+        """Group the requested metrics into [(source, where, [metrics])] scans"""
+        groups = {}
+        for name in names or self.metrics:
+            metric = self.metrics[name]
+            groups.setdefault((metric.source, metric.where), []).append(metric)
+        return [(source, where, metrics) for (source, where), metrics in groups.items()]
+
+    @staticmethod
+    def group_query(source, where, metrics):
+        expressions = ", ".join(f"{metric.expression} AS {metric.name}" for metric in metrics)
+        query = f"SELECT {expressions} FROM {source}"
+        if where:
+            query += f" WHERE {where}"
+        return query
+
+    def build_query(self, names=None):
+        """One statement returning every requested metric as a single row"""
+        groups = self.plan(names)
+        if len(groups) == 1:
+            return self.group_query(*groups[0])
+        derived = " CROSS JOIN ".join(
+            f"({self.group_query(*group)}) AS g{position}"
+            for position, group in enumerate(groups)
+        )
+        return f"SELECT * FROM {derived}"
+
+    @staticmethod
+    def query_name(names=None):
+        """Name under which a set of metrics is executed and instrumented"""
+        return "metrics:" + "+".join(names) if names else "metrics"
+
+    def compute(self, cursor, names=None, execute=None):
+        """Compute the metrics in a single round trip on a DictCursor"""
+        (execute or _execute)(cursor, self.query_name(names), self.build_query(names))
+        row = cursor.fetchone()
+        return {name: row[name] for name in names or self.metrics}
+
+    def compute_parallel(self, cursor_factory, names=None, max_workers=None, execute=None):
+        """Run each planned scan concurrently; ``cursor_factory`` yields a DictCursor context"""
+        groups = self.plan(names)
+
+        def run(group):
+            with cursor_factory() as cursor:
+                (execute or _execute)(cursor, self.query_name([metric.name for metric in group[2]]),
+                                      self.group_query(*group))
+                return cursor.fetchone()
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers or len(groups)) as executor:
+            for row in executor.map(run, groups):
+                results.update(row)
+        return {name: results[name] for name in names or self.metrics}
@@ -0,0 +1,188 @@
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+
+NAMES_QUERY = "SELECT UserID, FirstName, LastName FROM USER"
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Score of one query term by how it matched a name token; typo matches lose
+# TYPO_PENALTY per edit
+EXACT, PREFIX, TYPO = 3.0, 2.0, 1.5
+TYPO_PENALTY = 0.5
+
+
+def name_tokens(text):
+    """Lowercased, accent-free words of a name ('José-Luis' -> ['jose', 'luis'])"""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return _WORD.findall(text.lower())
+
+
+def _trigrams(token):
+    padded = f"^{token}$"
+    return {padded[position:position + 3] for position in range(len(padded) - 2)}
+
+
+def _deletions(token):
+    """The token and every variant with one character deleted"""
+    return {token} | {token[:position] + token[position + 1:] for position in range(len(token))}
+
+
+def max_edits(term):
+    """Typos tolerated in a query term: none below 3 letters, 1 up to 5, then 2"""
+    if len(term) < 3:
+        return 0
+    return 1 if len(term) <= 5 else 2
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps count once), or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _best_assignment(options, used=frozenset()):
+    """Highest total score matching each term to a different token, or None if impossible
+
+    ``options`` holds one {token: score} per term. Queries have a few terms
+    and names a few tokens, so every assignment is tried.
+    """
+    if not options:
+        return 0.0
+    best = None
+    for token, score in options[0].items():
+        if token in used:
+            continue
+        rest = _best_assignment(options[1:], used | {token})
+        if rest is not None and (best is None or score + rest > best):
+            best = score + rest
+    return best
+
+
+class NameIndex:
+    """In-process index of patient first and last names
+
+    Distinct name tokens are kept sorted, so a prefix is one binary search
+    (a flattened trie). Misspelled terms are only compared with candidate
+    tokens: those sharing enough character trigrams with the term, and those
+    one deletion away from one of its own one-deletion variants, which
+    catches the single typos and swapped letters short names share no
+    trigram with.
+
+    Every query term must match a different name token of the user, exactly,
+    as a prefix or within ``max_edits`` typos of the token or its prefix.
+    """
+
+    def __init__(self):
+        self._tokens = []  # sorted distinct name tokens
+        self._users_by_token = {}  # token -> set of UserIDs
+        self._tokens_by_trigram = {}  # trigram -> set of tokens
+        self._tokens_by_deletion = {}  # token or one-deletion variant -> set of tokens
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build an index from (UserID, FirstName, LastName) rows fetched as dicts"""
+        index = cls()
+        for row in rows:
+            index._add(row['UserID'], row['FirstName'], row['LastName'], keep_sorted=False)
+        # New tokens were appended unsorted; one sort instead of an insort each
+        index._tokens.sort()
+        return index
+
+    def add(self, user_id, first_name, last_name):
+        """Index the name of a newly inserted user"""
+        with self._lock:
+            self._add(user_id, first_name, last_name)
+
+    def _add(self, user_id, first_name, last_name, keep_sorted=True):
+        for token in name_tokens(first_name) + name_tokens(last_name):
+            users = self._users_by_token.get(token)
+            if users is None:
+                users = self._users_by_token[token] = set()
+                if keep_sorted:
+                    bisect.insort(self._tokens, token)
+                else:
+                    self._tokens.append(token)
+                for trigram in _trigrams(token):
+                    self._tokens_by_trigram.setdefault(trigram, set()).add(token)
+                for variant in _deletions(token):
+                    self._tokens_by_deletion.setdefault(variant, set()).add(token)
+            users.add(user_id)
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def _term_matches(self, term):
+        """{token: score} of the name tokens a query term matches"""
+        matches = {}
+        tokens = self._tokens
+        position = bisect.bisect_left(tokens, term)
+        # Walk the prefix range in place; slicing would copy the rest of the list
+        while position < len(tokens) and tokens[position].startswith(term):
+            token = tokens[position]
+            # Shorter completions rank first ('jo' prefers 'jon' to 'jonathan')
+            matches[token] = EXACT if token == term else PREFIX + len(term) / len(token) / 2
+            position += 1
+
+        limit = max_edits(term)
+        if limit:
+            # Each edit destroys at most three trigrams
+            trigrams = _trigrams(term)
+            shared = {}
+            for trigram in trigrams:
+                for token in self._tokens_by_trigram.get(trigram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            needed = max(1, len(trigrams) - 3 * limit)
+            candidates = {token for token, count in shared.items() if count >= needed}
+            for variant in _deletions(term):
+                candidates.update(self._tokens_by_deletion.get(variant, ()))
+            for token in candidates:
+                if token in matches:
+                    continue
+                # The term may be a misspelled prefix of a longer name ('smtih' for 'smithson')
+                distance = min(edit_distance(term, token, limit),
+                               edit_distance(term, token[:len(term)], limit))
+                if distance <= limit:
+                    matches[token] = TYPO - TYPO_PENALTY * distance
+        return matches
+
+    def search(self, name, limit=20):
+        """Return [(UserID, score)] for users matching every term of ``name``, best first"""
+        terms = name_tokens(name)
+        if not terms:
+            return []
+        with self._lock:
+            # Per term, {UserID: {token: score}} of every token of the user it matches
+            options = []
+            for term in terms:
+                term_options = {}
+                for token, score in self._term_matches(term).items():
+                    for user_id in self._users_by_token[token]:
+                        term_options.setdefault(user_id, {})[token] = score
+                if not term_options:
+                    return []
+                options.append(term_options)
+        # A token taken by one term may leave another term only its second-best
+        # match ('john jo' for John Johnson), so score whole assignments
+        scores = {}
+        for user_id in set(options[0]).intersection(*options[1:]):
+            score = _best_assignment([term_options[user_id] for term_options in options])
+            if score is not None:
+                scores[user_id] = score
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,122 @@
+import queries
+import report_bodies
+
+# Optional parts of a profile; the USER row itself is always included.
+# Medications are listed per treatment, so selecting them loads treatments too.
+SECTIONS = ('medical_history', 'treatments', 'test_reports', 'medications')
+
+
+def resolve_sections(fields=None):
+    """Validate a field selection and return the set of sections to load"""
+    if fields is None:
+        return set(SECTIONS)
+    sections = set(fields)
+    unknown = sections - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown profile fields: {', '.join(sorted(unknown))} "
+                         f"(expected any of {', '.join(SECTIONS)})")
+    if 'medications' in sections:
+        sections.add('treatments')
+    return sections
+
+
+def user_queries(user_ids, sections):
+    """[(section, sql, params)] for the tables keyed directly by UserID"""
+    placeholders = queries.in_placeholders(user_ids)
+    params = tuple(user_ids)
+    statements = [('user', f"SELECT * FROM USER WHERE UserID IN ({placeholders})", params)]
+    if 'medical_history' in sections:
+        statements.append(('medical_history',
+                           f"SELECT * FROM MEDICAL_HISTORY WHERE UserID IN ({placeholders})", params))
+    if 'treatments' in sections:
+        statements.append(('treatments', f"""
+            SELECT ut.*, d.DiseaseName, d.Severity
+            FROM UNDERGOING_TREATMENTS ut
+            LEFT JOIN DISEASE d ON d.DiseaseID = ut.DiseaseID
+            WHERE ut.UserID IN ({placeholders})
+            ORDER BY ut.UserID, ut.TreatmentID
+        """, params))
+    if 'test_reports' in sections:
+        statements.append(('test_reports', f"""
+            SELECT {queries.TEST_REPORT_COLUMNS} FROM TEST_REPORTS tr
+            WHERE UserID IN ({placeholders})
+            ORDER BY UserID, TestDate DESC, TestID DESC
+        """, params))
+    return statements
+
+
+def prescriptions_query(treatment_ids):
+    return (f"SELECT * FROM PRESCRIBED_TREATMENTS WHERE TreatmentID IN ({queries.in_placeholders(treatment_ids)})",
+            tuple(treatment_ids))
+
+
+def medications_query(disease_ids):
+    return (f"""
+        SELECT * FROM MEDICATION
+        WHERE DiseaseID IN ({queries.in_placeholders(disease_ids)})
+        ORDER BY DiseaseID, MedicationID
+    """, tuple(disease_ids))
+
+
+def test_ids(rows):
+    return [row['TestID'] for row in rows.get('test_reports', ())]
+
+
+def treatment_ids(rows):
+    return sorted({row['TreatmentID'] for row in rows.get('treatments', ()) if row['TreatmentID'] is not None})
+
+
+def disease_ids(rows):
+    return sorted({row['DiseaseID'] for row in rows.get('treatments', ()) if row['DiseaseID'] is not None})
+
+
+def assemble(rows, sections):
+    """Nest the rows loaded per section into {UserID: profile}.
+
+    A profile is the USER row plus, as selected, 'MedicalHistory' (a row or
+    None), 'Treatments' (each with its 'Prescription' and, with medications,
+    'Medications') and 'TestReports' (newest first, each with its decompressed
+    'TestReport' body or None).
+    """
+    profiles = {row['UserID']: dict(row) for row in rows['user']}
+    for profile in profiles.values():
+        if 'medical_history' in sections:
+            profile['MedicalHistory'] = None
+        if 'treatments' in sections:
+            profile['Treatments'] = []
+        if 'test_reports' in sections:
+            profile['TestReports'] = []
+
+    for row in rows.get('medical_history', ()):
+        if row['UserID'] in profiles:
+            profiles[row['UserID']]['MedicalHistory'] = row
+
+    prescriptions = {row['TreatmentID']: row for row in rows.get('prescriptions', ())}
+    medications = {}
+    for row in rows.get('medications', ()):
+        medications.setdefault(row['DiseaseID'], []).append(row)
+    for row in rows.get('treatments', ()):
+        if row['UserID'] not in profiles:
+            continue
+        treatment = dict(row)
+        treatment['Prescription'] = prescriptions.get(row['TreatmentID'])
+        if 'medications' in sections:
+            treatment['Medications'] = list(medications.get(row['DiseaseID'], ()))
+        profiles[row['UserID']]['Treatments'].append(treatment)
+
+    bodies = {row['TestID']: row['Body'] for row in rows.get('test_report_bodies', ())}
+    for row in rows.get('test_reports', ()):
+        if row['UserID'] in profiles:
+            report = dict(row)
+            report['TestReport'] = report_bodies.decompress_body(bodies.get(row['TestID']))
+            profiles[row['UserID']]['TestReports'].append(report)
+    return profiles
+
+
+def cache_key(user_id, sections):
+    return ('patient_profile', user_id, tuple(sorted(sections)))
+
+
+def cache_tags(user_id):
+    """A profile depends on its user's rows and on the shared catalog tables"""
+    return (f"user:{user_id}", 'PRESCRIBED_TREATMENTS', 'MEDICATION', 'DISEASE')
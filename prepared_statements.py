@@ -0,0 +1,137 @@
+import threading
+import weakref
+
+import pymysql
+
+import queries
+
+# Server error when EXECUTE names a statement this session never prepared
+ER_UNKNOWN_STMT_HANDLER = 1243
+
+# Statements run on every request with the same text and only their parameters
+# changing. IN-list and batched statements change text with their input, and
+# would prepare a new statement per list length, so they stay on the text protocol.
+PREPARED_QUERIES = frozenset({
+    queries.USERS_BY_BLOOD_GROUP.name,
+    queries.USERS_BY_ONGOING_TREATMENTS.name,
+    queries.MRI_TEST_REPORTS.name,
+    queries.USERS_BY_BMI_BAND.name,
+    queries.USERS_LOCATION_BY_BLOOD_GROUP.name,
+    queries.USERS_BY_NAME_PREFIX.name,
+    queries.TEST_REPORTS_BY_TYPE.name,
+    "high_severity_treatments",
+    "insert_user",
+    "insert_disease",
+    "lock_user",
+    "update_user_weight",
+    "user_bmi",
+    "lock_treatment",
+    "update_treatment_status",
+    "lock_medication",
+    "queue_recall_notifications",
+    "delete_medication",
+})
+
+
+class PreparedStatement:
+    """One registered statement: its SQL, server-side handle and EXECUTE text"""
+
+    def __init__(self, name, handle, sql):
+        self.name = name
+        self.handle = handle
+        self.sql = sql
+        self.parameter_count = sql.count("%s")
+        self.prepare_sql = sql.replace("%s", "?")
+        variables = [f"@mf_p{position}" for position in range(self.parameter_count)]
+        self.set_sql = "SET " + ", ".join(f"{variable} = %s" for variable in variables)
+        self.execute_sql = f"EXECUTE {handle}"
+        if variables:
+            self.execute_sql += " USING " + ", ".join(variables)
+
+
+class StatementRegistry:
+    """Central registry of named server-side prepared statements
+
+    Statements are registered by name and SQL text, so the first-page and
+    next-page forms of a listing each get their own statement. Each one is
+    prepared lazily with SQL-level PREPARE, once per connection session, and
+    afterwards the server runs it from the parsed statement: a call sends the
+    parameters as session variables (SET) and then EXECUTE, two single
+    statements on a connection without CLIENT.MULTI_STATEMENTS. PyMySQL has
+    no binary COM_STMT protocol, so the parameters travel as escaped text.
+    """
+
+    def __init__(self):
+        self._statements = {}  # (name, sql) -> PreparedStatement
+        self._sessions = weakref.WeakKeyDictionary()  # connection -> (server thread id, set of handles)
+        self._lock = threading.Lock()
+
+    def register(self, name, sql):
+        """Return the statement for (name, sql), registering it on first use"""
+        key = (name, sql)
+        statement = self._statements.get(key)
+        if statement is None:
+            with self._lock:
+                statement = self._statements.get(key)
+                if statement is None:
+                    handle = f"ps_{name}_{len(self._statements)}"
+                    statement = self._statements[key] = PreparedStatement(name, handle, sql)
+        return statement
+
+    def statements(self):
+        """{handle: (name, sql)} of every registered statement"""
+        with self._lock:
+            return {statement.handle: (statement.name, statement.sql)
+                    for statement in self._statements.values()}
+
+    def _prepared(self, cursor):
+        """Handles prepared in the cursor's session; a reconnect starts a new session"""
+        connection = cursor.connection
+        thread_id = connection.thread_id()
+        with self._lock:
+            session = self._sessions.get(connection)
+            if session is not None and session[0] == thread_id:
+                return session[1]
+            self._sessions[connection] = (thread_id, set())
+            prepared = self._sessions[connection][1]
+        # Session variables take the connection collation and, unlike literals,
+        # do not yield to a column's; compare in the database's collation
+        cursor.execute("SET collation_connection = @@collation_database")
+        return prepared
+
+    def execute(self, cursor, name, sql, params=None):
+        """Execute (name, sql) as a prepared statement.
+
+        The cursor is left on the statement's result, so rows, rowcount and
+        lastrowid are read exactly as after ``cursor.execute``.
+        """
+        statement = self.register(name, sql)
+        params = tuple(params or ())
+        if len(params) != statement.parameter_count:
+            raise pymysql.ProgrammingError(
+                f"{name} takes {statement.parameter_count} parameters, got {len(params)}")
+
+        prepared = self._prepared(cursor)
+        if statement.handle not in prepared:
+            self._prepare(cursor, statement, prepared)
+        try:
+            self._execute(cursor, statement, params)
+        except pymysql.Error as e:
+            if not e.args or e.args[0] != ER_UNKNOWN_STMT_HANDLER:
+                raise
+            # The server dropped the session's statements; prepare again once
+            prepared.clear()
+            self._prepare(cursor, statement, prepared)
+            self._execute(cursor, statement, params)
+        return cursor
+
+    @staticmethod
+    def _prepare(cursor, statement, prepared):
+        cursor.execute(f"PREPARE {statement.handle} FROM %s", (statement.prepare_sql,))
+        prepared.add(statement.handle)
+
+    @staticmethod
+    def _execute(cursor, statement, params):
+        if statement.parameter_count:
+            cursor.execute(statement.set_sql, params)
+        cursor.execute(statement.execute_sql)
@@ -0,0 +1,277 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+
+# A listing query: ``sql`` ends in a WHERE clause so keyset conditions can be
+# appended, and ``keys`` are the (SQL expression, result column) pairs of the
+# unique key the rows are ordered by.
+ListQuery = namedtuple('ListQuery', 'name sql keys')
+
+# Page size used when a caller passes a page token without a limit
+DEFAULT_PAGE_SIZE = 100
+
+USERS_BY_BLOOD_GROUP = ListQuery(
+    "users_by_blood_group",
+    "SELECT * FROM USER WHERE BloodGroup = %s",
+    (("UserID", "UserID"),),
+)
+
+USERS_BY_ONGOING_TREATMENTS = ListQuery("users_by_ongoing_treatments", """
+    SELECT u.*, ut.TreatmentID
+    FROM USER u
+    JOIN UNDERGOING_TREATMENTS ut ON u.UserID = ut.UserID
+    WHERE ut.Status = 'Ongoing'
+    """,
+    (("ut.UserID", "UserID"), ("ut.TreatmentID", "TreatmentID")),
+)
+
+# Listings never carry report bodies: they live compressed in
+# TEST_REPORT_BODIES and are fetched by TestID for the rows that need them
+TEST_REPORT_COLUMNS = ("tr.TestID, tr.UserID, tr.TreatmentID, tr.TestType, "
+                       "tr.OrganizationLab, tr.DoctorOnConsultation, tr.TestDate")
+
+MRI_TEST_REPORTS = ListQuery("mri_test_reports", """
+    SELECT u.UserID, u.FirstName, u.LastName, tr.TestID, tr.TestType, tr.TestDate,
+           tr.OrganizationLab, tr.DoctorOnConsultation
+    FROM USER u
+    JOIN TEST_REPORTS tr ON u.UserID = tr.UserID
+    WHERE tr.TestType = 'MRI' AND tr.TestDate >= DATE_SUB(CURDATE(), INTERVAL %s YEAR)
+    """,
+    (("tr.TestID", "TestID"),),
+)
+
+# Served by idx_user_blood_group_bmi: one range per page, already in key order
+USERS_BY_BMI_BAND = ListQuery(
+    "users_by_bmi_band",
+    "SELECT * FROM USER WHERE BloodGroup = %s AND BMI >= %s AND BMI < %s",
+    (("BMI", "BMI"), ("UserID", "UserID")),
+)
+
+# WHO adult BMI categories as half-open [low, high) ranges
+BMI_BANDS = {
+    "underweight": (0, 18.5),
+    "normal": (18.5, 25),
+    "overweight": (25, 30),
+    "obese": (30, 10000000),
+}
+
+
+def bmi_range(band):
+    """(low, high) for a BMI_BANDS name or an explicit (low, high) pair"""
+    if isinstance(band, str):
+        if band not in BMI_BANDS:
+            raise ValueError(f"Unknown BMI band: {band} (expected one of {', '.join(BMI_BANDS)})")
+        return BMI_BANDS[band]
+    low, high = band
+    return low, high
+
+USERS_LOCATION_BY_BLOOD_GROUP = ListQuery(
+    "users_location_by_blood_group",
+    "SELECT UserID, FirstName, LastName, Location FROM USER WHERE BloodGroup = %s",
+    (("UserID", "UserID"),),
+)
+
+ALLOPATHY_DISEASES = ListQuery("allopathy_diseases", """
+    SELECT DISTINCT d.DiseaseID, d.DiseaseName
+    FROM DISEASE d
+    JOIN PRESCRIBED_TREATMENTS pt ON d.DiseaseID = pt.DiseaseID
+    WHERE pt.TypeOfTreatment = 'Allopathy'
+    """,
+    (("d.DiseaseID", "DiseaseID"),),
+)
+
+USERS_BY_NAME_PREFIX = ListQuery(
+    "users_by_name_prefix",
+    "SELECT * FROM USER WHERE FirstName LIKE %s",
+    (("UserID", "UserID"),),
+)
+
+# Columns returned for patient-name matches; front-desk lookups need no more
+PATIENT_LOOKUP_COLUMNS = "UserID, FirstName, LastName, Gender, DateOfBirth, BloodGroup, Location"
+
+TEST_REPORTS_BY_TYPE = ListQuery("test_reports_by_type", f"""
+    SELECT {TEST_REPORT_COLUMNS}
+    FROM TEST_REPORTS tr
+    WHERE tr.TestType LIKE %s
+    """,
+    (("tr.TestID", "TestID"),),
+)
+
+
+# Fixed statements shared by MediFitCLI and AsyncMediFit
+HIGH_SEVERITY_TREATMENTS = """
+    SELECT COUNT(DISTINCT u.UserID) as UserCount
+    FROM USER u
+    JOIN UNDERGOING_TREATMENTS ut ON u.UserID = ut.UserID
+    JOIN DISEASE d ON ut.DiseaseID = d.DiseaseID
+    WHERE ut.Status = 'Ongoing' AND d.Severity > %s
+"""
+
+INSERT_USER = """
+    INSERT INTO USER
+    (FirstName, LastName, BloodGroup, Gender, DateOfBirth, Weight, Height, Location)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_DISEASE = """
+    INSERT INTO DISEASE
+    (DiseaseName, Severity, Communicability, TriggeringEnvironment, Symptoms)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+INSERT_DISEASE_SYMPTOM = "INSERT IGNORE INTO DISEASE_SYMPTOM (Term, DiseaseID) VALUES (%s, %s)"
+
+# Rows are locked so HEALTH_STATS deltas are computed from the current values
+LOCK_USER = "SELECT Weight, Height, BloodGroup FROM USER WHERE UserID = %s FOR UPDATE"
+
+UPDATE_USER_WEIGHT = "UPDATE USER SET Weight = %s WHERE UserID = %s"
+
+USER_BMI = "SELECT BMI FROM USER WHERE UserID = %s"
+
+LOCK_TREATMENT = """
+    SELECT Status FROM UNDERGOING_TREATMENTS
+    WHERE UserID = %s AND TreatmentID = %s FOR UPDATE
+"""
+
+UPDATE_TREATMENT_STATUS = """
+    UPDATE UNDERGOING_TREATMENTS
+    SET Status = %s
+    WHERE UserID = %s AND TreatmentID = %s
+"""
+
+LOCK_MEDICATION = "SELECT MedicationName FROM MEDICATION WHERE MedicationID = %s FOR UPDATE"
+
+# Set-based: affected users go straight into the recall outbox on the server
+QUEUE_RECALL_NOTIFICATIONS = """
+    INSERT IGNORE INTO MEDICATION_RECALL_NOTIFICATIONS (MedicationID, MedicationName, UserID)
+    SELECT DISTINCT m.MedicationID, m.MedicationName, ut.UserID
+    FROM MEDICATION m
+    JOIN PRESCRIBED_TREATMENTS pt ON pt.DiseaseID = m.DiseaseID
+    JOIN UNDERGOING_TREATMENTS ut ON ut.TreatmentID = pt.TreatmentID
+    WHERE m.MedicationID = %s
+"""
+
+DELETE_MEDICATION = "DELETE FROM MEDICATION WHERE MedicationID = %s"
+
+
+def in_placeholders(values):
+    """``%s, %s, ...`` for an IN list of ``values``"""
+    return ", ".join(["%s"] * len(values))
+
+
+def diseases_query(disease_ids):
+    """(sql, params) reading the DISEASE rows of ``disease_ids``"""
+    disease_ids = list(disease_ids)
+    return f"SELECT * FROM DISEASE WHERE DiseaseID IN ({in_placeholders(disease_ids)})", disease_ids
+
+
+def _values_table(columns, count):
+    """Derived table of ``count`` parameter rows: SELECT %s AS a, ... UNION ALL SELECT %s, ..."""
+    first = "SELECT " + ", ".join(f"%s AS {column}" for column in columns)
+    rest = " UNION ALL SELECT " + ", ".join(["%s"] * len(columns))
+    return first + rest * (count - 1)
+
+
+# Batched writes: statements for ``count`` rows at a time, parameters flattened row by row
+def lock_treatments(count):
+    return f"""
+    SELECT UserID, TreatmentID, Status FROM UNDERGOING_TREATMENTS
+    WHERE (UserID, TreatmentID) IN ({", ".join(["(%s, %s)"] * count)}) FOR UPDATE
+"""
+
+
+def update_treatment_statuses(count):
+    return f"""
+    UPDATE UNDERGOING_TREATMENTS ut
+    JOIN ({_values_table(("UserID", "TreatmentID", "Status"), count)}) AS changes
+      ON ut.UserID = changes.UserID AND ut.TreatmentID = changes.TreatmentID
+    SET ut.Status = changes.Status
+"""
+
+
+def lock_users(count):
+    return f"SELECT UserID, Weight FROM USER WHERE UserID IN ({', '.join(['%s'] * count)}) FOR UPDATE"
+
+
+def update_user_weights(count):
+    return f"""
+    UPDATE USER u
+    JOIN ({_values_table(("UserID", "Weight"), count)}) AS changes ON u.UserID = changes.UserID
+    SET u.Weight = changes.Weight
+"""
+
+
+def keyset_query(list_query, after=None, limit=None):
+    """Return (sql, extra params) for rows of ``list_query`` ordered by its key.
+
+    ``after`` is the key tuple of the last row already returned; only rows
+    strictly after it are selected, so every page is an index range scan
+    regardless of how deep into the result it starts.
+    """
+    expressions = [expression for expression, _ in list_query.keys]
+    sql = list_query.sql.rstrip()
+    params = []
+    if after is not None:
+        if len(expressions) == 1:
+            sql += f" AND {expressions[0]} > %s"
+        else:
+            sql += f" AND ({', '.join(expressions)}) > ({', '.join(['%s'] * len(expressions))})"
+        params.extend(after)
+    sql += " ORDER BY " + ", ".join(expressions)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+def row_key(list_query, row, columns=None):
+    """Key tuple of a result row; ``columns`` are the result column names for tuple rows"""
+    if columns is None:
+        return tuple(row[column] for _, column in list_query.keys)
+    return tuple(row[columns.index(column)] for _, column in list_query.keys)
+
+
+def make_page(list_query, rows, limit):
+    """Trim rows fetched with LIMIT limit + 1 to a Page, with a token if more rows exist"""
+    if limit is None or len(rows) <= limit:
+        return Page(rows)
+    rows = rows[:limit]
+    return Page(rows, encode_token(list_query.name, row_key(list_query, rows[-1])))
+
+
+def page_rows(list_query, rows, limit=None, page_token=None):
+    """Page through rows already held in memory, sorted by the query's key, like a keyset query would"""
+    if limit is None and page_token is None:
+        return Page(rows)
+    if page_token:
+        after = decode_token(list_query.name, page_token)
+        rows = [row for row in rows if row_key(list_query, row) > after]
+    return make_page(list_query, rows, limit or DEFAULT_PAGE_SIZE)
+
+
+class Page(list):
+    """One page of rows; ``next_token`` continues after the last row, or is None at the end"""
+
+    def __init__(self, rows=(), next_token=None):
+        super().__init__(rows)
+        self.next_token = next_token
+
+
+def encode_token(name, key):
+    """Opaque continuation token for the rows of query ``name`` after ``key``"""
+    # Decimal and date keys travel as strings; MySQL compares them back as numbers/dates
+    payload = json.dumps({"q": name, "k": list(key)}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_token(name, token):
+    """Key tuple stored in ``token``; raises ValueError if it is malformed or for another query"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["q"] != name:
+            raise ValueError
+        return tuple(payload["k"])
+    except (binascii.Error, json.JSONDecodeError, KeyError, TypeError, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid page token") from None
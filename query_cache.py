@@ -0,0 +1,144 @@
+import copy
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """Thread-safe result cache with per-entry TTL, LRU eviction and tag invalidation
+
+    Entries are tagged with the tables they were computed from; invalidating a
+    tag drops every entry that depends on it. Each tag also carries a
+    generation counter so a result computed while a write was committing is
+    not stored after that write invalidated the tag. When ``admit()`` returns
+    False a result is not stored at all, e.g. while it may have been read
+    from a replica that is behind a write.
+    """
+
+    def __init__(self, max_entries=256, admit=None):
+        self.max_entries = max_entries
+        self.admit = admit
+        self._entries = OrderedDict()  # key -> (value, expires_at, tags)
+        self._keys_by_tag = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.rejections = 0
+
+    def get(self, key):
+        """Return (True, value) for a live entry, otherwise (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def generation(self, tags):
+        """Snapshot the generation of ``tags`` before computing a value to cache"""
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def set(self, key, value, ttl, tags=(), generation=None):
+        """Store ``value`` for ``ttl`` seconds unless ``tags`` changed since ``generation``"""
+        if self.admit is not None and not self.admit():
+            with self._lock:
+                self.rejections += 1
+            return
+        with self._lock:
+            if generation is not None and generation != tuple(self._generations.get(tag, 0) for tag in tags):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, tuple(tags))
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags):
+        """Drop every entry tagged with any of ``tags``"""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in self._keys_by_tag.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "rejections": self.rejections,
+            }
+
+
+def cached(ttl, tables):
+    """Cache a method's result in ``self.cache`` for ``ttl`` seconds, tagged with ``tables``.
+
+    Works for plain and ``async def`` methods. None results (errors) are never
+    cached, and callers get a shallow copy so mutating a returned row cannot
+    corrupt the cached one.
+    """
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                key = (method.__name__, args, tuple(sorted(kwargs.items())))
+                found, value = self.cache.get(key)
+                if found:
+                    return copy.copy(value)
+                generation = self.cache.generation(tables)
+                value = await method(self, *args, **kwargs)
+                if value is not None:
+                    self.cache.set(key, value, ttl, tables, generation)
+                    value = copy.copy(value)
+                return value
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            found, value = self.cache.get(key)
+            if found:
+                return copy.copy(value)
+            generation = self.cache.generation(tables)
+            value = method(self, *args, **kwargs)
+            if value is not None:
+                self.cache.set(key, value, ttl, tables, generation)
+                value = copy.copy(value)
+            return value
+        return wrapper
+    return decorator
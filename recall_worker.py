@@ -0,0 +1,181 @@
+import argparse
+import json
+import threading
+import time
+
+import pymysql
+
+from connection_pool import ConnectionPool
+
+# Oldest pending notifications first, with the user's name for the message.
+# SKIP LOCKED (MySQL 8.0+) lets several workers drain the outbox side by side.
+CLAIM_BATCH = """
+    SELECT n.NotificationID, n.MedicationID, n.MedicationName, n.UserID,
+           u.FirstName, u.LastName
+    FROM MEDICATION_RECALL_NOTIFICATIONS n
+    JOIN USER u ON u.UserID = n.UserID
+    WHERE n.ProcessedAt IS NULL
+    ORDER BY n.NotificationID
+    LIMIT %s
+    FOR UPDATE OF n SKIP LOCKED
+"""
+
+BACKLOG = """
+    SELECT COUNT(*) AS Pending, MIN(CreatedAt) AS OldestPending
+    FROM MEDICATION_RECALL_NOTIFICATIONS
+    WHERE ProcessedAt IS NULL
+"""
+
+
+def print_notifications(notifications):
+    for notification in notifications:
+        print(f"Notify {notification['FirstName']} {notification['LastName']} "
+              f"(UserID {notification['UserID']}): {notification['MedicationName']} "
+              f"(MedicationID {notification['MedicationID']}) has been recalled")
+
+
+class RecallNotificationWorker:
+    """Drains MEDICATION_RECALL_NOTIFICATIONS in batches of ``batch_size``
+
+    Each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED, handed to
+    ``notify(rows)`` and marked processed in the same transaction, so a batch
+    whose delivery raises is retried later (at-least-once delivery). Processed
+    rows leave the (ProcessedAt, NotificationID) index range, so every claim is
+    a short index scan no matter how large the outbox has grown.
+    """
+
+    def __init__(self, pool, notify=print_notifications, batch_size=500, poll_interval=5.0):
+        self.pool = pool
+        self.notify = notify
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.batches = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self.started = time.monotonic()
+
+    def run_once(self):
+        """Claim, deliver and mark one batch; returns the number of notifications processed"""
+        started = time.monotonic()
+        with self.pool.connection() as connection:
+            with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute(CLAIM_BATCH, (self.batch_size,))
+                notifications = cursor.fetchall()
+                if not notifications:
+                    return 0
+                try:
+                    self.notify(notifications)
+                except Exception:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                ids = [notification['NotificationID'] for notification in notifications]
+                cursor.execute(
+                    "UPDATE MEDICATION_RECALL_NOTIFICATIONS SET ProcessedAt = CURRENT_TIMESTAMP "
+                    f"WHERE NotificationID IN ({', '.join(['%s'] * len(ids))})", ids
+                )
+                connection.commit()
+
+        with self._lock:
+            self.processed += len(notifications)
+            self.batches += 1
+            self.busy_seconds += time.monotonic() - started
+        return len(notifications)
+
+    def drain(self, max_batches=None):
+        """Process batches until the outbox is empty (or max_batches); returns notifications processed"""
+        total = 0
+        batches = 0
+        while not self._stop.is_set() and (max_batches is None or batches < max_batches):
+            processed = self.run_once()
+            if not processed:
+                break
+            total += processed
+            batches += 1
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.drain()
+            except Exception as e:
+                print(f"Error processing recall notifications: {e}")
+                processed = 0
+            if not processed:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Run the worker in a background thread until stop()"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="recall-notifications", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def backlog(self):
+        """Pending notification count and the creation time of the oldest one"""
+        with self.pool.connection() as connection:
+            with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute(BACKLOG)
+                return cursor.fetchone()
+
+    def stats(self):
+        """Throughput counters since the worker was created"""
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                "processed": self.processed,
+                "batches": self.batches,
+                "failures": self.failures,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "notifications_per_second": round(self.processed / elapsed, 1) if elapsed else 0.0,
+                "notifications_per_busy_second": round(self.processed / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+                "average_batch_ms": round(self.busy_seconds / self.batches * 1000, 2) if self.batches else None,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver queued medication recall notifications")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--poll-interval", type=float, default=5.0,
+                        help="seconds to wait when the outbox is empty")
+    parser.add_argument("--once", action="store_true", help="drain the current backlog and exit")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    pool = ConnectionPool(min_size=1, max_size=2, host=args.host, user=args.user,
+                          password=args.password, database=args.database)
+    worker = RecallNotificationWorker(pool, batch_size=args.batch_size, poll_interval=args.poll_interval)
+    try:
+        if args.once:
+            worker.drain()
+        else:
+            worker.start()
+            while True:
+                time.sleep(60)
+                print(json.dumps({**worker.stats(), "pending": worker.backlog()["Pending"]}))
+    except KeyboardInterrupt:
+        pass
+    except pymysql.Error as e:
+        print(f"Error processing recall notifications: {e}")
+    finally:
+        worker.stop()
+        print(json.dumps(worker.stats()))
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import datetime
+import threading
+import time
+
+# Catalog tables held in memory: table -> primary key column. Every one carries
+# an UpdatedAt column (migration 9) so refreshes only fetch changed rows.
+CATALOGS = {
+    "DISEASE": "DiseaseID",
+    "MEDICATION": "MedicationID",
+    "PRESCRIBED_TREATMENTS": "TreatmentID",
+}
+
+# Secondary index kept per catalog: table -> column whose values map to sets of keys
+INDEXED_COLUMNS = {
+    "DISEASE": "Severity",
+    "MEDICATION": "DiseaseID",
+    "PRESCRIBED_TREATMENTS": "TypeOfTreatment",
+}
+
+
+def _execute(cursor, name, query, params=None):
+    cursor.execute(query, params)
+
+
+class _Catalog:
+    """Rows of one table as tuples keyed by primary key, plus a column-name tuple"""
+
+    def __init__(self, key):
+        self.key = key
+        self.columns = ()
+        self.rows = {}  # primary key -> tuple of values
+        self.updated_at = None  # newest UpdatedAt seen
+
+    def upsert(self, rows):
+        """Store dict rows; returns [(old tuple or None, new tuple)] for the index updates"""
+        changes = []
+        for row in rows:
+            if not self.columns:
+                self.columns = tuple(row)
+            values = tuple(row[column] for column in self.columns)
+            old = self.rows.get(row[self.key])
+            if old != values:
+                self.rows[row[self.key]] = values
+                changes.append((old, values))
+            if self.updated_at is None or row["UpdatedAt"] > self.updated_at:
+                self.updated_at = row["UpdatedAt"]
+        return changes
+
+    def value(self, row, column):
+        return row[self.columns.index(column)]
+
+    def as_dict(self, row):
+        return dict(zip(self.columns, row))
+
+    def checksum(self):
+        return len(self.rows), sum(self.rows)
+
+
+class ReferenceData:
+    """In-process copy of the DISEASE, MEDICATION and PRESCRIBED_TREATMENTS catalogs
+
+    Rows are kept as tuples with indexes by ID, severity, treatment type and
+    disease. ``refresh`` fetches only rows whose UpdatedAt is at or after the
+    newest one already loaded (minus ``overlap`` seconds, for transactions that
+    committed late). Deleted rows leave no UpdatedAt behind, so each refresh
+    also compares the row count and ID sum with the server's and reloads a
+    table in full when they differ.
+    """
+
+    def __init__(self, refresh_interval=30.0, overlap=60.0):
+        self.refresh_interval = refresh_interval
+        self.overlap = datetime.timedelta(seconds=overlap)
+        self._catalogs = {table: _Catalog(key) for table, key in CATALOGS.items()}
+        self._indexes = {table: {} for table in CATALOGS}  # table -> {indexed value: set of keys}
+        self._lock = threading.Lock()
+        self._refreshed_at = None
+        self.refreshes = 0
+        self.full_reloads = 0
+        self.rows_fetched = 0
+
+    def is_stale(self):
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    def mark_stale(self):
+        """Refresh on the next read, e.g. after this process wrote to a catalog"""
+        self._refreshed_at = None
+
+    def refresh(self, cursor, execute=_execute):
+        """Bring every catalog up to date through ``execute(cursor, name, query, params)``"""
+        for table, key in CATALOGS.items():
+            catalog = self._catalogs[table]
+            if catalog.updated_at is None:
+                query, params = f"SELECT * FROM {table}", None
+            else:
+                query, params = f"SELECT * FROM {table} WHERE UpdatedAt >= %s", (catalog.updated_at - self.overlap,)
+            execute(cursor, f"reference_{table.lower()}", query, params)
+            rows = cursor.fetchall()
+            execute(cursor, f"reference_{table.lower()}_checksum",
+                    f"SELECT COUNT(*) AS RowCount, COALESCE(SUM({key}), 0) AS KeySum FROM {table}", None)
+            checksum = cursor.fetchone()
+
+            with self._lock:
+                self._apply(table, catalog.upsert(rows))
+                reload = (checksum["RowCount"], int(checksum["KeySum"])) != catalog.checksum()
+            if reload:
+                # Rows were deleted behind our back; start the table over
+                execute(cursor, f"reference_{table.lower()}", f"SELECT * FROM {table}", None)
+                rows = cursor.fetchall()
+                with self._lock:
+                    self._reset(table)
+                    self._apply(table, self._catalogs[table].upsert(rows))
+                    self.full_reloads += 1
+            self.rows_fetched += len(rows)
+        self.refreshes += 1
+        self._refreshed_at = time.monotonic()
+
+    def _reset(self, table):
+        self._catalogs[table] = _Catalog(CATALOGS[table])
+        self._indexes[table] = {}
+
+    def _apply(self, table, changes):
+        catalog = self._catalogs[table]
+        index_column = INDEXED_COLUMNS[table]
+        index = self._indexes[table]
+        for old, new in changes:
+            key = catalog.value(new, catalog.key)
+            if old is not None:
+                members = index.get(catalog.value(old, index_column))
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del index[catalog.value(old, index_column)]
+            index.setdefault(catalog.value(new, index_column), set()).add(key)
+
+    def diseases(self, disease_ids):
+        """{DiseaseID: row dict} for the given IDs that exist"""
+        with self._lock:
+            catalog = self._catalogs["DISEASE"]
+            return {disease_id: catalog.as_dict(catalog.rows[disease_id])
+                    for disease_id in disease_ids if disease_id in catalog.rows}
+
+    def max_severity(self):
+        with self._lock:
+            severities = [severity for severity in self._indexes["DISEASE"] if severity is not None]
+            return max(severities) if severities else None
+
+    def diseases_by_severity(self, min_severity, max_severity=10):
+        """Sorted DiseaseIDs with min_severity <= Severity <= max_severity"""
+        with self._lock:
+            return sorted(disease_id
+                          for severity, disease_ids in self._indexes["DISEASE"].items()
+                          if severity is not None and min_severity <= severity <= max_severity
+                          for disease_id in disease_ids)
+
+    def treatment_count(self, treatment_type):
+        """Number of PRESCRIBED_TREATMENTS of one TypeOfTreatment"""
+        with self._lock:
+            return len(self._indexes["PRESCRIBED_TREATMENTS"].get(treatment_type, ()))
+
+    def diseases_with_treatment_type(self, treatment_type):
+        """[{DiseaseID, DiseaseName}] of diseases prescribed a treatment type, by DiseaseID"""
+        with self._lock:
+            treatments = self._catalogs["PRESCRIBED_TREATMENTS"]
+            diseases = self._catalogs["DISEASE"]
+            disease_ids = {treatments.value(treatments.rows[treatment_id], "DiseaseID")
+                           for treatment_id in self._indexes["PRESCRIBED_TREATMENTS"].get(treatment_type, ())}
+            return [{"DiseaseID": disease_id, "DiseaseName": diseases.value(diseases.rows[disease_id], "DiseaseName")}
+                    for disease_id in sorted(disease_ids) if disease_id in diseases.rows]
+
+    def medications_for_disease(self, disease_id):
+        """MEDICATION row dicts of one disease, by MedicationID"""
+        with self._lock:
+            catalog = self._catalogs["MEDICATION"]
+            return [catalog.as_dict(catalog.rows[medication_id])
+                    for medication_id in sorted(self._indexes["MEDICATION"].get(disease_id, ()))]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rows": {table: len(catalog.rows) for table, catalog in self._catalogs.items()},
+                "refreshes": self.refreshes,
+                "full_reloads": self.full_reloads,
+                "rows_fetched": self.rows_fetched,
+                "seconds_since_refresh": (round(time.monotonic() - self._refreshed_at, 3)
+                                          if self._refreshed_at is not None else None),
+            }
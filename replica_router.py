@@ -0,0 +1,142 @@
+import contextvars
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+import pymysql
+
+from connection_pool import PoolExhaustedError
+
+# Session whose writes the current reads must observe; None is the client-wide session
+_session = contextvars.ContextVar("medifit_session", default=None)
+
+
+def parse_endpoint(endpoint):
+    """Connection kwargs for a "host[:port]" string or a dict of pymysql.connect kwargs"""
+    if isinstance(endpoint, dict):
+        return dict(endpoint)
+    host, _, port = endpoint.rpartition(":")
+    if not host or not port.isdigit():
+        return {"host": endpoint}
+    return {"host": host, "port": int(port)}
+
+
+class ReplicaRouter:
+    """Routes read-only work to replica pools and everything else to the primary
+
+    Reads rotate round-robin over the replicas that are up. A replica whose
+    checkout fails is skipped for ``retry_interval`` seconds and the read goes
+    to the next replica, or to the primary when none is left. After a session
+    writes, its reads stay on the primary for ``read_your_writes_window``
+    seconds, which should exceed the replicas' usual replication lag.
+    """
+
+    def __init__(self, primary, replicas=(), read_your_writes_window=5.0, retry_interval=30.0):
+        self.primary = primary
+        self.replicas = list(replicas)  # (name, ConnectionPool) pairs
+        self.read_your_writes_window = read_your_writes_window
+        self.retry_interval = retry_interval
+        self._next_replica = itertools.count()
+        self._down_until = {}  # replica name -> monotonic time to retry it
+        self._last_write = {}  # session -> monotonic time of its last commit
+        self._latest_write = None  # monotonic time of the last commit of any session
+        self._lock = threading.Lock()
+        self.counts = {"writes": 0, "primary_reads": 0, "sticky_reads": 0, "replica_failovers": 0}
+        self.replica_reads = {name: 0 for name, _ in self.replicas}
+
+    @contextmanager
+    def session(self, key):
+        """Scope read-your-writes tracking to ``key`` (e.g. a user or request id) in this context"""
+        token = _session.set(key)
+        try:
+            yield
+        finally:
+            _session.reset(token)
+
+    @staticmethod
+    def current_session():
+        return _session.get()
+
+    def record_write(self, session=None):
+        """Pin the session's reads to the primary for the read-your-writes window"""
+        with self._lock:
+            now = time.monotonic()
+            if len(self._last_write) >= 4096:
+                self._last_write = {key: at for key, at in self._last_write.items()
+                                    if now - at < self.read_your_writes_window}
+            self._last_write[_session.get() if session is None else session] = now
+            self._latest_write = now
+            self.counts["writes"] += 1
+
+    def _is_sticky(self, session):
+        last_write = self._last_write.get(session)
+        return last_write is not None and time.monotonic() - last_write < self.read_your_writes_window
+
+    def may_read_stale(self, session=None):
+        """Whether the session's reads may go to a replica that has not applied a write
+        committed by any session within the read-your-writes window"""
+        with self._lock:
+            if not self.replicas or self._latest_write is None:
+                return False
+            if time.monotonic() - self._latest_write >= self.read_your_writes_window:
+                return False
+            return not self._is_sticky(_session.get() if session is None else session)
+
+    def _candidates(self, session):
+        """Replicas to try for a read, in order; empty when it must go to the primary"""
+        with self._lock:
+            if self._is_sticky(session):
+                self.counts["sticky_reads"] += 1
+                return []
+            now = time.monotonic()
+            live = [(name, pool) for name, pool in self.replicas if self._down_until.get(name, 0) <= now]
+            if not live:
+                return []
+            start = next(self._next_replica) % len(live)
+            return live[start:] + live[:start]
+
+    def _acquire_read(self, session):
+        for name, pool in self._candidates(session):
+            try:
+                connection = pool.acquire()
+            except PoolExhaustedError:
+                continue
+            except pymysql.Error:
+                with self._lock:
+                    self._down_until[name] = time.monotonic() + self.retry_interval
+                    self.counts["replica_failovers"] += 1
+                continue
+            with self._lock:
+                self.replica_reads[name] += 1
+            return pool, connection
+        with self._lock:
+            self.counts["primary_reads"] += 1
+        return self.primary, self.primary.acquire()
+
+    @contextmanager
+    def connection(self, read_only=False, session=None):
+        """Check out a connection: the primary for writes, a replica for reads when allowed"""
+        if read_only and self.replicas:
+            pool, connection = self._acquire_read(_session.get() if session is None else session)
+        else:
+            pool, connection = self.primary, self.primary.acquire()
+        try:
+            yield connection
+        finally:
+            pool.release(connection)
+
+    def stats(self):
+        """Routing counters and the replicas currently skipped as down"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                **self.counts,
+                "replica_reads": dict(self.replica_reads),
+                "replicas_down": sorted(name for name, until in self._down_until.items() if until > now),
+            }
+
+    def close(self):
+        self.primary.close()
+        for _, pool in self.replicas:
+            pool.close()
@@ -0,0 +1,39 @@
+import struct
+import zlib
+
+import queries
+
+# TEST_REPORTS.TestReport lives in this side table (migration 10), stored in
+# the format of MySQL's COMPRESS(): a 4-byte little-endian length followed by
+# a zlib stream, so UNCOMPRESS(Body) still reads it in plain SQL.
+BODIES_TABLE = "TEST_REPORT_BODIES"
+
+UPSERT_BODY = f"""
+    INSERT INTO {BODIES_TABLE} (TestID, Body) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE Body = VALUES(Body)
+"""
+
+
+def compress_body(text):
+    """Encode a report body like MySQL COMPRESS(); None stays None"""
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if not data:
+        return b""
+    return struct.pack("<I", len(data) & 0x3FFFFFFF) + zlib.compress(data)
+
+
+def decompress_body(blob):
+    """Decode a COMPRESS()ed body back to text; None stays None"""
+    if blob is None:
+        return None
+    if not blob:
+        return ""
+    return zlib.decompress(bytes(blob[4:])).decode("utf-8")
+
+
+def bodies_query(test_ids):
+    """(sql, params) reading the still-compressed bodies of test_ids; they are decompressed client-side"""
+    return (f"SELECT TestID, Body FROM {BODIES_TABLE} WHERE TestID IN ({queries.in_placeholders(test_ids)})",
+            tuple(test_ids))
@@ -0,0 +1,232 @@
+import argparse
+from collections import Counter
+from decimal import ROUND_HALF_UP, Decimal
+
+import pymysql
+
+# HEALTH_STATS keeps running counts (and BMI sums for blood groups) per
+# dimension value so the aggregate queries read a handful of rows instead of
+# scanning USER and UNDERGOING_TREATMENTS. The write paths in MediFitCLI apply
+# the statements below in the same transaction as the change they describe;
+# rebuild() recomputes everything from the base tables.
+CREATE_HEALTH_STATS = """
+    CREATE TABLE IF NOT EXISTS HEALTH_STATS (
+        Dimension VARCHAR(30) NOT NULL,
+        DimValue VARCHAR(50) NOT NULL,
+        RowCount BIGINT NOT NULL DEFAULT 0,
+        BmiCount BIGINT NOT NULL DEFAULT 0,
+        BmiSum DECIMAL(30,10) NOT NULL DEFAULT 0,
+        PRIMARY KEY (Dimension, DimValue)
+    )
+"""
+
+# BMI of a USER row: the stored USER.BMI column (createdb migration 5), as
+# summed by rebuild() and the batched weight updates
+BMI_EXPRESSION = "BMI"
+
+# Heights (cm) below this have no BMI: they were typed in the wrong unit and
+# their BMI would overflow DECIMAL(9,2), so the generated USER.BMI column
+# (createdb.USER_BMI_EXPRESSION) is NULL for them and the sums skip them too
+MIN_BMI_HEIGHT_CM = 30
+
+# Same arithmetic as the generated USER.BMI column (Height in cm) on bound
+# values, so incremental sums match a rebuild exactly; only used for rows
+# has_bmi() accepts
+_BMI = ("ROUND(CAST(%s AS DECIMAL(5,2)) * 10000"
+        " / NULLIF(CAST(%s AS DECIMAL(5,2)) * CAST(%s AS DECIMAL(5,2)), 0), 2)")
+
+# dimension -> (base table, aggregate query producing DimValue, RowCount, BmiCount, BmiSum)
+DIMENSIONS = {
+    "blood_group": ("USER", """
+        SELECT BloodGroup, COUNT(*),
+               COUNT(""" + BMI_EXPRESSION + """),
+               COALESCE(SUM(""" + BMI_EXPRESSION + """), 0)
+        FROM USER GROUP BY BloodGroup
+    """),
+    "treatment_status": ("UNDERGOING_TREATMENTS", """
+        SELECT COALESCE(Status, ''), COUNT(*), 0, 0
+        FROM UNDERGOING_TREATMENTS GROUP BY COALESCE(Status, '')
+    """),
+    "treatment_type": ("PRESCRIBED_TREATMENTS", """
+        SELECT COALESCE(TypeOfTreatment, ''), COUNT(*), 0, 0
+        FROM PRESCRIBED_TREATMENTS GROUP BY COALESCE(TypeOfTreatment, '')
+    """),
+}
+
+
+def _increment(dimension, value, rows=1, bmi_count=0, bmi_sql="0", bmi_params=()):
+    return ("""
+        INSERT INTO HEALTH_STATS (Dimension, DimValue, RowCount, BmiCount, BmiSum)
+        VALUES (%s, %s, %s, %s, COALESCE(""" + bmi_sql + """, 0))
+        ON DUPLICATE KEY UPDATE
+            RowCount = RowCount + VALUES(RowCount),
+            BmiCount = BmiCount + VALUES(BmiCount),
+            BmiSum = BmiSum + VALUES(BmiSum)
+    """, (dimension, value if value is not None else '', rows, bmi_count, *bmi_params))
+
+
+def has_bmi(weight, height):
+    """Whether the generated USER.BMI of a row stored with weight and height is set"""
+    if weight is None or height is None:
+        return False
+    # Compared as stored: DECIMAL(5,2) rounds half away from zero
+    return Decimal(str(height)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) >= MIN_BMI_HEIGHT_CM
+
+
+def user_inserted(blood_group, weight, height):
+    """Statements recording a new USER row"""
+    if not has_bmi(weight, height):
+        return [_increment("blood_group", blood_group)]
+    return [_increment("blood_group", blood_group, 1, 1, _BMI, (weight, height, height))]
+
+
+def user_weight_changed(blood_group, old_weight, new_weight, height):
+    """Statements moving a user's BMI contribution from old_weight to new_weight"""
+    if not has_bmi(old_weight, height):
+        return []
+    return [("""
+        UPDATE HEALTH_STATS
+        SET BmiSum = BmiSum - """ + _BMI + " + " + _BMI + """
+        WHERE Dimension = 'blood_group' AND DimValue = %s
+    """, (old_weight, height, height, new_weight, height, height, blood_group))]
+
+
+def users_bmi_removed(user_ids):
+    """Statements taking the current BMI of ``user_ids`` out of the blood-group sums.
+
+    Run before a batched weight update, and users_bmi_added() after it, in the
+    same transaction with the USER rows locked.
+    """
+    return _users_bmi_changed(user_ids, "-")
+
+
+def users_bmi_added(user_ids):
+    """Statements adding the current BMI of ``user_ids`` to the blood-group sums"""
+    return _users_bmi_changed(user_ids, "+")
+
+
+def _users_bmi_changed(user_ids, sign):
+    if not user_ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    return [(f"""
+        UPDATE HEALTH_STATS hs
+        JOIN (
+            SELECT BloodGroup, SUM({BMI_EXPRESSION}) AS BmiSum
+            FROM USER WHERE UserID IN ({placeholders}) GROUP BY BloodGroup
+        ) AS changed ON hs.Dimension = 'blood_group' AND hs.DimValue = changed.BloodGroup
+        SET hs.BmiSum = hs.BmiSum {sign} COALESCE(changed.BmiSum, 0)
+    """, tuple(user_ids))]
+
+
+def treatment_status_changed(old_status, new_status):
+    """Statements moving one UNDERGOING_TREATMENTS row between statuses"""
+    return treatment_statuses_changed([(old_status, new_status)])
+
+
+def treatment_statuses_changed(transitions):
+    """Statements moving UNDERGOING_TREATMENTS rows between statuses, one per status touched"""
+    deltas = Counter()
+    for old_status, new_status in transitions:
+        if old_status != new_status:
+            deltas[old_status if old_status is not None else ''] -= 1
+            deltas[new_status if new_status is not None else ''] += 1
+    statements = []
+    for status, delta in sorted(deltas.items()):
+        if delta < 0:
+            statements.append(("""
+        UPDATE HEALTH_STATS SET RowCount = RowCount - %s
+        WHERE Dimension = 'treatment_status' AND DimValue = %s
+        """, (-delta, status)))
+        elif delta > 0:
+            statements.append(_increment("treatment_status", status, delta))
+    return statements
+
+
+def apply(cursor, statements):
+    for query, params in statements:
+        cursor.execute(query, params)
+
+
+def _row_values(row):
+    """Read a row from either a tuple or a dict cursor as a list"""
+    return list(row.values()) if isinstance(row, dict) else list(row)
+
+
+def _actual(cursor, dimensions):
+    actual = {}
+    for dimension in dimensions:
+        cursor.execute(DIMENSIONS[dimension][1])
+        for row in cursor.fetchall():
+            value, rows, bmi_count, bmi_sum = _row_values(row)
+            actual[(dimension, value)] = (int(rows), int(bmi_count), bmi_sum)
+    return actual
+
+
+def rebuild(cursor, tables=None):
+    """Recompute HEALTH_STATS from the base tables (all of them, or only ``tables``).
+
+    The caller commits, so the rebuild is atomic with respect to readers.
+    """
+    dimensions = [dimension for dimension, (table, _) in DIMENSIONS.items()
+                  if tables is None or table in tables]
+    for dimension in dimensions:
+        cursor.execute("DELETE FROM HEALTH_STATS WHERE Dimension = %s", (dimension,))
+        cursor.execute(DIMENSIONS[dimension][1])
+        rows = [[dimension] + _row_values(row) for row in cursor.fetchall()]
+        if rows:
+            cursor.executemany("""
+                INSERT INTO HEALTH_STATS (Dimension, DimValue, RowCount, BmiCount, BmiSum)
+                VALUES (%s, %s, %s, %s, %s)
+            """, rows)
+    return dimensions
+
+
+def find_drift(cursor):
+    """Return [(dimension, value, stored, actual)] where HEALTH_STATS disagrees with the base tables"""
+    cursor.execute("SELECT Dimension, DimValue, RowCount, BmiCount, BmiSum FROM HEALTH_STATS")
+    stored = {}
+    for row in cursor.fetchall():
+        dimension, value, rows, bmi_count, bmi_sum = _row_values(row)
+        stored[(dimension, value)] = (int(rows), int(bmi_count), bmi_sum)
+
+    actual = _actual(cursor, DIMENSIONS)
+    empty = (0, 0, 0)
+    return [
+        (dimension, value, stored.get((dimension, value), empty), actual.get((dimension, value), empty))
+        for dimension, value in sorted(set(stored) | set(actual))
+        if stored.get((dimension, value), empty) != actual.get((dimension, value), empty)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or rebuild the HEALTH_STATS summary table")
+    parser.add_argument("--rebuild", action="store_true", help="recompute HEALTH_STATS from the base tables")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="newp")
+    parser.add_argument("--database", default="MediFit")
+    args = parser.parse_args()
+
+    connection = pymysql.connect(host=args.host, user=args.user, password=args.password,
+                                 database=args.database)
+    try:
+        with connection.cursor() as cursor:
+            drift = find_drift(cursor)
+            for dimension, value, stored, actual in drift:
+                print(f"{dimension}={value!r}: stored {stored}, actual {actual}")
+            if not drift:
+                print("HEALTH_STATS is consistent.")
+            if args.rebuild:
+                rebuild(cursor)
+                connection.commit()
+                print("HEALTH_STATS rebuilt.")
+    except pymysql.Error as e:
+        connection.rollback()
+        print(f"Error reconciling HEALTH_STATS: {e}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
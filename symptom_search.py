@@ -0,0 +1,107 @@
+import math
+import re
+import threading
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(("a", "an", "and", "at", "in", "of", "on", "or", "the", "to", "with"))
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+POSTINGS_QUERY = "SELECT Term, DiseaseID FROM DISEASE_SYMPTOM"
+
+# Diseases with symptoms but no postings yet, e.g. rows bulk-loaded into DISEASE
+UNINDEXED_DISEASES_QUERY = """
+    SELECT d.DiseaseID, d.Symptoms FROM DISEASE d
+    WHERE d.Symptoms IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM DISEASE_SYMPTOM ds WHERE ds.DiseaseID = d.DiseaseID)
+"""
+
+
+def normalize_term(word):
+    """Reduce a word to the form stored in the index ('Coughing' -> 'cough')"""
+    word = word.lower()
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith("ss"):
+                break
+            word = word[:-len(suffix)]
+            break
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Split free-text symptoms into unique normalized terms, in order of appearance"""
+    terms = []
+    for word in _WORD.findall((text or "").lower()):
+        if word in _STOPWORDS:
+            continue
+        term = normalize_term(word)
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+class SymptomIndex:
+    """In-process inverted index from symptom terms to DiseaseIDs
+
+    Built from the DISEASE_SYMPTOM junction table. Matches are ranked by the
+    summed inverse document frequency of the query terms they contain, so rare,
+    specific symptoms outweigh common ones like 'fatigue'.
+    """
+
+    def __init__(self):
+        self._postings = {}  # term -> set of DiseaseIDs
+        self._diseases = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build an index from DISEASE_SYMPTOM rows fetched as dicts"""
+        index = cls()
+        for row in rows:
+            index._postings.setdefault(row['Term'], set()).add(row['DiseaseID'])
+            index._diseases.add(row['DiseaseID'])
+        return index
+
+    @classmethod
+    def load(cls, cursor):
+        """Build an index from DISEASE_SYMPTOM using a DictCursor"""
+        cursor.execute(POSTINGS_QUERY)
+        return cls.from_rows(cursor.fetchall())
+
+    def add(self, disease_id, symptoms):
+        """Index the symptoms of a newly inserted disease"""
+        terms = tokenize(symptoms)
+        if not terms:
+            return
+        with self._lock:
+            for term in terms:
+                self._postings.setdefault(term, set()).add(disease_id)
+            self._diseases.add(disease_id)
+
+    def search(self, symptoms, match_all=False):
+        """Return [(DiseaseID, score)] for diseases matching the query, best first.
+
+        ``symptoms`` may hold several symptoms ("cough, fever"). With
+        ``match_all`` a disease must contain every term, otherwise any term.
+        """
+        terms = tokenize(symptoms)
+        if not terms:
+            return []
+        with self._lock:
+            postings = [self._postings.get(term, set()) for term in terms]
+            total = max(len(self._diseases), 1)
+
+            if match_all:
+                smallest = min(postings, key=len)
+                candidates = smallest.intersection(*postings)
+            else:
+                candidates = set().union(*postings)
+
+            idf = [math.log(1 + total / len(posting)) if posting else 0.0 for posting in postings]
+            scores = {
+                disease_id: sum(weight for weight, posting in zip(idf, postings) if disease_id in posting)
+                for disease_id in candidates
+            }
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
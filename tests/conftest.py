@@ -0,0 +1,55 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import FakeConnection  # noqa: E402
+
+
+@pytest.fixture
+def fake_connection():
+    return FakeConnection()
+
+
+@pytest.fixture
+def mysql_database():
+    """A scratch database with the base schema and every migration applied.
+
+    Needs a MySQL server: set MEDIFIT_TEST_MYSQL to user:password@host[:port].
+    Yields (mysql.connector connection, pymysql connection) to it.
+    """
+    url = os.environ.get("MEDIFIT_TEST_MYSQL")
+    if not url:
+        pytest.skip("MEDIFIT_TEST_MYSQL is not set")
+    import mysql.connector
+    import pymysql
+
+    import createdb
+
+    credentials, _, address = url.rpartition("@")
+    user, _, password = credentials.partition(":")
+    host, _, port = address.partition(":")
+    server = dict(host=host, port=int(port or 3306), user=user, password=password)
+    database = f"medifit_test_{uuid.uuid4().hex[:8]}"
+
+    connection = mysql.connector.connect(**server)
+    cursor = connection.cursor(buffered=True)
+    cursor.execute(f"CREATE DATABASE {database}")
+    cursor.execute(f"USE {database}")
+    try:
+        for command in createdb.SCHEMA_COMMANDS:
+            if command.strip().startswith("CREATE TABLE"):
+                cursor.execute(command)
+        createdb.apply_migrations(connection)
+        loader_connection = pymysql.connect(database=database, local_infile=True, **server)
+        try:
+            yield connection, loader_connection
+        finally:
+            loader_connection.close()
+    finally:
+        cursor.execute(f"DROP DATABASE {database}")
+        cursor.close()
+        connection.close()
@@ -0,0 +1,151 @@
+from contextlib import asynccontextmanager
+
+
+class FakeCursor:
+    """DB-API cursor recording every statement on its connection
+
+    ``rows`` is the result of the last statement, set by the connection's
+    ``respond`` hook.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = 0
+        self.lastrowid = None
+        self.rows = []
+
+    def execute(self, query, params=None):
+        self.rows = []
+        self.connection.run(self, "execute", query, params)
+
+    def executemany(self, query, params):
+        self.rows = []
+        self.connection.run(self, "executemany", query, list(params))
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FakeConnection:
+    """Connection whose statements are recorded as (method, query, params)
+
+    ``respond(cursor, method, query, params)`` may set ``cursor.rowcount`` or
+    raise, standing in for the server.
+    """
+
+    def __init__(self, respond=None):
+        self.respond = respond
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.server_thread_id = 1
+
+    def run(self, cursor, method, query, params):
+        self.statements.append((method, " ".join(query.split()), params))
+        if self.respond:
+            self.respond(cursor, method, query, params)
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def thread_id(self):
+        return self.server_thread_id
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def tables_written(self):
+        """Tables of the INSERT and LOAD DATA statements, in order"""
+        tables = []
+        for _, query, _ in self.statements:
+            words = query.split()
+            if words[:2] == ["INSERT", "INTO"]:
+                tables.append(words[2])
+            elif words[:2] == ["LOAD", "DATA"]:
+                tables.append(words[words.index("TABLE") + 1])
+        return tables
+
+
+class FakeAsyncCursor:
+    """aiomysql-style cursor running its coroutines on a FakeCursor"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = FakeCursor(connection.sync)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def execute(self, query, params=None):
+        self._cursor.execute(query, params)
+
+    async def executemany(self, query, params):
+        self._cursor.executemany(query, params)
+
+    async def fetchone(self):
+        return self._cursor.fetchone()
+
+    async def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    async def fetchall(self):
+        return self._cursor.fetchall()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class FakeAsyncConnection:
+    """aiomysql-style connection over a FakeConnection, which records the statements"""
+
+    def __init__(self, connection):
+        self.sync = connection
+
+    def cursor(self, *args, **kwargs):
+        return FakeAsyncCursor(self)
+
+    async def commit(self):
+        self.sync.commit()
+
+    async def rollback(self):
+        self.sync.rollback()
+
+
+class FakePool:
+    """aiomysql-style pool handing out one FakeAsyncConnection"""
+
+    def __init__(self, connection):
+        self.connection = FakeAsyncConnection(connection)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
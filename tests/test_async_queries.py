@@ -0,0 +1,74 @@
+import asyncio
+import inspect
+
+import pytest
+
+pytest.importorskip("aiomysql")
+
+import queries  # noqa: E402
+from async_queries import AsyncMediFit  # noqa: E402
+from fakes import FakeConnection, FakePool  # noqa: E402
+from main_queries import MediFitCLI  # noqa: E402
+
+
+def test_shared_methods_have_the_same_signatures():
+    shared = [name for name, _ in inspect.getmembers(AsyncMediFit, callable)
+              if not name.startswith("_") and hasattr(MediFitCLI, name)]
+    assert "iter_users_by_blood_group" in shared
+    for name in shared:
+        assert inspect.signature(getattr(AsyncMediFit, name)) == inspect.signature(getattr(MediFitCLI, name)), name
+
+
+def test_pages_carry_the_sync_continuation_token():
+    def respond(cursor, method, query, params):
+        cursor.rows = [{"UserID": 1}, {"UserID": 2}]
+
+    client = AsyncMediFit(FakePool(FakeConnection(respond)))
+    page = asyncio.run(client.retrieve_users_by_blood_group("O+", limit=1))
+
+    assert isinstance(page, queries.Page)
+    assert list(page) == [{"UserID": 1}]
+    assert queries.decode_token(queries.USERS_BY_BLOOD_GROUP.name, page.next_token) == (1,)
+
+
+def test_keyset_streaming_continues_after_the_last_key():
+    users = [{"UserID": user_id} for user_id in (3, 5, 8)]
+
+    def respond(cursor, method, query, params):
+        after = params[1] if len(params) == 3 else 0
+        cursor.rows = [user for user in users if user["UserID"] > after][:params[-1]]
+
+    connection = FakeConnection(respond)
+    client = AsyncMediFit(FakePool(connection))
+
+    async def collect():
+        return [row async for row in client.iter_users_by_blood_group("O+", batch_size=2, keyset=True)]
+
+    assert asyncio.run(collect()) == users
+    assert [params for _, _, params in connection.statements] == [("O+", 2), ("O+", 5, 2)]
+
+
+def test_writes_invalidate_cached_aggregates():
+    def respond(cursor, method, query, params):
+        if "FOR UPDATE" in query:
+            cursor.rows = [{"Weight": 70, "Height": 175, "BloodGroup": "O+"}]
+        elif query.startswith("SELECT BMI"):
+            cursor.rows = [{"BMI": 23.51}]
+        elif query.startswith("SELECT"):
+            cursor.rows = [{"AverageBMI": 24.0}]
+
+    connection = FakeConnection(respond)
+    client = AsyncMediFit(FakePool(connection))
+
+    async def scenario():
+        await client.get_average_bmi()
+        await client.get_average_bmi()
+        bmi = await client.update_user_weight(1, 72)
+        await client.get_average_bmi()
+        return bmi
+
+    assert asyncio.run(scenario()) == 23.51
+    assert connection.commits == 1
+    assert client.cache_stats()["hits"] == 1
+    assert client.cache_stats()["invalidations"] == 1
+    assert sum("AverageBMI" in query for _, query, _ in connection.statements) == 2
@@ -0,0 +1,140 @@
+import csv
+
+import pymysql
+import pytest
+
+from bulk_load import BulkLoader
+from fakes import FakeConnection
+
+REPORT_COLUMNS = ["TestID", "UserID", "TreatmentID", "TestType", "DoctorOnConsultation", "TestDate"]
+
+
+def write_reports(path, rows, columns=REPORT_COLUMNS):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.fixture
+def reports_csv(tmp_path):
+    return write_reports(tmp_path / "reports.csv", [
+        (1, 1, 1, "MRI", "Dr. Smith", "2024-01-10"),
+        (2, 2, 1, "MRI", "Dr. Adams", "2024-02-15"),
+        (3, 2, 2, "X-Ray", "Dr. Adams", "2024-02-16"),
+    ])
+
+
+def test_batch_load_registers_keys_before_reports(fake_connection, reports_csv):
+    BulkLoader(fake_connection, "TEST_REPORTS", batch_size=2).load(reports_csv)
+
+    assert fake_connection.tables_written() == ["TEST_REPORT_KEYS", "TEST_REPORTS"] * 2
+    method, query, params = fake_connection.statements[0]
+    assert query == "INSERT INTO TEST_REPORT_KEYS (TestID, UserID, TreatmentID) VALUES (%s, %s, %s)"
+    assert params == [(1, 1, 1), (2, 2, 1)]
+    assert fake_connection.statements[2][2] == [(3, 2, 2)]
+    assert fake_connection.commits == 1
+
+
+def test_batch_load_rolls_back_when_a_key_is_rejected(reports_csv):
+    def respond(cursor, method, query, params):
+        if "TEST_REPORT_KEYS" in query:
+            raise pymysql.err.IntegrityError(1062, "Duplicate entry '2' for key 'PRIMARY'")
+
+    connection = FakeConnection(respond)
+    with pytest.raises(pymysql.err.IntegrityError):
+        BulkLoader(connection, "TEST_REPORTS").load(reports_csv)
+
+    assert "TEST_REPORTS" not in connection.tables_written()
+    assert (connection.commits, connection.rollbacks) == (0, 1)
+
+
+def test_reports_without_test_id_are_refused(fake_connection, tmp_path):
+    path = write_reports(tmp_path / "reports.csv", [(1, 1, "MRI", "Dr. Smith", "2024-01-10")],
+                         columns=REPORT_COLUMNS[1:])
+    with pytest.raises(ValueError, match="needs a TestID column"):
+        BulkLoader(fake_connection, "TEST_REPORTS").load(path)
+    with pytest.raises(ValueError, match="needs a TestID column"):
+        BulkLoader(fake_connection, "TEST_REPORTS").load_data_infile(path)
+    assert fake_connection.tables_written() == []
+
+
+def load_data_connection(registered, loaded):
+    def respond(cursor, method, query, params):
+        if query.lstrip().startswith("LOAD DATA"):
+            cursor.rowcount = registered if "TEST_REPORT_KEYS" in query else loaded
+
+    return FakeConnection(respond)
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_load_data_registers_keys_in_a_first_pass(reports_csv, validate):
+    connection = load_data_connection(registered=3, loaded=3)
+    report = BulkLoader(connection, "TEST_REPORTS").load_data_infile(reports_csv, validate=validate)
+
+    assert connection.tables_written() == ["TEST_REPORT_KEYS", "TEST_REPORTS"]
+    keys_query = connection.statements[0][1]
+    assert "(TestID, UserID, TreatmentID, @skip, @skip, @skip)" in keys_query
+    assert report.loaded == 3
+    assert (connection.commits, connection.rollbacks) == (1, 0)
+
+
+@pytest.mark.parametrize("registered, loaded", [(2, 3), (2, 2), (3, 2)])
+def test_load_data_rolls_back_rows_skipped_as_duplicates(reports_csv, registered, loaded):
+    # LOAD DATA LOCAL turns key violations into warnings and skips the row
+    connection = load_data_connection(registered, loaded)
+    with pytest.raises(pymysql.err.IntegrityError, match="1 of 3 TEST_REPORTS rows"):
+        BulkLoader(connection, "TEST_REPORTS").load_data_infile(reports_csv, validate=False)
+    assert (connection.commits, connection.rollbacks) == (0, 1)
+
+
+def test_tables_without_a_registry_load_unchanged(fake_connection, tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text("UserID,Allergies\n1,Peanuts\n", encoding="utf-8")
+    BulkLoader(fake_connection, "MEDICAL_HISTORY").load(str(path))
+    assert fake_connection.tables_written() == ["MEDICAL_HISTORY"]
+
+
+def test_mysql_rejects_reused_test_ids_and_missing_users(mysql_database, tmp_path):
+    _, connection = mysql_database
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO USER (UserID, FirstName, LastName, Weight, Height, BloodGroup) "
+                       "VALUES (1, 'John', 'Doe', 75, 180, 'O+')")
+    connection.commit()
+    columns = ["TestID", "UserID", "TestType", "DoctorOnConsultation", "TestDate"]
+    loaded = write_reports(tmp_path / "loaded.csv", [(1, 1, "MRI", "Dr. Smith", "2024-01-10")], columns)
+    BulkLoader(connection, "TEST_REPORTS").load(loaded)
+
+    # Same TestID in another month lands in another partition, where only the registry sees it
+    reused = write_reports(tmp_path / "reused.csv", [(1, 1, "MRI", "Dr. Smith", "2024-03-10")], columns)
+    orphan = write_reports(tmp_path / "orphan.csv", [(2, 99, "MRI", "Dr. Smith", "2024-03-10")], columns)
+    for path in (reused, orphan):
+        with pytest.raises(pymysql.err.IntegrityError):
+            BulkLoader(connection, "TEST_REPORTS").load(path)
+        with pytest.raises(pymysql.err.IntegrityError):
+            BulkLoader(connection, "TEST_REPORTS").load_data_infile(path)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT TestID, TestDate FROM TEST_REPORTS")
+        assert [row[0] for row in cursor.fetchall()] == [1]
+        cursor.execute("SELECT TestID, UserID FROM TEST_REPORT_KEYS")
+        assert cursor.fetchall() == ((1, 1),)
+
+
+def test_disease_load_indexes_symptoms(tmp_path):
+    def respond(cursor, method, query, params):
+        if "NOT EXISTS" in query:
+            cursor.rows = [(7, "Runny Nose, Cough"), (8, "Coughing")]
+
+    connection = FakeConnection(respond)
+    path = write_reports(tmp_path / "diseases.csv", [
+        ("Common Cold", 3, "Medium", "Runny Nose, Cough"),
+        ("Bronchitis", 5, "Low", "Coughing"),
+    ], columns=["DiseaseName", "Severity", "Communicability", "Symptoms"])
+    BulkLoader(connection, "DISEASE").load(path)
+
+    assert connection.tables_written() == ["DISEASE"]
+    [postings] = [params for _, query, params in connection.statements if "DISEASE_SYMPTOM (" in query]
+    assert postings == [("runny", 7), ("nos", 7), ("cough", 7), ("cough", 8)]
+    assert connection.commits == 2
@@ -0,0 +1,32 @@
+from donor_matching import COMPATIBLE_DONORS, DonorIndex
+
+USERS = [
+    {'UserID': 9, 'BloodGroup': 'O-', 'Location': 'Chicago'},
+    {'UserID': 4, 'BloodGroup': 'A+', 'Location': 'chicago'},
+    {'UserID': 7, 'BloodGroup': 'A+', 'Location': 'Chicago'},
+    {'UserID': 1, 'BloodGroup': 'A+', 'Location': 'Houston'},
+    {'UserID': 3, 'BloodGroup': 'B+', 'Location': None},
+    {'UserID': 2, 'BloodGroup': 'O-', 'Location': 'Chicago'},
+]
+LOCATIONS = [
+    {'Location': 'Chicago', 'Latitude': 41.8781, 'Longitude': -87.6298},
+    {'Location': 'Houston', 'Latitude': 29.7604, 'Longitude': -95.3698},
+]
+
+
+def test_bulk_build_matches_incremental_adds():
+    bulk = DonorIndex.from_rows(USERS, LOCATIONS)
+    incremental = DonorIndex.from_rows([], LOCATIONS)
+    for row in USERS:
+        incremental.add(row['UserID'], row['BloodGroup'], row['Location'])
+
+    assert bulk._by_location == incremental._by_location
+    assert [match[0] for match in bulk.search('A+', 'Chicago')] == [4, 7, 2, 9, 1]
+    for group in COMPATIBLE_DONORS:
+        assert bulk.search(group, 'Houston') == incremental.search(group, 'Houston')
+
+
+def test_moved_user_leaves_its_bulk_built_bucket():
+    index = DonorIndex.from_rows(USERS, LOCATIONS)
+    index.add(4, 'A+', 'Houston')
+    assert [match[0] for match in index.search('A+', 'Houston')] == [1, 4, 7, 2, 9]
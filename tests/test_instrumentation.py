@@ -0,0 +1,30 @@
+import logging
+
+import queries
+from fakes import FakeConnection
+from instrumentation import QueryInstrumentation
+
+PATIENT = ("Jane", "Smith", "A-", "Female", "1990-03-22", 62.3, 165, "Los Angeles")
+
+
+def test_slow_query_log_leaves_out_parameter_values(caplog):
+    instrumentation = QueryInstrumentation(slow_query_threshold=0, explain_slow_queries=False)
+    with caplog.at_level(logging.WARNING, logger="medifit.slow_queries"):
+        instrumentation.execute(FakeConnection().cursor(), "insert_user", queries.INSERT_USER, PATIENT)
+
+    [entry] = instrumentation.slow_queries()
+    assert entry["name"] == "insert_user"
+    assert entry["param_count"] == 8
+    assert entry["params"] is None
+    assert "(8 params)" in caplog.text
+    assert "Jane" not in caplog.text and "Los Angeles" not in caplog.text
+
+
+def test_parameter_values_are_logged_only_when_asked(caplog):
+    instrumentation = QueryInstrumentation(slow_query_threshold=0, explain_slow_queries=False,
+                                           log_query_params=True)
+    with caplog.at_level(logging.WARNING, logger="medifit.slow_queries"):
+        instrumentation.execute(FakeConnection().cursor(), "insert_user", queries.INSERT_USER, PATIENT)
+
+    assert "Jane" in instrumentation.slow_queries()[0]["params"]
+    assert "Jane" in caplog.text
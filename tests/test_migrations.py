@@ -0,0 +1,158 @@
+import mysql.connector
+import pytest
+
+import createdb
+
+# What withdrawn migration 8 did to UNDERGOING_TREATMENTS
+LEGACY_STATUS_PARTITIONING = [
+    """
+    ALTER TABLE UNDERGOING_TREATMENTS
+        MODIFY Status VARCHAR(10) NOT NULL,
+        ADD CONSTRAINT chk_ut_status CHECK (Status IN ('Ongoing', 'Completed')),
+        DROP PRIMARY KEY,
+        ADD PRIMARY KEY (UserID, TreatmentID, Status)
+    """,
+    """
+    ALTER TABLE UNDERGOING_TREATMENTS PARTITION BY LIST COLUMNS (Status) (
+        PARTITION p_ongoing VALUES IN ('Ongoing'),
+        PARTITION p_completed VALUES IN ('Completed')
+    )
+    """,
+]
+
+
+def seed(cursor):
+    cursor.execute("INSERT INTO USER (UserID, FirstName, LastName, Weight, Height, BloodGroup) "
+                   "VALUES (1, 'John', 'Doe', 75, 180, 'O+')")
+    cursor.execute("INSERT INTO DISEASE (DiseaseID, DiseaseName, Communicability) VALUES (1, 'Flu', 'High')")
+    cursor.execute("INSERT INTO PRESCRIBED_TREATMENTS (TreatmentID, DiseaseID, SourceOfPrescription) "
+                   "VALUES (1, 1, 'Clinic')")
+
+
+def foreign_keys(cursor, table):
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL
+        ORDER BY COLUMN_NAME
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def rerun(connection, cursor, version):
+    cursor.execute("DELETE FROM SCHEMA_MIGRATIONS WHERE Version = %s", (version,))
+    connection.commit()
+    return createdb.apply_migrations(connection)
+
+
+def test_undergoing_treatments_keeps_its_keys(mysql_database):
+    connection, _ = mysql_database
+    cursor = connection.cursor(buffered=True)
+    assert createdb._partitions(cursor, "UNDERGOING_TREATMENTS") == []
+    assert createdb._primary_key(cursor, "UNDERGOING_TREATMENTS") == ["UserID", "TreatmentID"]
+    assert foreign_keys(cursor, "UNDERGOING_TREATMENTS") == ["DiseaseID", "TreatmentID", "UserID"]
+
+
+def test_status_partitioning_is_undone(mysql_database):
+    connection, _ = mysql_database
+    cursor = connection.cursor(buffered=True)
+    seed(cursor)
+    createdb._drop_foreign_keys(cursor, "UNDERGOING_TREATMENTS")
+    for statement in LEGACY_STATUS_PARTITIONING:
+        cursor.execute(statement)
+    cursor.execute("INSERT INTO UNDERGOING_TREATMENTS (UserID, TreatmentID, DiseaseID, Status) "
+                   "VALUES (1, 1, 1, 'Ongoing')")
+
+    assert rerun(connection, cursor, 12) == [12]
+    assert createdb._partitions(cursor, "UNDERGOING_TREATMENTS") == []
+    assert createdb._primary_key(cursor, "UNDERGOING_TREATMENTS") == ["UserID", "TreatmentID"]
+    assert foreign_keys(cursor, "UNDERGOING_TREATMENTS") == ["DiseaseID", "TreatmentID", "UserID"]
+    with pytest.raises(mysql.connector.IntegrityError):
+        cursor.execute("INSERT INTO UNDERGOING_TREATMENTS (UserID, TreatmentID, Status) "
+                       "VALUES (1, 1, 'Completed')")
+
+
+def test_status_partitioning_with_duplicates_stops(mysql_database):
+    connection, _ = mysql_database
+    cursor = connection.cursor(buffered=True)
+    seed(cursor)
+    createdb._drop_foreign_keys(cursor, "UNDERGOING_TREATMENTS")
+    for statement in LEGACY_STATUS_PARTITIONING:
+        cursor.execute(statement)
+    cursor.execute("INSERT INTO UNDERGOING_TREATMENTS (UserID, TreatmentID, Status) "
+                   "VALUES (1, 1, 'Ongoing'), (1, 1, 'Completed')")
+    connection.commit()
+
+    with pytest.raises(mysql.connector.Error, match="more than once"):
+        rerun(connection, cursor, 12)
+
+
+def test_test_report_keys_backfill(mysql_database):
+    connection, _ = mysql_database
+    cursor = connection.cursor(buffered=True)
+    seed(cursor)
+    cursor.execute("DROP TABLE TEST_REPORT_KEYS")
+    cursor.execute("INSERT INTO TEST_REPORTS (TestID, UserID, TreatmentID, TestType, DoctorOnConsultation, TestDate) "
+                   "VALUES (1, 1, 1, 'MRI', 'Dr. Smith', '2024-01-10')")
+    cursor.execute("INSERT INTO TEST_REPORTS_ARCHIVE (TestID, UserID, TreatmentID, TestType, DoctorOnConsultation, "
+                   "TestDate) VALUES (1, 1, 1, 'MRI', 'Dr. Smith', '2024-01-10'), "
+                   "(2, 1, NULL, 'X-Ray', 'Dr. Adams', '2015-05-01')")
+    connection.commit()
+
+    assert rerun(connection, cursor, 13) == [13]
+    cursor.execute("SELECT TestID, UserID, TreatmentID FROM TEST_REPORT_KEYS ORDER BY TestID")
+    assert cursor.fetchall() == [(1, 1, 1), (2, 1, None)]
+    assert foreign_keys(cursor, "TEST_REPORT_KEYS") == ["TreatmentID", "UserID"]
+
+
+@pytest.mark.parametrize("report, error", [
+    ((1, 1, "2024-02-10"), "TestIDs are shared"),
+    ((2, 99, "2024-02-10"), "missing USER.UserID"),
+])
+def test_test_report_keys_backfill_stops_on_bad_reports(mysql_database, report, error):
+    connection, _ = mysql_database
+    cursor = connection.cursor(buffered=True)
+    seed(cursor)
+    cursor.execute("DROP TABLE TEST_REPORT_KEYS")
+    cursor.execute("INSERT INTO TEST_REPORTS (TestID, UserID, TestType, DoctorOnConsultation, TestDate) "
+                   "VALUES (1, 1, 'MRI', 'Dr. Smith', '2024-01-10'), (%s, %s, 'MRI', 'Dr. Smith', %s)", report)
+    connection.commit()
+
+    with pytest.raises(mysql.connector.Error, match=error):
+        rerun(connection, cursor, 13)
+
+
+@pytest.mark.parametrize("weight, height, bmi", [
+    (75.5, 180, 23.30),
+    (999.99, 30, 11111.00),
+    (999.99, 0.01, None),
+    (80, 1.75, None),
+    (80, 0, None),
+])
+def test_user_bmi_is_null_instead_of_overflowing(mysql_database, weight, height, bmi):
+    connection, _ = mysql_database
+    cursor = connection.cursor(buffered=True)
+    cursor.execute("INSERT INTO USER (FirstName, LastName, Weight, Height, BloodGroup) "
+                   "VALUES ('John', 'Doe', %s, %s, 'O+')", (weight, height))
+    cursor.execute("SELECT BMI FROM USER WHERE UserID = LAST_INSERT_ID()")
+    stored = cursor.fetchone()[0]
+    assert (None if stored is None else float(stored)) == bmi
+
+
+def test_user_bmi_guard_applies_to_migrated_databases(mysql_database):
+    connection, _ = mysql_database
+    cursor = connection.cursor(buffered=True)
+    cursor.execute("""
+        ALTER TABLE USER MODIFY COLUMN BMI DECIMAL(9,2)
+        AS (ROUND(Weight * 10000 / NULLIF(Height * Height, 0), 2)) STORED
+    """)
+    cursor.execute("INSERT INTO USER (FirstName, LastName, Weight, Height, BloodGroup) "
+                   "VALUES ('John', 'Doe', 80, 1.75, 'O+'), ('Jane', 'Doe', 60, 160, 'O+')")
+    connection.commit()
+
+    assert rerun(connection, cursor, 14) == [14]
+    cursor.execute("SELECT Height, BMI FROM USER ORDER BY UserID")
+    assert [(float(height), bmi if bmi is None else float(bmi)) for height, bmi in cursor.fetchall()] == \
+        [(1.75, None), (160.0, 23.44)]
+    cursor.execute("SELECT RowCount, BmiCount, BmiSum FROM HEALTH_STATS "
+                   "WHERE Dimension = 'blood_group' AND DimValue = 'O+'")
+    assert cursor.fetchone()[:2] == (2, 1)
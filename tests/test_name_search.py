@@ -0,0 +1,47 @@
+from name_search import NameIndex
+
+USERS = [
+    {'UserID': 1, 'FirstName': 'Jonathan', 'LastName': 'Smith'},
+    {'UserID': 2, 'FirstName': 'Jon', 'LastName': 'Smithson'},
+    {'UserID': 3, 'FirstName': 'Joanna', 'LastName': 'Doe'},
+    {'UserID': 4, 'FirstName': 'José-Luis', 'LastName': 'Smith'},
+]
+
+
+def test_bulk_build_matches_incremental_adds():
+    bulk = NameIndex.from_rows(USERS)
+    incremental = NameIndex()
+    for row in reversed(USERS):
+        incremental.add(row['UserID'], row['FirstName'], row['LastName'])
+
+    assert bulk._tokens == sorted(bulk._tokens) == incremental._tokens
+    for name in ('jo', 'smith', 'jon smth', 'luis', 'joanna'):
+        assert bulk.search(name) == incremental.search(name)
+
+
+def test_prefix_range_stops_at_first_non_match():
+    index = NameIndex.from_rows(USERS)
+    assert [user_id for user_id, _ in index.search('jo')] == [2, 4, 3, 1]
+    assert index.search('smithsonian') == []
+    index.add(5, 'Zoe', 'Smithsonian')
+    assert index.search('smithsonian') == [(5, 3.0)]
+
+
+def test_overlapping_prefixes_match_in_either_order():
+    index = NameIndex.from_rows(USERS + [{'UserID': 5, 'FirstName': 'John', 'LastName': 'Johnson'}])
+
+    assert [user_id for user_id, _ in index.search('john jo')] == [5]
+    assert index.search('jo john') == index.search('john jo')
+    assert [user_id for user_id, _ in index.search('john johnson')] == [5]
+    # Each term still needs a token of its own
+    assert index.search('johnson johnson') == []
+    assert [user_id for user_id, _ in index.search('jo jo')] == [5]
+
+
+def test_assignment_prefers_the_best_total():
+    index = NameIndex.from_rows([{'UserID': 1, 'FirstName': 'Jon', 'LastName': 'Jonas'}])
+
+    # 'jon' exactly on 'jon' and 'jona' as a prefix of 'jonas' beats the reverse
+    [(user_id, score)] = index.search('jona jon')
+    assert user_id == 1
+    assert score == 3.0 + 2.0 + 4 / 5 / 2
@@ -0,0 +1,79 @@
+import pymysql
+import pytest
+
+import prepared_statements
+import queries
+from fakes import FakeConnection
+from instrumentation import QueryInstrumentation
+
+
+def run(registry, connection, name, sql, params):
+    QueryInstrumentation(slow_query_threshold=None).execute(connection.cursor(), name, sql, params,
+                                                            registry.execute)
+
+
+def test_statement_is_prepared_once_per_session():
+    registry = prepared_statements.StatementRegistry()
+    connection = FakeConnection()
+    run(registry, connection, "user_bmi", queries.USER_BMI, (7,))
+    run(registry, connection, "user_bmi", queries.USER_BMI, (8,))
+
+    assert [(query, params) for _, query, params in connection.statements] == [
+        ("SET collation_connection = @@collation_database", None),
+        ("PREPARE ps_user_bmi_0 FROM %s", ("SELECT BMI FROM USER WHERE UserID = ?",)),
+        ("SET @mf_p0 = %s", (7,)),
+        ("EXECUTE ps_user_bmi_0 USING @mf_p0", None),
+        ("SET @mf_p0 = %s", (8,)),
+        ("EXECUTE ps_user_bmi_0 USING @mf_p0", None),
+    ]
+    # One statement per round trip: nothing relies on CLIENT.MULTI_STATEMENTS
+    assert not any(";" in query for _, query, _ in connection.statements)
+
+
+def test_reconnected_session_prepares_again():
+    registry = prepared_statements.StatementRegistry()
+    connection = FakeConnection()
+    run(registry, connection, "user_bmi", queries.USER_BMI, (7,))
+    connection.server_thread_id = 2
+    run(registry, connection, "user_bmi", queries.USER_BMI, (7,))
+
+    assert sum(query.startswith("PREPARE") for _, query, _ in connection.statements) == 2
+
+
+def test_unknown_statement_handler_is_prepared_again():
+    failures = []
+
+    def respond(cursor, method, query, params):
+        if query.startswith("EXECUTE") and not failures:
+            failures.append(query)
+            raise pymysql.err.InternalError(prepared_statements.ER_UNKNOWN_STMT_HANDLER, "Unknown prepared statement")
+
+    registry = prepared_statements.StatementRegistry()
+    connection = FakeConnection(respond)
+    run(registry, connection, "lock_user", queries.LOCK_USER, (7,))
+
+    assert [query.split()[0] for _, query, _ in connection.statements] == [
+        "SET", "PREPARE", "SET", "EXECUTE", "PREPARE", "SET", "EXECUTE"]
+
+
+def test_keyset_forms_are_separate_statements():
+    registry = prepared_statements.StatementRegistry()
+    first = queries.keyset_query(queries.USERS_BY_BLOOD_GROUP, None, 11)[0]
+    following = queries.keyset_query(queries.USERS_BY_BLOOD_GROUP, (5,), 11)[0]
+    assert registry.register("users_by_blood_group", first) is registry.register("users_by_blood_group", first)
+    assert registry.register("users_by_blood_group", first) is not registry.register("users_by_blood_group", following)
+    assert registry.register("users_by_blood_group", following).parameter_count == 3
+
+
+def test_parameter_count_is_checked():
+    registry = prepared_statements.StatementRegistry()
+    with pytest.raises(pymysql.ProgrammingError):
+        registry.execute(FakeConnection().cursor(), "user_bmi", queries.USER_BMI, (1, 2))
+
+
+def test_listing_and_lock_names_are_prepared():
+    assert queries.USERS_BY_BLOOD_GROUP.name in prepared_statements.PREPARED_QUERIES
+    assert "lock_user" in prepared_statements.PREPARED_QUERIES
+    # Their text varies with the input
+    assert "lock_users" not in prepared_statements.PREPARED_QUERIES
+    assert "test_report_bodies" not in prepared_statements.PREPARED_QUERIES
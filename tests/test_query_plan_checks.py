@@ -0,0 +1,22 @@
+import pytest
+
+import createdb
+import queries
+
+LISTINGS = [queries.USERS_BY_BLOOD_GROUP, queries.USERS_BY_ONGOING_TREATMENTS, queries.MRI_TEST_REPORTS,
+            queries.USERS_BY_BMI_BAND, queries.USERS_LOCATION_BY_BLOOD_GROUP, queries.USERS_BY_NAME_PREFIX]
+
+
+@pytest.mark.parametrize("name, query, params",
+                         [check[:3] for check in createdb.QUERY_PLAN_CHECKS + createdb.PARTITION_PRUNING_CHECKS])
+def test_every_placeholder_has_a_sample_parameter(name, query, params):
+    assert query.count("%s") == len(params)
+
+
+@pytest.mark.parametrize("list_query", LISTINGS, ids=lambda list_query: list_query.name)
+def test_listings_are_checked_as_run_including_the_next_page(list_query):
+    checks = {name: query for name, query, _, _ in createdb.QUERY_PLAN_CHECKS}
+    first, _ = queries.keyset_query(list_query, None, queries.DEFAULT_PAGE_SIZE + 1)
+    assert checks[list_query.name] == first
+    next_page = checks[f"{list_query.name} (next page)"]
+    assert next_page.startswith(list_query.sql.rstrip()) and " > " in next_page
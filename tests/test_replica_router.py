@@ -0,0 +1,109 @@
+import pymysql
+import pytest
+
+import replica_router
+from main_queries import MediFitCLI
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class ServerConnection:
+    """Stand-in for a pymysql connection to ``host``"""
+
+    def __init__(self, host):
+        self.host = host
+        self.open = True
+
+    def cursor(self, cursor_class=None):
+        return self
+
+    def ping(self, reconnect=True):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.open = False
+
+
+@pytest.fixture
+def servers(monkeypatch):
+    """Hosts accepting connections; connecting to any other host fails"""
+    up = {"primary", "replica"}
+
+    def connect(host, **kwargs):
+        if host not in up:
+            raise pymysql.err.OperationalError(2003, f"Can't connect to MySQL server on '{host}'")
+        return ServerConnection(host)
+
+    monkeypatch.setattr(pymysql, "connect", connect)
+    return up
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(replica_router, "time", clock)
+    return clock
+
+
+def read_host(cli):
+    with cli._cursor(read_only=True) as cursor:
+        return cursor.host
+
+
+def test_replica_down_at_startup_is_used_once_it_is_back(servers, clock):
+    servers.discard("replica")
+    cli = MediFitCLI(host="primary", replicas=["replica:3307"])
+    assert [name for name, _ in cli.router.replicas] == ["replica:3307"]
+
+    assert read_host(cli) == "primary"
+    assert cli.routing_stats()["replicas_down"] == ["replica:3307"]
+
+    servers.add("replica")
+    clock.now += 10
+    assert read_host(cli) == "primary"  # still inside retry_interval
+
+    clock.now += cli.router.retry_interval
+    assert read_host(cli) == "replica"
+    stats = cli.routing_stats()
+    assert stats["replicas_down"] == []
+    assert stats["replica_reads"] == {"replica:3307": 1}
+    assert stats["replica_failovers"] == 1
+
+
+def test_replica_pools_connect_lazily(servers, clock):
+    cli = MediFitCLI(host="primary", replicas=["replica:3307", "replica:3308"], min_pool_size=2)
+    assert cli.pool._size == 2
+    assert [pool._size for _, pool in cli.router.replicas] == [0, 0]
+    assert read_host(cli) == "replica"
+
+
+def test_replica_reads_do_not_fill_the_cache_after_another_sessions_write(servers, clock, monkeypatch):
+    cli = MediFitCLI(host="primary", replicas=["replica:3307"], read_your_writes_window=5.0)
+    monkeypatch.setattr(cli, "_metric", lambda name: read_host(cli))
+
+    with cli.session("a"):
+        cli._invalidate(("USER",))  # session a committed a change to USER
+    with cli.session("b"):
+        # b reads a replica that may not have the write yet: served, not cached
+        assert cli.get_average_bmi() == {"AverageBMI": "replica"}
+    with cli.session("a"):
+        # a must see its write, from the primary rather than b's replica read
+        assert cli.get_average_bmi() == {"AverageBMI": "primary"}
+    with cli.session("b"):
+        assert cli.get_average_bmi() == {"AverageBMI": "primary"}
+    assert cli.cache_stats()["rejections"] == 1
+
+    clock.now += 5.0
+    cli.cache.clear()
+    with cli.session("b"):
+        assert cli.get_average_bmi() == {"AverageBMI": "replica"}
+    assert cli.cache_stats()["entries"] == 1
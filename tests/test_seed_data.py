@@ -0,0 +1,59 @@
+import pytest
+
+import append_data
+from fakes import FakeConnection
+from metrics import HEALTH_METRICS, MetricsEngine
+from symptom_search import POSTINGS_QUERY, SymptomIndex
+
+
+def test_seed_rebuilds_health_stats_after_the_base_tables():
+    connection = FakeConnection()
+    append_data.insert_sample_data(connection.cursor())
+
+    queries = [query for _, query, _ in connection.statements]
+    last_insert = max(position for position, query in enumerate(queries)
+                      if query.startswith("INSERT INTO UNDERGOING_TREATMENTS"))
+    rebuilt = [position for position, query in enumerate(queries)
+               if query.startswith("DELETE FROM HEALTH_STATS")]
+    assert rebuilt and min(rebuilt) > last_insert
+    assert connection.commits == 0
+
+
+def test_seeded_database_has_aggregates(mysql_database):
+    connection, _ = mysql_database
+    cursor = connection.cursor(buffered=True)
+    append_data.insert_sample_data(cursor)
+    connection.commit()
+
+    metrics = MetricsEngine(HEALTH_METRICS).compute(connection.cursor(buffered=True, dictionary=True))
+    assert metrics["AverageBMI"] == pytest.approx(23.77)
+    assert metrics["TotalOngoingTreatments"] == 3
+    assert metrics["AllopathyTreatmentCount"] == 3
+
+
+def test_seed_indexes_disease_symptoms():
+    def respond(cursor, method, query, params):
+        if query.lstrip().startswith("INSERT INTO DISEASE "):
+            respond.disease_id += 1
+            cursor.lastrowid = respond.disease_id
+    respond.disease_id = 0
+
+    connection = FakeConnection(respond)
+    append_data.insert_sample_data(connection.cursor())
+
+    [postings] = [params for _, query, params in connection.statements if "DISEASE_SYMPTOM" in query]
+    assert sorted(disease_id for term, disease_id in postings if term == "cough") == [3, 5]
+    assert ("runny", 4) in postings
+
+
+def test_seeded_database_finds_diseases_by_symptom(mysql_database):
+    connection, _ = mysql_database
+    cursor = connection.cursor(buffered=True)
+    append_data.insert_sample_data(cursor)
+    connection.commit()
+
+    cursor = connection.cursor(buffered=True, dictionary=True)
+    cursor.execute(POSTINGS_QUERY)
+    ranked = SymptomIndex.from_rows(cursor.fetchall()).search("cough")
+    cursor.execute("SELECT DiseaseID FROM DISEASE WHERE DiseaseName IN ('Common Cold', 'COVID-19')")
+    assert sorted(disease_id for disease_id, _ in ranked) == sorted(row["DiseaseID"] for row in cursor.fetchall())
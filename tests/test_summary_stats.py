@@ -0,0 +1,29 @@
+from decimal import Decimal
+
+import pytest
+
+import summary_stats
+
+
+@pytest.mark.parametrize("weight, height, expected", [
+    (75.5, 180, True),
+    (75.5, Decimal("30.00"), True),
+    (75.5, 29.995, True),  # stored as 30.00
+    (75.5, 29.99, False),
+    (999.99, 0.5, False),
+    (80, 1.75, False),  # metres in the cm column
+    (80, 0, False),
+    (None, 180, False),
+    (80, None, False),
+])
+def test_has_bmi_matches_the_generated_column(weight, height, expected):
+    assert summary_stats.has_bmi(weight, height) is expected
+
+
+def test_users_without_bmi_are_counted_but_not_averaged():
+    [(query, params)] = summary_stats.user_inserted('O+', 999.99, 0.5)
+    assert params == ('blood_group', 'O+', 1, 0)
+    assert summary_stats.user_weight_changed('O+', 80, 90, 1.75) == []
+
+    [(query, params)] = summary_stats.user_inserted('O+', 75.5, 180)
+    assert params == ('blood_group', 'O+', 1, 1, 75.5, 180, 180)